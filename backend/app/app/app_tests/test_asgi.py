@@ -0,0 +1,20 @@
+from asgiref.sync import AsyncToSync, SyncToAsync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import SimpleTestCase, override_settings
+
+
+class ASGIMiddlewareChainTests(SimpleTestCase):
+    @override_settings(QUERY_PROFILE=True)
+    def test_chain_has_no_thread_hops(self):
+        # A sync-only middleware would run every ASGI request, async views
+        # included, through a thread via SyncToAsync.
+        handler = ASGIHandler()._middleware_chain
+        seen = []
+        while handler is not None:
+            self.assertNotIsInstance(handler, (SyncToAsync, AsyncToSync), seen)
+            seen.append(type(handler).__name__)
+            handler = getattr(handler, "__wrapped__", None) or getattr(
+                handler, "get_response", None
+            )
+        self.assertIn("QueryProfileMiddleware", seen)
+        self.assertIn("ProfilingMiddleware", seen)
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.authentication import user_is_active
+
+User = get_user_model()
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.user = User.objects.create_user(username="jwt", password="pass12345")
+        self.client = APIClient()
+
+    def obtain(self):
+        resp = self.client.post(
+            "/api/auth/token/", {"username": "jwt", "password": "pass12345"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()["access"]
+
+    def test_issued_token_skips_user_lookup(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()}")
+        user_is_active(self.user.pk)
+        with self.assertNumQueries(1):  # counters only
+            resp = self.client.get("/api/notes/stats/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()}")
+        self.assertEqual(self.client.get("/api/notes/").status_code, 200)
+        self.user.is_active = False
+        self.user.save()  # post_save drops the cached state
+        self.assertEqual(self.client.get("/api/notes/").status_code, 401)
+
+    def test_token_without_username_claim_uses_database(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        with self.assertNumQueries(2):  # auth_user row + counters
+            resp = self.client.get("/api/notes/stats/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+
+    @override_settings(AUTH_STATELESS_JWT=False)
+    def test_stateless_mode_can_be_disabled(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.obtain()}")
+        with self.assertNumQueries(2):
+            resp = self.client.get("/api/notes/stats/")
+        self.assertEqual(resp.status_code, 200, resp.content)
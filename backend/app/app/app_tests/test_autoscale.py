@@ -0,0 +1,136 @@
+import json
+import os
+import signal
+import socket
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from app.autoscale import Autoscaler, listen_backlog, rss_mb
+
+
+class FakeArbiter:
+    def __init__(self, workers, threads=2):
+        self.pid = 1
+        self.num_workers = workers
+        self.WORKERS = {100 + i: SimpleNamespace(pid=100 + i, age=i) for i in range(workers)}
+        self.LISTENERS = []
+        self.log = mock.Mock()
+
+
+class AutoscalerTests(SimpleTestCase):
+    def make(self, workers=2, **kwargs):
+        options = {"window": 2, "up_cooldown": 0, "down_cooldown": 0, **kwargs}
+        scaler = Autoscaler(min_workers=1, max_workers=4, threads=2, **options)
+        scaler.server = FakeArbiter(workers)
+        for worker in scaler.server.WORKERS.values():
+            scaler.assign(worker)
+        return scaler
+
+    def busy(self, scaler, requests):
+        worker = next(iter(scaler.server.WORKERS.values()))
+        for _ in range(requests):
+            scaler.request_started(worker)
+        return worker
+
+    @mock.patch("app.autoscale.os.kill")
+    def test_scales_up_when_threads_stay_busy(self, kill):
+        scaler = self.make()
+        self.busy(scaler, 4)  # 4 of 2 workers x 2 threads
+        scaler.tick()
+        kill.assert_not_called()  # one sample is not a trend
+        scaler.tick()
+        kill.assert_called_once_with(1, signal.SIGTTIN)
+        self.assertEqual(scaler.events["up"], 1)
+
+    @mock.patch("app.autoscale.os.kill")
+    def test_scales_down_when_idle_but_not_below_min(self, kill):
+        scaler = self.make(workers=2)
+        scaler.tick()
+        scaler.tick()
+        kill.assert_called_once_with(1, signal.SIGTTOU)
+
+        kill.reset_mock()
+        scaler.server.num_workers = 1
+        scaler.tick()
+        scaler.tick()
+        kill.assert_not_called()
+
+    @mock.patch("app.autoscale.os.kill")
+    def test_backlog_scales_up_without_request_counts(self, kill):
+        scaler = self.make(count_requests=False)
+        with mock.patch("app.autoscale.listen_backlog", return_value=3):
+            scaler.tick()
+            scaler.tick()
+        kill.assert_called_once_with(1, signal.SIGTTIN)
+        # ...and without them it never scales down.
+        kill.reset_mock()
+        scaler.tick()
+        scaler.tick()
+        kill.assert_not_called()
+
+    @mock.patch("app.autoscale.os.kill")
+    def test_cooldown(self, kill):
+        scaler = self.make(up_cooldown=3600)
+        scaler.last_scaled = 10**9
+        self.busy(scaler, 4)
+        scaler.tick()
+        scaler.tick()
+        kill.assert_not_called()
+
+    @mock.patch("app.autoscale.os.kill")
+    def test_recycles_one_worker_over_the_rss_ceiling(self, kill):
+        scaler = self.make(max_rss_mb=100, enabled=False)
+        with mock.patch("app.autoscale.rss_mb", side_effect=lambda pid: 150 + pid):
+            scaler.tick()
+            scaler.tick()  # the first one has not exited yet
+        kill.assert_called_once_with(101, signal.SIGTERM)
+
+        scaler.release(scaler.server.WORKERS.pop(101))
+        with mock.patch("app.autoscale.rss_mb", side_effect=lambda pid: 150 + pid):
+            scaler.tick()
+        kill.assert_called_with(100, signal.SIGTERM)
+
+    def test_finished_and_exited_workers_release_their_requests(self):
+        scaler = self.make()
+        worker = self.busy(scaler, 2)
+        scaler.request_finished(worker)
+        self.assertEqual(sum(scaler.busy), 1)
+        scaler.release(worker)
+        self.assertEqual(sum(scaler.busy), 0)
+
+    def test_listen_backlog_and_rss(self):
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(8)
+        client = socket.create_connection(server.getsockname())
+        try:
+            backlog = listen_backlog([server])
+            if backlog is not None:  # /proc/net/tcp is Linux-only
+                self.assertEqual(backlog, 1)
+        finally:
+            client.close()
+            server.close()
+        if os.path.exists("/proc/self/statm"):
+            self.assertGreater(rss_mb(os.getpid()), 0)
+
+
+class AutoscaleMetricsTests(TestCase):
+    def test_gauges_are_served_with_the_request_metrics(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            scaler = Autoscaler(1, 4, 2, metrics_dir=directory)
+            scaler.server = FakeArbiter(2)
+            scaler.events["up"] = 2
+            with mock.patch("app.autoscale.rss_mb", return_value=64.0):
+                scaler.tick()
+            self.assertTrue(json.loads(open(os.path.join(directory, "autoscale.json")).read()))
+            body = APIClient().get("/api/metrics/").content.decode()
+
+        self.assertIn("# TYPE notes_gunicorn_workers gauge", body)
+        self.assertIn("notes_gunicorn_workers 2", body)
+        self.assertIn("notes_gunicorn_busy_ratio 0", body)
+        self.assertIn(f"notes_gunicorn_worker_rss_max_bytes {64 * 2**20}", body)
+        self.assertIn('notes_gunicorn_autoscale_events_total{action="up"} 2', body)
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from notes.notes_tests.test_api import auth_client_for
+from rest_framework.test import APIClient
+
+from app.dbmetrics import stats
+
+User = get_user_model()
+
+
+class DBConnectionMetricsTests(TestCase):
+    def setUp(self):
+        stats.reset()
+
+    def test_api_requests_are_counted_and_reuse_the_connection(self):
+        client = auth_client_for(User.objects.create_user(username="db", password="pass12345"))
+        for _ in range(3):
+            self.assertEqual(client.get("/api/notes/").status_code, 200)
+
+        report = APIClient().get("/api/health/?checks=1").json()["db_connections"]
+        self.assertEqual(report["requests"], 3)
+        # The test case holds one connection open, as CONN_MAX_AGE does in a worker.
+        self.assertEqual(report["reused"], 3)
+        self.assertEqual(report["connections_opened"], 0)
+
+    def test_requests_turned_away_before_querying_are_not_counted(self):
+        self.assertEqual(APIClient().get("/api/notes/").status_code, 401)
+        self.assertEqual(stats.snapshot()["requests"], 0)
+
+    def test_health_probe_is_not_counted(self):
+        APIClient().get("/api/health/")
+        self.assertEqual(stats.snapshot()["requests"], 0)
@@ -1,6 +1,13 @@
-from django.test import Client, TestCase
+import time
+from unittest import mock
+
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, override_settings
 from rest_framework.test import APIClient
 
+from app import health
+from app.health import ReadinessProber
+
 
 class HealthTests(TestCase):
     def setUp(self):
@@ -24,3 +31,48 @@ def test_health_ok():
     resp = c.get("/api/health/")
     assert resp.status_code == 200
     assert b"ok" in resp.content.lower()
+
+
+@override_settings(HEALTH_PROBE_INTERVAL=60)
+class LivenessReadinessTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # A prober of this test's own, stopped afterwards.
+        patcher = mock.patch.object(health, "_prober", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: health._prober and health._prober.stop())
+
+    def test_liveness_never_touches_the_database(self):
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/health/live/")
+        self.assertEqual(resp.json(), {"status": "ok"})
+
+    def test_readiness_serves_the_background_probe(self):
+        self.client.get("/api/health/ready/")  # starts the prober
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/health/ready/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        body = resp.json()
+        self.assertEqual((body["status"], body["db"]), ("ok", "ok"))
+        self.assertEqual(body["migrations"], {"pending": 0})
+        self.assertIn("latency_ms", body)
+
+    def test_failed_or_stale_probes_are_not_ready(self):
+        health._prober = prober = ReadinessProber(stale_after=15)
+        prober._first.set()
+        prober._result, prober._checked = {"db": "error: OperationalError"}, time.monotonic()
+        resp = self.client.get("/api/health/ready/")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.json()["status"], "unavailable")
+
+        prober._result, prober._checked = {"db": "ok"}, time.monotonic() - 16
+        resp = self.client.get("/api/health/ready/")
+        self.assertEqual((resp.status_code, resp.json()["db"]), (503, "stale"))
+
+    def test_probe_reports_pending_migrations(self):
+        prober = ReadinessProber()
+        with mock.patch.object(MigrationExecutor, "migration_plan", return_value=[object()]):
+            self.assertEqual(prober.probe()["migrations"], {"pending": 1})
+        self.assertEqual(prober.probe()["migrations"], {"pending": 0})
+        self.assertTrue(prober._migrated)
@@ -0,0 +1,110 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+from rest_framework.test import APIClient
+
+from app.authentication import NotesTokenObtainPairSerializer
+from app.metrics import EXITED_FILE, fold_exited, registry, render_prometheus
+
+User = get_user_model()
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        get_list_cache().clear()
+        self.client = auth_client_for(User.objects.create_user(username="m", password="pass12345"))
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/notes/")
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r"serialize;dur=[\d.]+")
+        self.assertRegex(timing, r"total;dur=[\d.]+")
+
+    async def test_async_views_are_timed(self):
+        user = await User.objects.acreate(username="async")
+        await Note.objects.acreate(owner=user, title="t")
+        token = NotesTokenObtainPairSerializer.get_token(user).access_token
+        response = await self.async_client.get(
+            "/api/async/notes/", headers={"Authorization": f"Bearer {token}"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/notes/"))
+
+    def test_prometheus_histograms_by_view(self):
+        self.client.get("/api/notes/")
+        self.client.get("/api/notes/")
+        body = APIClient().get("/api/metrics/").content.decode()
+
+        labels = 'method="GET",view="note-list"'
+        self.assertIn("# TYPE notes_http_request_duration_seconds histogram", body)
+        self.assertIn(f"notes_http_request_duration_seconds_count{{{labels}}} 2", body)
+        self.assertIn(f'notes_http_request_queries_bucket{{{labels},le="+Inf"}} 2', body)
+        self.assertIn(f"notes_http_request_serialize_seconds_count{{{labels}}} 2", body)
+        self.assertIn(
+            'notes_http_responses_total{method="GET",status="200",view="note-list"} 2', body
+        )
+        # The scrape itself is not measured.
+        self.assertNotIn('view="metrics"', body)
+
+    def test_processes_are_summed_through_metrics_dir(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            self.client.get("/api/notes/")
+            # Another worker's file with the same series.
+            other = [
+                {
+                    "name": "notes_http_responses_total",
+                    "labels": {"method": "GET", "view": "note-list", "status": 200},
+                    "count": 4,
+                }
+            ]
+            (Path(directory) / "1-1.json").write_text(json.dumps(other))
+            body = APIClient().get("/api/metrics/").content.decode()
+
+        self.assertIn(
+            'notes_http_responses_total{method="GET",status="200",view="note-list"} 5', body
+        )
+
+    def test_exited_workers_are_folded_into_one_file(self):
+        def series(count):
+            return [
+                {"name": "notes_http_responses_total", "labels": {"status": 200}, "count": count}
+            ]
+
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_DIR=directory):
+            root = Path(directory)
+            (root / "101-1.json").write_text(json.dumps(series(2)))
+            (root / "102-1.json").write_text(json.dumps(series(3)))
+            before = render_prometheus(registry.collect())
+            fold_exited(directory, 101)
+            fold_exited(directory, 102)
+            fold_exited(directory, 103)  # no file: nothing to do
+            self.assertEqual(render_prometheus(registry.collect()), before)
+            names = {p.name for p in root.glob("*.json")}
+        self.assertEqual(names - {registry._file_name}, {EXITED_FILE})
+        self.assertIn('notes_http_responses_total{status="200"} 5', before)
+
+    @override_settings(METRICS_TOKEN="s3cret", METRICS_TRUSTED_IPS=["127.0.0.1"])
+    def test_token_is_required_from_untrusted_addresses(self):
+        client = APIClient(REMOTE_ADDR="10.0.0.5")
+        self.assertEqual(client.get("/api/metrics/").status_code, 401)
+        response = client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(APIClient().get("/api/metrics/").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="", METRICS_TRUSTED_IPS=["127.0.0.1"])
+    def test_without_a_token_only_trusted_addresses_are_served(self):
+        self.assertEqual(APIClient(REMOTE_ADDR="10.0.0.5").get("/api/metrics/").status_code, 403)
+        self.assertEqual(APIClient().get("/api/metrics/").status_code, 200)
@@ -0,0 +1,111 @@
+import os
+import pstats
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from notes.notes_tests.test_api import auth_client_for
+from rest_framework.test import APIClient
+
+from app import profiling
+
+User = get_user_model()
+
+
+def wait_for_file(directory, suffix, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        found = list(Path(directory).glob(f"*{suffix}"))
+        if found:
+            return found[0]
+        time.sleep(0.02)
+    raise AssertionError(f"no {suffix} file written to {directory}")
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        override = self.settings(PROFILE_DIR=self.dir, PROFILE_TRUSTED_IPS=["127.0.0.1"])
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(self.stop_session)
+
+    def stop_session(self):
+        session = profiling._session
+        if session is not None:
+            session.finish()
+            session.writer.join()
+
+    def test_parse_header(self):
+        self.assertEqual(
+            profiling.parse_header("mode=cprofile; requests=20"),
+            {"mode": "cprofile", "requests": 20},
+        )
+        self.assertEqual(profiling.parse_header("seconds=1.5, requests=x"), {"seconds": 1.5})
+
+    def test_header_from_trusted_ip_profiles_the_next_requests(self):
+        client = APIClient()
+        client.get("/api/health/", HTTP_X_PROFILE="mode=cprofile; requests=2")
+        self.assertIsNotNone(profiling._session)
+        client.get("/api/health/")
+        self.assertIsNone(profiling._session)
+
+        stats = pstats.Stats(str(wait_for_file(self.dir, ".pstats")))
+        profiled = {func for _, _, func in stats.stats}
+        self.assertIn("get", profiled)  # HealthView.get
+
+    def test_header_is_ignored_from_untrusted_clients(self):
+        user = User.objects.create_user(username="p", password="pass12345")
+        with self.settings(PROFILE_TRUSTED_IPS=[]):
+            APIClient().get("/api/health/", HTTP_X_PROFILE="requests=1")
+            self.assertIsNone(profiling._session)
+            auth_client_for(user).get("/api/health/", HTTP_X_PROFILE="requests=5")
+            self.assertIsNone(profiling._session)
+
+            user.is_staff = True
+            user.save()
+            auth_client_for(user).get("/api/health/", HTTP_X_PROFILE="requests=5")
+            self.assertIsNotNone(profiling._session)
+
+    def test_token_of_a_missing_user_is_just_untrusted(self):
+        user = User.objects.create_user(username="gone", password="pass12345", is_staff=True)
+        client = auth_client_for(user)
+        user.delete()
+        with self.settings(PROFILE_TRUSTED_IPS=[]):
+            response = client.get("/api/health/live/", HTTP_X_PROFILE="requests=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(profiling._session)
+
+    def test_sampling_writes_collapsed_stacks(self):
+        session = profiling.start_session("sample", requests=1)
+        session.run(lambda request: time.sleep(0.1), None)
+        lines = wait_for_file(self.dir, ".collapsed").read_text().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn("<lambda>", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_collapse_orders_frames_outermost_first(self):
+        stack = profiling.collapse(sys._getframe()).split(";")
+        self.assertTrue(stack[-1].startswith("ProfilingTests.test_collapse_orders_frames"))
+
+    def test_sigusr2_starts_a_timed_session(self):
+        previous = signal.getsignal(signal.SIGUSR2)
+        self.addCleanup(signal.signal, signal.SIGUSR2, previous)
+        with self.settings(PROFILE_SIGNAL_SECONDS=0.2):
+            profiling.install_signal_handler()
+            os.kill(os.getpid(), signal.SIGUSR2)
+            deadline = time.monotonic() + 2
+            while profiling._session is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            session = profiling._session
+            self.assertIsNotNone(session)
+            self.assertEqual(session.mode, "sample")
+            self.assertTrue(session.finished.wait(2))
+        wait_for_file(self.dir, ".collapsed")
@@ -0,0 +1,93 @@
+import io
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+from app.queryprofile import QueryProfileMiddleware, fingerprint, plan_warnings
+
+User = get_user_model()
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_placeholder_lists_are_folded(self):
+        self.assertEqual(
+            fingerprint("SELECT \"x\" FROM t WHERE id = 42 AND name = 'it''s'"),
+            'SELECT "x" FROM t WHERE id = ? AND name = ?',
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s)"),
+        )
+
+    def test_sqlite_plan_warnings(self):
+        plan = ["SCAN notes_note", "USE TEMP B-TREE FOR ORDER BY"]
+        self.assertEqual(
+            plan_warnings("sqlite", plan), ["full scan of notes_note", "unindexed ORDER BY"]
+        )
+        self.assertEqual(plan_warnings("sqlite", ["SCAN notes_note USING INDEX idx"]), [])
+
+
+class QueryProfileMiddlewareTests(TestCase):
+    def setUp(self):
+        get_list_cache().clear()
+        self.user = User.objects.create_user(username="qp", password="pass12345")
+        Note.objects.create(owner=self.user, title="a")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = Path(directory.name) / "profile.jsonl"
+
+    def test_disabled_by_default(self):
+        auth_client_for(self.user).get("/api/notes/")
+        self.assertFalse(self.log.exists())
+
+    def test_findings_are_logged_and_reported(self):
+        with (
+            self.settings(
+                QUERY_PROFILE=True,
+                QUERY_PROFILE_LOG=str(self.log),
+                QUERY_PROFILE_SLOW_MS=0,
+                QUERY_PROFILE_REPEAT=2,
+            ),
+            self.assertLogs("app.queryprofile", "WARNING"),
+        ):
+            client = auth_client_for(self.user)
+            # Each request is profiled on its own; repeats are counted per request.
+            self.assertEqual(client.get("/api/notes/").status_code, 200)
+
+        record = json.loads(self.log.read_text().splitlines()[0])
+        self.assertEqual(record["view"], "note-list")
+        self.assertEqual(record["status"], 200)
+        selects = [s for s in record["slow"] if s["sql"].startswith("SELECT")]
+        self.assertTrue(selects)
+        self.assertTrue(all("plan" in s for s in selects))
+
+        out = io.StringIO()
+        with override_settings(QUERY_PROFILE_LOG=str(self.log)):
+            call_command("query_report", "--plans", stdout=out)
+        self.assertIn("1 profiled request(s)", out.getvalue())
+        self.assertIn("note-list:", out.getvalue())
+
+    def test_repeated_statements_are_flagged(self):
+        def view(request):
+            for note in Note.objects.all():
+                User.objects.get(pk=note.owner_id)  # the classic N+1
+            return HttpResponse()
+
+        for i in range(3):
+            Note.objects.create(owner=self.user, title=f"n{i}")
+        with self.settings(QUERY_PROFILE=True, QUERY_PROFILE_REPEAT=3):
+            request = self.client.get("/api/health/").wsgi_request
+            with self.assertLogs("app.queryprofile", "WARNING") as logs:
+                QueryProfileMiddleware(view)(request)
+        record = logs.records[0].query_profile
+        [repeat] = record["n_plus_one"]
+        self.assertEqual(repeat["count"], 4)
+        self.assertIn('FROM "auth_user"', repeat["sql"])
@@ -0,0 +1,147 @@
+import multiprocessing as mp
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from notes.notes_tests.test_api import auth_client_for
+from rest_framework.test import APIClient
+
+from app import ratelimit
+from app.authentication import NotesTokenObtainPairSerializer
+from app.ratelimit import WAYS, BucketTable, InFlight
+from app.throttling import parse_rate, request_start
+
+User = get_user_model()
+
+
+def rates(**scopes):
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": scopes}
+    )
+
+
+def _drain(table, key):
+    table.take(key, 3, 1.0, cost=3)
+
+
+class BucketTableTests(SimpleTestCase):
+    def test_burst_then_refill(self):
+        table = BucketTable(sets=8, stripes=2)
+        now = 1000.0
+        self.assertEqual([table.take("k", 3, 1.0, now=now)[0] for _ in range(4)], [1, 1, 1, 0])
+        allowed, wait = table.take("k", 3, 1.0, now=now + 0.5)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 0.5)
+        self.assertTrue(table.take("k", 3, 1.0, now=now + 1)[0])
+        self.assertTrue(table.take("other", 3, 1.0, now=now)[0])
+
+    def test_new_keys_evict_the_least_recently_used_slot(self):
+        table = BucketTable(sets=1, stripes=1)
+        table.take("busy", 1, 0.001, now=100.0)
+        for i in range(WAYS - 1):
+            table.take(f"idle{i}", 1, 0.001, now=float(i))
+        table.take("new", 1, 0.001, now=101.0)  # evicts idle0, not busy
+        self.assertFalse(table.take("busy", 1, 0.001, now=102.0)[0])
+
+    def test_shared_with_forked_processes(self):
+        table = BucketTable(sets=8, stripes=2)
+        child = mp.get_context("fork").Process(target=_drain, args=(table, "k"))
+        child.start()
+        child.join(10)
+        self.assertFalse(table.take("k", 3, 1.0)[0])
+
+
+class InFlightTests(SimpleTestCase):
+    def test_limit_and_forgetting_a_dead_process(self):
+        counter = InFlight(processes=4)
+        self.assertTrue(counter.enter(2))
+        self.assertTrue(counter.enter(2))
+        self.assertFalse(counter.enter(2))
+        counter.exit()
+        self.assertEqual(counter.total(), 1)
+        counter.forget(os.getpid())
+        self.assertEqual(counter.total(), 0)
+        self.assertTrue(counter.enter(0))
+
+    def test_parsing(self):
+        self.assertEqual(parse_rate("600/min"), (600, 10.0))
+        self.assertIsNone(parse_rate(None))
+        self.assertEqual(request_start("t=1700000000.5"), 1700000000.5)
+        self.assertEqual(request_start("1700000000500"), 1700000000.5)
+        self.assertEqual(request_start("1700000000500000"), 1700000000.5)
+        self.assertIsNone(request_start("soon"))
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        ratelimit.buckets().clear()
+        self.user = User.objects.create_user(username="throttled", password="pass12345")
+        self.client = auth_client_for(self.user)
+
+    @rates(read="2/min", write="1/min")
+    def test_read_and_write_scopes(self):
+        self.assertEqual(self.client.get("/api/notes/stats/").status_code, 200)
+        self.assertEqual(self.client.get("/api/notes/stats/").status_code, 200)
+        resp = self.client.get("/api/notes/stats/")
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "30")
+
+        self.assertEqual(self.client.post("/api/notes/", {"title": "a"}).status_code, 201)
+        self.assertEqual(self.client.post("/api/notes/", {"title": "b"}).status_code, 429)
+        # Another user has buckets of their own; health checks are never throttled.
+        other = User.objects.create_user(username="other", password="pass12345")
+        self.assertEqual(auth_client_for(other).get("/api/notes/stats/").status_code, 200)
+        self.assertEqual(APIClient().get("/api/health/").status_code, 200)
+
+    @rates(auth="1/min")
+    def test_token_obtain_is_limited_per_ip(self):
+        credentials = {"username": "throttled", "password": "pass12345"}
+        self.assertEqual(APIClient().post("/api/auth/token/", credentials).status_code, 200)
+        self.assertEqual(APIClient().post("/api/auth/token/", credentials).status_code, 429)
+        other_ip = APIClient(REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(other_ip.post("/api/auth/token/", credentials).status_code, 200)
+
+    @rates(read="1/min")
+    async def test_async_views_are_throttled(self):
+        token = NotesTokenObtainPairSerializer.get_token(self.user).access_token
+        headers = {"Authorization": f"Bearer {token}"}
+        self.assertEqual(
+            (await self.async_client.get("/api/async/notes/", headers=headers)).status_code, 200
+        )
+        resp = await self.async_client.get("/api/async/notes/", headers=headers)
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["Retry-After"], "60")
+
+
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    @override_settings(ADMISSION_MAX_IN_FLIGHT=1)
+    def test_sheds_above_the_in_flight_limit(self):
+        counter = ratelimit.in_flight()
+        self.assertTrue(counter.enter(0))  # a request on another worker
+        try:
+            resp = self.client.get("/api/notes/")
+            self.assertEqual(resp.status_code, 503)
+            self.assertEqual(resp["Retry-After"], "1")
+            self.assertEqual(self.client.get("/api/health/").status_code, 200)
+            # Long-polls wait without working and are not counted or shed.
+            self.assertNotEqual(self.client.get("/api/async/notes/events/").status_code, 503)
+        finally:
+            counter.exit()
+        self.assertEqual(self.client.get("/api/notes/").status_code, 401)
+        self.assertEqual(counter.total(), 0)
+
+    @override_settings(ADMISSION_MAX_QUEUE_SECONDS=5)
+    def test_sheds_requests_that_queued_too_long(self):
+        stale = f"t={time.time() - 6:.3f}"
+        self.assertEqual(
+            self.client.get("/api/notes/", HTTP_X_REQUEST_START=stale).status_code, 503
+        )
+        fresh = f"t={time.time():.3f}"
+        self.assertEqual(
+            self.client.get("/api/notes/", HTTP_X_REQUEST_START=fresh).status_code, 401
+        )
@@ -0,0 +1,26 @@
+import sys
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from app.warmup import STEPS, memory_usage, warmup
+
+
+class WarmupTests(TestCase):
+    def test_warmup_runs_every_step_without_touching_the_database(self):
+        with self.assertNumQueries(0):
+            timings = warmup()
+        self.assertEqual(list(timings), [name for name, _ in STEPS])
+
+    def test_memory_usage(self):
+        usage = memory_usage()
+        if not sys.platform.startswith("linux"):
+            self.assertEqual(usage, {})
+            return
+        self.assertGreater(usage["rss_mb"], 0)
+        self.assertLessEqual(usage["pss_mb"], usage["rss_mb"])
+        self.assertEqual(memory_usage(pid=0), {})
+
+    def test_health_checks_report_process_memory(self):
+        process = APIClient().get("/api/health/?checks=1").json()["process"]
+        self.assertIn("pid", process)
@@ -0,0 +1,163 @@
+"""
+JWT authentication without a per-request ``auth_user`` lookup.
+
+Access tokens issued by ``/api/auth/token/`` carry the username next to the user
+id, so a request can be authenticated from the verified claims alone. The only
+server-side state consulted is whether the account is still active, which is
+cached for ``AUTH_USER_STATE_TTL`` seconds and dropped whenever the user row is
+saved or deleted in this process.
+
+Tokens without the username claim (issued before this existed) take the stock
+database path. ``aauthenticate`` is the same check for the async views, which
+run outside DRF.
+
+The event stream also takes a ``StreamTicket`` (``POST /api/notes/events/ticket/``)
+in its query string, so access tokens never travel in URLs.
+"""
+
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+User = get_user_model()
+
+USERNAME_CLAIM = "username"
+STREAM_UNTIL_CLAIM = "stream_until"
+
+
+def _state_key(user_id):
+    return f"auth:active:{user_id}"
+
+
+def _active_query(user_id):
+    return User.objects.filter(pk=user_id).values_list("is_active", flat=True)
+
+
+def user_is_active(user_id):
+    cache = caches["default"]
+    key = _state_key(user_id)
+    active = cache.get(key)
+    if active is None:
+        active = bool(_active_query(user_id).first())
+        cache.set(key, active, getattr(settings, "AUTH_USER_STATE_TTL", 60))
+    return active
+
+
+async def auser_is_active(user_id):
+    cache = caches["default"]
+    key = _state_key(user_id)
+    active = await cache.aget(key)
+    if active is None:
+        active = bool(await _active_query(user_id).afirst())
+        await cache.aset(key, active, getattr(settings, "AUTH_USER_STATE_TTL", 60))
+    return active
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _forget_user_state(sender, instance, **kwargs):
+    caches["default"].delete(_state_key(instance.pk))
+
+
+class NotesTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the username claim that ``StatelessJWTAuthentication`` relies on."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[USERNAME_CLAIM] = user.get_username()
+        return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authenticates Bearer tokens as a ``TokenUser`` built from verified claims.
+
+    ``request.user`` is then not a model instance: filter with ``owner_id=user.pk``
+    rather than ``owner=user``.
+    """
+
+    def _is_stateless(self, validated_token):
+        return getattr(settings, "AUTH_STATELESS_JWT", True) and USERNAME_CLAIM in validated_token
+
+    def get_user(self, validated_token):
+        if not self._is_stateless(validated_token):
+            return super().get_user(validated_token)
+
+        user = TokenUser(validated_token)
+        if not user_is_active(user.pk):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+    async def aget_user(self, validated_token):
+        if not self._is_stateless(validated_token):
+            return await sync_to_async(super().get_user)(validated_token)
+
+        user = TokenUser(validated_token)
+        if not await auser_is_active(user.pk):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
+
+    async def aauthenticate(self, request):
+        """Async ``authenticate()`` for a plain Django request: (user, token) or None."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+class StreamTicket(Token):
+    """
+    Credential for ``?ticket=`` on the event stream, which browser ``EventSource``
+    opens without headers. URLs end up in access logs, so unlike an access token
+    a ticket expires after ``STREAM_TICKET_SECONDS`` and is accepted once.
+    """
+
+    token_type = "stream"
+
+    @property
+    def lifetime(self):
+        return timedelta(seconds=getattr(settings, "STREAM_TICKET_SECONDS", 30))
+
+    @classmethod
+    def for_request(cls, request):
+        ticket = cls.for_user(request.user)
+        ticket[USERNAME_CLAIM] = request.user.get_username()
+        # The stream may last as long as the access token that asked for it.
+        ticket[STREAM_UNTIL_CLAIM] = request.auth.get("exp") if request.auth else None
+        return ticket
+
+
+class StreamTicketAuthentication(StatelessJWTAuthentication):
+    """Bearer tokens, or a ``StreamTicket`` in ``?ticket=`` for requests without one."""
+
+    async def aauthenticate(self, request):
+        raw_ticket = request.GET.get("ticket")
+        if not raw_ticket or self.get_header(request) is not None:
+            return await super().aauthenticate(request)
+        try:
+            ticket = StreamTicket(raw_ticket)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        jti = ticket[api_settings.JTI_CLAIM]
+        ttl = max(int(ticket["exp"] - time.time()), 0) + 1
+        if not await caches["shared"].aadd(f"auth:ticket:{jti}", True, ttl):
+            raise AuthenticationFailed("Stream ticket already used", code="ticket_used")
+        return await self.aget_user(ticket), ticket
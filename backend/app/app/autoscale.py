@@ -0,0 +1,261 @@
+"""
+Worker autoscaling and memory recycling for the gunicorn master.
+
+``Autoscaler`` runs as a thread in the master (started from ``when_ready``) and
+every ``interval`` seconds looks at:
+
+- the listen backlog: connections accepted by the kernel that no worker has
+  picked up yet (``/proc/net/tcp*`` rx queue of the listening sockets),
+- the busy ratio: requests in flight over ``workers * threads``. Each worker
+  counts its own requests in a slot of a shared array from the
+  ``pre_request``/``post_request`` hooks. The uvicorn worker skips those hooks,
+  so with ``count_requests=False`` only the backlog scales up and nothing
+  scales down,
+- each worker's RSS.
+
+Averaged over the last ``window`` ticks, a backlog or a busy ratio at or above
+``up_ratio`` sends the master ``SIGTTIN`` (one more worker, up to
+``max_workers``); an idle ratio at or below ``down_ratio`` with no backlog sends
+``SIGTTOU`` (one fewer, down to ``min_workers``), each at most once per
+cooldown. A worker whose RSS exceeds ``max_rss_mb`` gets ``SIGTERM``: it
+finishes its requests within the graceful timeout and the master replaces it.
+
+Decisions are logged and, with ``METRICS_DIR`` set, written as gauges and
+counters to ``<dir>/autoscale.json``, which ``/api/metrics/`` merges with the
+workers' request metrics. This module runs in the master, which may never have
+imported Django, so it uses the standard library only.
+"""
+
+import collections
+import json
+import multiprocessing as mp
+import os
+import signal
+import threading
+import time
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+TCP_LISTEN = "0A"
+
+
+def listen_backlog(sockets):
+    """Connections waiting in the accept queues of ``sockets``; None if unknown."""
+    inodes = set()
+    for sock in sockets:
+        try:
+            inodes.add(str(os.fstat(sock.fileno()).st_ino))
+        except (OSError, AttributeError):
+            continue
+    waiting, found = 0, False
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as lines:
+                next(lines)  # header
+                for line in lines:
+                    fields = line.split()
+                    if fields[3] == TCP_LISTEN and fields[9] in inodes:
+                        waiting += int(fields[4].split(":")[1], 16)
+                        found = True
+        except OSError:
+            continue
+    return waiting if found else None
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Autoscaler:
+    def __init__(
+        self,
+        min_workers,
+        max_workers,
+        threads,
+        interval=2.0,
+        window=5,
+        up_ratio=0.75,
+        down_ratio=0.25,
+        up_cooldown=10.0,
+        down_cooldown=60.0,
+        max_rss_mb=0,
+        enabled=True,
+        count_requests=True,
+        metrics_dir="",
+    ):
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.threads = max(1, threads)
+        self.interval = interval
+        self.up_ratio = up_ratio
+        self.down_ratio = down_ratio
+        self.up_cooldown = up_cooldown
+        self.down_cooldown = down_cooldown
+        self.max_rss_mb = max_rss_mb
+        self.enabled = enabled
+        self.count_requests = count_requests
+        self.metrics_dir = metrics_dir
+        # One slot per live worker; recycled workers overlap their replacement.
+        self.busy = mp.Array("i", self.max_workers * 2, lock=False)
+        self._free = list(range(len(self.busy)))
+        self._slots = {}  # worker age -> slot
+        self._count_lock = threading.Lock()
+        self.samples = collections.deque(maxlen=max(1, window))
+        self.events = collections.Counter()
+        self.last_scaled = 0.0
+        self.recycling = set()
+        self.server = None
+        self._stop = threading.Event()
+
+    # -- master side -----------------------------------------------------------
+
+    def assign(self, worker):
+        """``pre_fork``: give the worker about to be forked a busy-count slot."""
+        slot = self._free.pop(0) if self._free else None
+        self._slots[worker.age] = slot
+        if slot is not None:
+            self.busy[slot] = 0
+        worker.autoscale_slot = slot
+
+    def release(self, worker):
+        """``child_exit``: the worker is gone; its requests are not in flight any more."""
+        slot = self._slots.pop(worker.age, None)
+        if slot is not None:
+            self.busy[slot] = 0
+            self._free.append(slot)
+        self.recycling.discard(worker.pid)
+
+    def start(self, server):
+        self.server = server
+        thread = threading.Thread(target=self._run, name="autoscaler", daemon=True)
+        thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.tick()
+            except Exception:  # the master must outlive a bad sample
+                self.server.log.exception("Autoscaler tick failed")
+
+    def sample(self):
+        server = self.server
+        workers = list(server.WORKERS.items())
+        in_flight = sum(self.busy)
+        capacity = max(server.num_workers, 1) * self.threads
+        return {
+            "workers": len(workers),
+            "target": server.num_workers,
+            "in_flight": in_flight,
+            "busy_ratio": min(in_flight / capacity, 1.0) if self.count_requests else None,
+            "backlog": listen_backlog(server.LISTENERS),
+            "rss_mb": {pid: rss_mb(pid) for pid, _ in workers},
+        }
+
+    def decide(self, now):
+        """'up', 'down' or None from the samples so far."""
+        if not self.enabled or len(self.samples) < self.samples.maxlen:
+            return None
+        backlog = sum(s["backlog"] or 0 for s in self.samples) / len(self.samples)
+        ratio = None
+        if self.count_requests:
+            ratio = sum(s["busy_ratio"] for s in self.samples) / len(self.samples)
+        target = self.samples[-1]["target"]
+        since = now - self.last_scaled
+        busy = ratio is not None and ratio >= self.up_ratio
+        if (busy or backlog >= 1) and target < self.max_workers:
+            return "up" if since >= self.up_cooldown else None
+        idle = ratio is not None and ratio <= self.down_ratio
+        if idle and backlog == 0 and target > self.min_workers:
+            return "down" if since >= self.down_cooldown else None
+        return None
+
+    def tick(self):
+        now = time.monotonic()
+        current = self.sample()
+        self.samples.append(current)
+        log = self.server.log
+
+        decision = self.decide(now)
+        if decision:
+            self.last_scaled = now
+            self.samples.clear()  # judge the new size on fresh samples
+            self.events[decision] += 1
+            log.info(
+                "Autoscale %s from %d workers (busy ratio %s, backlog %s)",
+                decision,
+                current["target"],
+                current["busy_ratio"],
+                current["backlog"],
+            )
+            os.kill(self.server.pid, signal.SIGTTIN if decision == "up" else signal.SIGTTOU)
+
+        if self.max_rss_mb and not self.recycling:
+            over = [
+                (rss, pid)
+                for pid, rss in current["rss_mb"].items()
+                if rss and rss > self.max_rss_mb
+            ]
+            # One at a time, so recycling never takes out several workers at once.
+            if over:
+                rss, pid = max(over)
+                self.recycling.add(pid)
+                self.events["recycle"] += 1
+                log.info("Recycling worker %s: RSS %.0f MiB > %d MiB", pid, rss, self.max_rss_mb)
+                os.kill(pid, signal.SIGTERM)
+
+        self.write_metrics(current)
+
+    def write_metrics(self, current):
+        if not self.metrics_dir:
+            return
+        rss = [v for v in current["rss_mb"].values() if v]
+        series = [
+            self._gauge("notes_gunicorn_workers", current["workers"]),
+            self._gauge("notes_gunicorn_target_workers", current["target"]),
+            self._gauge("notes_gunicorn_requests_in_flight", current["in_flight"]),
+            self._gauge("notes_gunicorn_worker_rss_max_bytes", int(max(rss, default=0) * 2**20)),
+        ]
+        if current["busy_ratio"] is not None:
+            series.append(self._gauge("notes_gunicorn_busy_ratio", round(current["busy_ratio"], 4)))
+        if current["backlog"] is not None:
+            series.append(self._gauge("notes_gunicorn_listen_backlog", current["backlog"]))
+        for action in ("up", "down", "recycle"):
+            series.append(
+                {
+                    "name": "notes_gunicorn_autoscale_events_total",
+                    "labels": {"action": action},
+                    "count": self.events[action],
+                }
+            )
+        path = os.path.join(self.metrics_dir, "autoscale.json")
+        try:
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            with open(path + ".tmp", "w") as out:
+                json.dump(series, out)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            self.server.log.warning("Could not write %s", path)
+
+    @staticmethod
+    def _gauge(name, value):
+        return {"name": name, "labels": {}, "value": value}
+
+    # -- worker side -----------------------------------------------------------
+
+    def request_started(self, worker):
+        slot = getattr(worker, "autoscale_slot", None)
+        if slot is not None:
+            with self._count_lock:
+                self.busy[slot] += 1
+
+    def request_finished(self, worker):
+        slot = getattr(worker, "autoscale_slot", None)
+        if slot is not None:
+            with self._count_lock:
+                self.busy[slot] = max(self.busy[slot] - 1, 0)
@@ -0,0 +1,125 @@
+"""
+Per-process database connection metrics, reported by ``/api/health/?checks=1``.
+
+``DBConnectionMetricsMiddleware`` watches for the request's first SQL statement
+and counts whether it ran on the thread's persistent connection or on a new one.
+It never opens a connection itself: requests turned away before they query
+(unauthenticated, throttled) touch no database. ``connection_created`` counts real
+connects, so the reuse ratio shows whether ``CONN_MAX_AGE`` is doing its job.
+
+Counters live in the worker process; every gunicorn worker reports its own.
+"""
+
+import contextlib
+import os
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+# Requests that must not open a connection of their own (load balancer probes).
+SKIP_PREFIXES = ("/api/health/",)
+# Background threads whose connections are not request traffic (app/health.py).
+UNTRACKED_THREADS = {"health-prober"}
+
+
+class ConnectionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.reused = 0
+            self.opened = 0
+
+    def record_use(self, reused):
+        with self._lock:
+            self.requests += 1
+            self.reused += reused
+
+    def record_connect(self):
+        with self._lock:
+            self.opened += 1
+
+    def snapshot(self):
+        with self._lock:
+            requests = self.requests
+            return {
+                "pid": os.getpid(),
+                "requests": requests,
+                "connections_opened": self.opened,
+                "reused": self.reused,
+                "reuse_ratio": round(self.reused / requests, 4) if requests else 0.0,
+            }
+
+
+stats = ConnectionStats()
+
+
+@receiver(connection_created)
+def _count_connect(sender, connection, **kwargs):
+    if (
+        connection.alias == DEFAULT_DB_ALIAS
+        and threading.current_thread().name not in UNTRACKED_THREADS
+    ):
+        stats.record_connect()
+
+
+@sync_and_async_middleware
+class DBConnectionMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path.startswith(SKIP_PREFIXES):
+            return self.get_response(request)
+        with _watch_first_query():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path.startswith(SKIP_PREFIXES):
+            return await self.get_response(request)
+        # On the thread-sensitive executor, whose connection the async ORM uses.
+        watch = await sync_to_async(_watch_first_query)()
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(watch.close)()
+
+
+def _watch_first_query():
+    """Count this thread's first statement on the default connection until closed."""
+    conn = connections[DEFAULT_DB_ALIAS]
+    existing = conn.connection
+    seen = False
+
+    def first_query(execute, sql, params, many, context):
+        nonlocal seen
+        if not seen:
+            seen = True
+            # A connection dropped and reopened since (health check) is not reuse.
+            stats.record_use(existing is not None and conn.connection is existing)
+        return execute(sql, params, many, context)
+
+    stack = contextlib.ExitStack()
+    stack.enter_context(conn.execute_wrapper(first_query))
+    return stack
+
+
+def connection_report():
+    conn = connections[DEFAULT_DB_ALIAS]
+    return {
+        **stats.snapshot(),
+        "vendor": conn.vendor,
+        "conn_max_age": conn.settings_dict["CONN_MAX_AGE"],
+        "health_checks": conn.settings_dict["CONN_HEALTH_CHECKS"],
+    }
@@ -1,12 +1,178 @@
+"""
+Health endpoints for load balancers, compose healthchecks & CI/CD smoke tests.
+
+GET /api/health/live/      -> {"status": "ok"} while the process serves requests;
+                              never touches the database
+GET /api/health/ready/     -> 200 or 503 from the last background probe
+GET /api/health/           -> {"status": "ok"}
+GET /api/health/?checks=1  -> adds DB and metadata checks (optional)
+
+Readiness is never checked inline: a ``ReadinessProber`` thread per worker runs
+``SELECT 1`` every ``HEALTH_PROBE_INTERVAL`` seconds and the views return its
+cached result. Probes then cost microseconds however often they come, and a
+struggling database sees one query per worker per interval, never a pile of
+them. A probe stuck on the database stops refreshing the result, which reads as
+not ready once it is older than ``HEALTH_PROBE_STALE_AFTER``.
+"""
+
+import logging
 import os
 import socket
+import threading
+import time
 
 from django.conf import settings
-from django.db import connection
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.dispatch import receiver
+from notes.cache import get_list_cache
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from app.dbmetrics import connection_report
+from app.warmup import memory_usage
+
+logger = logging.getLogger(__name__)
+
+HOSTNAME = socket.gethostname()
+COMMIT = os.getenv("GIT_COMMIT_SHA", "")
+
+
+class ReadinessProber:
+    """Checks the database from a daemon thread and keeps the last result."""
+
+    def __init__(self, interval=5.0, stale_after=15.0, alias=DEFAULT_DB_ALIAS):
+        self.interval = interval
+        self.stale_after = stale_after
+        self.alias = alias
+        self.pid = os.getpid()
+        self._result = None
+        self._checked = None  # time.monotonic() of the last probe
+        self._migrated = False
+        self._first = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        self.probe()
+        while not self._stopped.wait(self.interval):
+            self.probe()
+        connections[self.alias].close()
+
+    def probe(self):
+        """Check the database now and store the result."""
+        conn = connections[self.alias]
+        result = {"db": "ok", "vendor": conn.vendor}
+        start = time.perf_counter()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            result["migrations"] = self._migrations(conn)
+        except Exception as e:
+            result["db"] = f"error: {type(e).__name__}"
+            logger.warning("Readiness probe failed: %r", e)
+            conn.close()
+        else:
+            # Same lifetime rules as a request's connection (CONN_MAX_AGE).
+            conn.close_if_unusable_or_obsolete()
+        self._result, self._checked = result, time.monotonic()
+        self._first.set()
+        return result
+
+    def _migrations(self, conn):
+        # Loading the migration graph reads every migration module, so stop
+        # looking once everything is applied: that does not change under a
+        # running process.
+        if self._migrated:
+            return {"pending": 0}
+        executor = MigrationExecutor(conn)
+        pending = len(executor.migration_plan(executor.loader.graph.leaf_nodes()))
+        self._migrated = not pending
+        return {"pending": pending}
+
+    def status(self, wait=0.0):
+        """``(ready, details)`` from the last probe; waits up to ``wait`` for the first."""
+        if wait and not self._first.is_set():
+            self._first.wait(wait)
+        result, checked = self._result, self._checked
+        if result is None:
+            return False, {"db": "starting"}
+        age = time.monotonic() - checked
+        details = {**result, "age_ms": round(age * 1000, 1)}
+        if age > self.stale_after:
+            details["db"] = "stale"
+        return details["db"] == "ok", details
+
+
+_prober = None
+_prober_lock = threading.Lock()
+
+
+def get_prober():
+    """This process's prober, started on first use (and again after a fork)."""
+    global _prober
+    prober = _prober
+    if prober is None or prober.pid != os.getpid():
+        with _prober_lock:
+            if _prober is None or _prober.pid != os.getpid():
+                interval = getattr(settings, "HEALTH_PROBE_INTERVAL", 5.0)
+                _prober = ReadinessProber(
+                    interval, getattr(settings, "HEALTH_PROBE_STALE_AFTER", 3 * interval)
+                )
+                _prober.start()
+            prober = _prober
+    return prober
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _prober
+    if setting in {"HEALTH_PROBE_INTERVAL", "HEALTH_PROBE_STALE_AFTER"} and _prober:
+        _prober.stop()
+        _prober = None
+
+
+class LiveView(APIView):
+    """The process is up and serving; restart it when this fails."""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = []
+
+    def get(self, request):
+        return Response({"status": "ok"})
+
+
+class ReadyView(APIView):
+    """Route traffic here only while this returns 200."""
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = []
+
+    def get(self, request):
+        ready, details = get_prober().status(wait=getattr(settings, "HEALTH_PROBE_FIRST_WAIT", 2.0))
+        payload = {
+            "status": "ok" if ready else "unavailable",
+            **details,
+            "hostname": HOSTNAME,
+            "pid": os.getpid(),
+        }
+        return Response(payload, status=200 if ready else 503)
+
 
 class HealthView(APIView):
     """
@@ -17,26 +183,28 @@ class HealthView(APIView):
     """
 
     permission_classes = [AllowAny]
+    throttle_classes = []
 
     def get(self, request):
         payload = {"status": "ok"}
         if request.query_params.get("checks") in {"1", "true", "yes"}:
-            # DB check (safe & lightweight)
-            db_state = "ok"
-            try:
-                with connection.cursor() as cur:
-                    cur.execute("SELECT 1;")
-            except Exception as e:
-                db_state = f"error: {type(e).__name__}"
+            # DB state from the background prober, not a query of our own
+            _, db = get_prober().status(wait=getattr(settings, "HEALTH_PROBE_FIRST_WAIT", 2.0))
+
+            notes_cache = get_list_cache()
 
             payload.update(
                 {
-                    "db": db_state,
+                    "db": db["db"],
+                    "db_probe": db,
                     "debug": bool(getattr(settings, "DEBUG", False)),
-                    "hostname": socket.gethostname(),
+                    "hostname": HOSTNAME,
                     # Wire this from CI later (Section 9) if you want:
-                    "commit": os.getenv("GIT_COMMIT_SHA", ""),
+                    "commit": COMMIT,
                     "app": "backend",
+                    "notes_cache": notes_cache.stats() if notes_cache else None,
+                    "db_connections": connection_report(),
+                    "process": {"pid": os.getpid(), **memory_usage()},
                 }
             )
         return Response(payload, status=200)
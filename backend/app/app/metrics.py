@@ -0,0 +1,389 @@
+"""
+Request timing: ``Server-Timing`` headers and Prometheus histograms.
+
+``RequestMetricsMiddleware`` measures, per resolved view name and method:
+
+- total time in the Django handler,
+- time and statements in SQL (a ``connection.execute_wrapper``),
+- serialization time (code wrapped in ``timed("serialize")``: serializer
+  ``.data`` and the renderers),
+- response bytes.
+
+It adds these to the response as ``Server-Timing`` and folds them into histograms
+served at ``/api/metrics/`` in the Prometheus text format.
+
+Each process keeps its own histograms. When ``METRICS_DIR`` is set (gunicorn sets
+it up), every process also writes them to ``<dir>/<pid>-<start>.json`` at most
+once per ``METRICS_FLUSH_INTERVAL``; the metrics view sums all files, so any worker
+answers for the whole server. When a worker exits, gunicorn folds its file into
+``exited.json`` so totals never go backwards and the directory does not grow with
+every worker ever started; it is cleared when the master starts. The master's
+autoscaler adds its gauges there as ``autoscale.json``.
+
+``/api/metrics/`` answers ``METRICS_TRUSTED_IPS`` and, when ``METRICS_TOKEN`` is
+set, callers presenting it as a Bearer token; everyone else is refused.
+"""
+
+import contextlib
+import contextvars
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.decorators import sync_and_async_middleware
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+GAUGE = "gauge"
+
+# Series of exited workers, summed (see fold_exited).
+EXITED_FILE = "exited.json"
+
+# name -> (help, buckets); None buckets = counter, GAUGE = gauge
+METRICS = {
+    "notes_http_request_duration_seconds": ("Time in the Django handler.", SECONDS_BUCKETS),
+    "notes_http_request_db_seconds": ("Time spent executing SQL.", SECONDS_BUCKETS),
+    "notes_http_request_queries": ("SQL statements per request.", QUERY_BUCKETS),
+    "notes_http_request_serialize_seconds": (
+        "Time building and rendering response payloads.",
+        SECONDS_BUCKETS,
+    ),
+    "notes_http_response_bytes": ("Response body size (non-streaming).", BYTES_BUCKETS),
+    "notes_http_responses_total": ("Responses by status code.", None),
+    # Written by the gunicorn master's autoscaler (app/autoscale.py).
+    "notes_gunicorn_workers": ("Live worker processes.", GAUGE),
+    "notes_gunicorn_target_workers": ("Worker count the master maintains.", GAUGE),
+    "notes_gunicorn_requests_in_flight": ("Requests being handled.", GAUGE),
+    "notes_gunicorn_busy_ratio": ("Requests in flight over worker threads.", GAUGE),
+    "notes_gunicorn_listen_backlog": ("Connections waiting to be accepted.", GAUGE),
+    "notes_gunicorn_worker_rss_max_bytes": ("RSS of the largest worker.", GAUGE),
+    "notes_gunicorn_autoscale_events_total": ("Scale ups, downs and recycles.", None),
+}
+
+# Paths that are not measured (the scrape itself).
+SKIP_PREFIXES = ("/api/metrics/",)
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Add the block's duration to ``name`` for the current request (no-op outside one)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class Registry:
+    """Histograms and counters of this process, keyed by metric name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._series = {}
+        self._start_process()
+
+    def _start_process(self):
+        # A forked worker starts empty and writes its own file, never the parent's.
+        self._series.clear()
+        self._file_name = f"{os.getpid()}-{time.time_ns()}.json"
+        self._last_flush = 0.0
+        self._timer = None
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][1]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"buckets": [0] * len(buckets), "sum": 0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    def inc(self, name, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            series = self._series.setdefault(key, {"count": 0})
+            series["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    **series,
+                    **({"buckets": list(series["buckets"])} if "buckets" in series else {}),
+                }
+                for (name, labels), series in self._series.items()
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    # -- cross-process ---------------------------------------------------------
+
+    def flush(self, force=False):
+        directory = getattr(settings, "METRICS_DIR", "")
+        if not directory:
+            return
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+        wait = self._last_flush + interval - time.monotonic()
+        if not force and wait > 0:
+            # Write the pending observations even if this worker goes idle.
+            if self._timer is None:
+                self._timer = threading.Timer(wait, self._flush_pending)
+                self._timer.daemon = True
+                self._timer.start()
+            return
+        if not self._flush_lock.acquire(blocking=force):
+            return  # another thread is writing this process's file right now
+        try:
+            self._last_flush = time.monotonic()
+            path = Path(directory) / self._file_name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp, path)
+        finally:
+            self._flush_lock.release()
+
+    def _flush_pending(self):
+        self._timer = None
+        self.flush(force=True)
+
+    def collect(self):
+        """Series summed over every process writing to METRICS_DIR (or just this one)."""
+        directory = getattr(settings, "METRICS_DIR", "")
+        if not directory:
+            return self.snapshot()
+        self.flush(force=True)
+        merged = {}
+        with _directory_lock(directory, fcntl.LOCK_SH):
+            for path in Path(directory).glob("*.json"):
+                try:
+                    entries = json.loads(path.read_text())
+                except (OSError, ValueError):
+                    continue  # being replaced or truncated; the next scrape has it
+                _merge(merged, entries)
+        return list(merged.values())
+
+
+def _merge(merged, entries):
+    """Add ``entries`` into ``merged`` ({(name, labels): entry})."""
+    for entry in entries:
+        key = (entry["name"], tuple(sorted(entry["labels"].items())))
+        total = merged.get(key)
+        if total is None:
+            merged[key] = entry
+            continue
+        if "value" in entry:
+            total["value"] += entry["value"]
+            continue
+        total["count"] += entry["count"]
+        if "buckets" in entry:
+            total["sum"] += entry["sum"]
+            total["buckets"] = [a + b for a, b in zip(total["buckets"], entry["buckets"])]
+
+
+@contextlib.contextmanager
+def _directory_lock(directory, operation):
+    # Readers share it; fold_exited() takes it alone, so no scrape sees a dead
+    # worker's series both in its own file and in the aggregate (or in neither).
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with open(Path(directory) / ".lock", "a") as lock:
+        fcntl.flock(lock, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def fold_exited(directory, pid):
+    """
+    Move the series of exited process ``pid`` into ``EXITED_FILE`` and delete
+    its file (gunicorn's ``child_exit``), so totals keep counting its requests
+    without one file per worker ever started.
+    """
+    root = Path(directory)
+    files = list(root.glob(f"{pid}-*.json"))
+    if not files:
+        return
+    with _directory_lock(directory, fcntl.LOCK_EX):
+        aggregate = root / EXITED_FILE
+        merged = {}
+        for path in [aggregate, *files]:
+            try:
+                _merge(merged, json.loads(path.read_text()))
+            except FileNotFoundError:
+                continue
+            except ValueError:
+                pass  # cut short by the exit: what it held is lost either way
+        tmp = aggregate.with_suffix(".tmp")
+        tmp.write_text(json.dumps(list(merged.values())))
+        os.replace(tmp, aggregate)
+        for path in files:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".tmp").unlink(missing_ok=True)
+
+
+registry = Registry()
+os.register_at_fork(after_in_child=registry._start_process)
+
+
+def _labels(labels, **extra):
+    pairs = {**dict(sorted(labels.items())), **extra}
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in pairs.items()
+    )
+    return "{" + body + "}" if body else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(series):
+    by_name = {}
+    for entry in series:
+        by_name.setdefault(entry["name"], []).append(entry)
+
+    lines = []
+    for name, (help_text, buckets) in METRICS.items():
+        entries = sorted(by_name.get(name, []), key=lambda e: sorted(e["labels"].items()))
+        lines.append(f"# HELP {name} {help_text}")
+        kind = GAUGE if buckets == GAUGE else "histogram" if buckets else "counter"
+        lines.append(f"# TYPE {name} {kind}")
+        for entry in entries:
+            labels = entry["labels"]
+            if kind == GAUGE:
+                lines.append(f"{name}{_labels(labels)} {_number(entry['value'])}")
+                continue
+            if buckets is None:
+                lines.append(f"{name}{_labels(labels)} {entry['count']}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, entry["buckets"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {entry['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(entry['sum'])}")
+            lines.append(f"{name}_count{_labels(labels)} {entry['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _time_queries(timings):
+    """Time this thread's SQL into ``timings`` until the returned stack is closed."""
+
+    def sql_timer(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            timings["db"] += time.perf_counter() - start
+            timings["queries"] += 1
+
+    stack = contextlib.ExitStack()
+    for conn in connections.all():
+        stack.enter_context(conn.execute_wrapper(sql_timer))
+    return stack
+
+
+@sync_and_async_middleware
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path.startswith(SKIP_PREFIXES):
+            return self.get_response(request)
+
+        timings = {"db": 0.0, "queries": 0}
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with _time_queries(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.record(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if request.path.startswith(SKIP_PREFIXES):
+            return await self.get_response(request)
+
+        timings = {"db": 0.0, "queries": 0}
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            # Connections are per thread: the wrappers go on the request's
+            # thread-sensitive executor, where the async ORM runs its queries.
+            queries = await sync_to_async(_time_queries)(timings)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.close)()
+        finally:
+            _current.reset(token)
+        return self.record(request, response, timings, time.perf_counter() - start)
+
+    def record(self, request, response, timings, total):
+        match = request.resolver_match
+        labels = {
+            "view": match.view_name if match else "<unresolved>",
+            "method": request.method,
+        }
+        serialize = timings.get("serialize", 0.0)
+        registry.observe("notes_http_request_duration_seconds", labels, total)
+        registry.observe("notes_http_request_db_seconds", labels, timings["db"])
+        registry.observe("notes_http_request_queries", labels, timings["queries"])
+        registry.observe("notes_http_request_serialize_seconds", labels, serialize)
+        if not response.streaming:
+            registry.observe("notes_http_response_bytes", labels, len(response.content))
+        registry.inc("notes_http_responses_total", {**labels, "status": response.status_code})
+        registry.flush()
+
+        if getattr(settings, "METRICS_SERVER_TIMING", True):
+            response["Server-Timing"] = (
+                f'db;dur={timings["db"] * 1000:.2f};desc="{timings["queries"]} queries", '
+                f"serialize;dur={serialize * 1000:.2f}, "
+                f"total;dur={total * 1000:.2f}"
+            )
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for trusted IPs or ``Authorization: Bearer <METRICS_TOKEN>``."""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    trusted = request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_TRUSTED_IPS", [])
+    if not trusted and not (token and request.headers.get("Authorization") == f"Bearer {token}"):
+        if not token:
+            return HttpResponse(status=403)
+        return HttpResponse(status=401, headers={"WWW-Authenticate": 'Bearer realm="metrics"'})
+    return HttpResponse(
+        render_prometheus(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
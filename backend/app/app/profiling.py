@@ -0,0 +1,276 @@
+"""
+On-demand CPU profiling of live workers.
+
+A profiling session covers the next N requests or T seconds of one worker
+process and writes one file to ``PROFILE_DIR``:
+
+- ``cprofile``: deterministic cProfile of each request, merged into
+  ``<pid>-<time>.pstats`` (``python -m pstats``, snakeviz). One request is
+  profiled at a time, since Python 3.12 allows a single active profiler per
+  process; requests overlapping it run unprofiled and are not counted.
+- ``sample``: a thread snapshots the stacks of every request in flight each
+  ``PROFILE_SAMPLE_INTERVAL`` seconds, written as collapsed stacks to
+  ``<pid>-<time>.collapsed`` (flamegraph.pl, speedscope). Low overhead, so fine
+  under production traffic.
+
+Sessions start either with an ``X-Profile`` request header, e.g.
+``X-Profile: mode=sample; requests=200`` or ``X-Profile: seconds=30`` (honoured
+from ``PROFILE_TRUSTED_IPS`` or with a staff user's Bearer token, ignored
+otherwise), or with ``kill -USR2 <worker pid>``, which runs a
+``PROFILE_SIGNAL_MODE`` session for ``PROFILE_SIGNAL_SECONDS`` (gunicorn installs
+the handler in ``post_worker_init``).
+"""
+
+import contextlib
+import cProfile
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+
+logger = logging.getLogger(__name__)
+
+HEADER = "X-Profile"
+MODES = ("cprofile", "sample")
+MAX_REQUESTS = 10_000
+MAX_SECONDS = 600
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class Session:
+    def __init__(self, mode, requests=None, seconds=None):
+        self.mode = mode
+        self.requests = requests
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.done = 0
+        self.finished = threading.Event()
+        self._lock = threading.Lock()
+        self._profiling = threading.Lock()  # cprofile: one request at a time
+        self._stats = None
+        self._active = set()  # sample: threads currently inside a request
+        self._stacks = Counter()
+        self._threads = []
+        self.writer = None
+
+    def start(self):
+        if self.mode == "sample":
+            self._spawn(self._sample)
+        if self.deadline is not None:
+            self._spawn(self._expire)
+
+    def _spawn(self, target):
+        thread = threading.Thread(target=target, name=f"profiling-{target.__name__}", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def run(self, get_response, request):
+        with self.track():
+            return get_response(request)
+
+    @contextlib.contextmanager
+    def track(self):
+        """Count the request run in the block, profiling or sampling it."""
+        if self.mode == "sample":
+            ident = threading.get_ident()
+            self._active.add(ident)
+            try:
+                yield
+            finally:
+                self._active.discard(ident)
+                self._request_done()
+            return
+
+        if not self._profiling.acquire(blocking=False):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+        finally:
+            self._profiling.release()
+            self._request_done()
+
+    def _request_done(self):
+        with self._lock:
+            self.done += 1
+            over = self.requests is not None and self.done >= self.requests
+        if over or self._expired():
+            self.finish()
+
+    def _expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _expire(self):
+        self.finished.wait(max(self.deadline - time.monotonic(), 0))
+        self.finish()
+
+    def _sample(self):
+        interval = getattr(settings, "PROFILE_SAMPLE_INTERVAL", 0.005)
+        while not self.finished.wait(interval):
+            frames = sys._current_frames()
+            for ident in list(self._active):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._stacks[collapse(frame)] += 1
+
+    def finish(self):
+        global _session
+        with _session_lock:
+            if self.finished.is_set():
+                return
+            self.finished.set()
+            if _session is self:
+                _session = None
+        self.writer = threading.Thread(target=self._write, name="profiling-write", daemon=True)
+        self.writer.start()
+
+    def _write(self):
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        directory = Path(getattr(settings, "PROFILE_DIR", "/tmp/notes-profiles"))
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = directory / f"{os.getpid()}-{time.strftime('%Y%m%dT%H%M%S')}"
+        with self._lock:
+            if self.mode == "cprofile":
+                if self._stats is None:
+                    logger.warning("Profiling session ended without a profiled request")
+                    return
+                path = stem.with_suffix(".pstats")
+                self._stats.dump_stats(path)
+            else:
+                path = stem.with_suffix(".collapsed")
+                path.write_text("".join(f"{s} {n}\n" for s, n in self._stacks.most_common()))
+        logger.warning("Profile of %d request(s) written to %s", self.done, path)
+
+
+def collapse(frame):
+    """``frame``'s stack, outermost first, in the collapsed (flamegraph) format."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        name = getattr(code, "co_qualname", code.co_name)
+        names.append(f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def start_session(mode=None, requests=None, seconds=None):
+    """Start a session in this process unless one is running; returns it or None."""
+    global _session
+    mode = mode if mode in MODES else getattr(settings, "PROFILE_MODE", "sample")
+    if requests is None and seconds is None:
+        requests = getattr(settings, "PROFILE_REQUESTS", 100)
+    session = Session(
+        mode,
+        requests=min(requests, MAX_REQUESTS) if requests else None,
+        seconds=min(seconds, MAX_SECONDS) if seconds else None,
+    )
+    with _session_lock:
+        if _session is not None:
+            return None
+        _session = session
+    session.start()
+    logger.warning(
+        "Profiling (%s) for %s", mode, f"{requests} requests" if requests else f"{seconds}s"
+    )
+    return session
+
+
+def parse_header(value):
+    """``mode=sample; requests=50`` -> kwargs for ``start_session`` (bad parts ignored)."""
+    options = {}
+    for part in value.replace(",", ";").split(";"):
+        key, _, raw = part.strip().partition("=")
+        if key == "mode":
+            options["mode"] = raw.strip()
+        elif key in ("requests", "seconds"):
+            try:
+                number = float(raw) if key == "seconds" else int(raw)
+            except ValueError:
+                continue
+            if number > 0:
+                options[key] = number
+    return options
+
+
+def is_trusted(request):
+    if request.META.get("REMOTE_ADDR") in getattr(settings, "PROFILE_TRUSTED_IPS", []):
+        return True
+    try:
+        auth = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, TokenError):  # InvalidToken is an AuthenticationFailed
+        return False
+    return auth is not None and auth[0].is_staff
+
+
+def install_signal_handler(sig=signal.SIGUSR2):
+    """SIGUSR2 starts a ``PROFILE_SIGNAL_MODE`` session of ``PROFILE_SIGNAL_SECONDS``."""
+
+    def handler(signum, frame):
+        # Off the signal frame: it may have interrupted a holder of _session_lock.
+        threading.Thread(
+            target=start_session,
+            args=(getattr(settings, "PROFILE_SIGNAL_MODE", "sample"),),
+            kwargs={"seconds": getattr(settings, "PROFILE_SIGNAL_SECONDS", 30)},
+            daemon=True,
+        ).start()
+
+    signal.signal(sig, handler)
+
+
+@sync_and_async_middleware
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if _session is None and HEADER in request.headers and is_trusted(request):
+            start_session(**parse_header(request.headers[HEADER]))
+        session = _session
+        if session is None:
+            return self.get_response(request)
+        return session.run(self.get_response, request)
+
+    async def __acall__(self, request):
+        # is_trusted() may load the user.
+        if (
+            _session is None
+            and HEADER in request.headers
+            and await sync_to_async(is_trusted)(request)
+        ):
+            start_session(**parse_header(request.headers[HEADER]))
+        session = _session
+        if session is None:
+            return await self.get_response(request)
+        # The event loop's thread stands for the request, so a session on ASGI
+        # also sees the other requests it interleaves with.
+        with session.track():
+            return await self.get_response(request)
@@ -0,0 +1,208 @@
+"""
+Opt-in SQL profiling: slow statements, N+1 patterns and sampled query plans.
+
+With ``QUERY_PROFILE=True``, ``QueryProfileMiddleware`` records every statement a
+request runs. Statements are fingerprinted (literals and placeholder lists folded
+to ``?``), so one query repeated per row of a page shows up as a single
+fingerprint run ``QUERY_PROFILE_REPEAT`` or more times: an N+1 candidate.
+
+SELECTs slower than ``QUERY_PROFILE_SLOW_MS`` are explained after the response
+is built, on the same connection: ``EXPLAIN (ANALYZE, BUFFERS)`` on PostgreSQL
+for a ``QUERY_PROFILE_EXPLAIN_SAMPLE`` fraction of them (ANALYZE runs the query
+again), ``EXPLAIN QUERY PLAN`` on SQLite, which is cheap and always done. Plans
+that scan a whole table or sort without an index are tagged with warnings.
+
+Requests with findings are logged as one JSON record on the
+``app.queryprofile`` logger and appended to ``QUERY_PROFILE_LOG`` (JSON lines)
+when set; ``manage.py query_report`` summarises that file.
+"""
+
+import contextlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, transaction
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_SPACE = re.compile(r"\s+")
+
+# Plan fragments worth a look, by vendor.
+PLAN_WARNINGS = {
+    "postgresql": [
+        (re.compile(r"Seq Scan on (\S+)"), "sequential scan on {0}"),
+        (re.compile(r"Sort Method: external"), "sort spilled to disk"),
+    ],
+    "sqlite": [
+        (
+            re.compile(r"\bSCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING )?INDEX)"),
+            "full scan of {0}",
+        ),
+        (re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)"), "unindexed {0}"),
+    ],
+}
+
+_log_lock = threading.Lock()
+
+
+def fingerprint(sql):
+    """``sql`` with literals and placeholder lists normalised, for grouping."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def explain(connection, sql, params, analyze):
+    """The plan of ``sql`` as a list of lines, or None if the vendor has no support."""
+    if connection.vendor == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    elif connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        return None
+    # A savepoint, so a failing EXPLAIN cannot abort the request's transaction.
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    if connection.vendor == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def plan_warnings(vendor, plan):
+    warnings = []
+    for pattern, message in PLAN_WARNINGS.get(vendor, []):
+        for line in plan:
+            match = pattern.search(line)
+            if match:
+                warnings.append(message.format(*match.groups()))
+    return warnings
+
+
+def _record_queries(statements):
+    """Append this thread's SQL to ``statements`` until the returned stack is closed."""
+
+    def recorder(alias):
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                statements.append((alias, sql, params, many, (time.perf_counter() - start) * 1000))
+
+        return record
+
+    stack = contextlib.ExitStack()
+    for conn in connections.all():
+        stack.enter_context(conn.execute_wrapper(recorder(conn.alias)))
+    return stack
+
+
+@sync_and_async_middleware
+class QueryProfileMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_PROFILE", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        statements = []
+        with _record_queries(statements):
+            response = self.get_response(request)
+        self.report(request, response, statements)
+        return response
+
+    async def __acall__(self, request):
+        statements = []
+        # Recording and EXPLAIN both run on the request's thread-sensitive
+        # executor, the thread whose connections the async ORM uses.
+        queries = await sync_to_async(_record_queries)(statements)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(queries.close)()
+        await sync_to_async(self.report)(request, response, statements)
+        return response
+
+    def report(self, request, response, statements):
+        record = self.analyse(request, response, statements)
+        if record is not None:
+            self.emit(record)
+
+    def analyse(self, request, response, statements):
+        repeat = getattr(settings, "QUERY_PROFILE_REPEAT", 5)
+        slow_ms = getattr(settings, "QUERY_PROFILE_SLOW_MS", 100.0)
+        sample = getattr(settings, "QUERY_PROFILE_EXPLAIN_SAMPLE", 0.1)
+
+        groups = {}
+        for alias, sql, params, many, ms in statements:
+            group = groups.setdefault(fingerprint(sql), {"count": 0, "ms": 0.0})
+            group["count"] += 1
+            group["ms"] += ms
+        repeated = [
+            {"sql": sql, "count": g["count"], "total_ms": round(g["ms"], 3)}
+            for sql, g in groups.items()
+            if g["count"] >= repeat
+        ]
+
+        slow = []
+        for alias, sql, params, many, ms in statements:
+            if ms < slow_ms:
+                continue
+            entry = {"sql": fingerprint(sql), "ms": round(ms, 3)}
+            connection = connections[alias]
+            # Only SELECTs: ANALYZE executes the statement again.
+            if not many and sql.lstrip()[:6].upper() == "SELECT":
+                analyze = connection.vendor == "postgresql"
+                if not analyze or random.random() < sample:
+                    try:
+                        plan = explain(connection, sql, params, analyze)
+                    except Exception as exc:  # a failed EXPLAIN must not fail the request
+                        entry["explain_error"] = str(exc)
+                    else:
+                        if plan is not None:
+                            entry["plan"] = plan
+                            entry["warnings"] = plan_warnings(connection.vendor, plan)
+            slow.append(entry)
+
+        if not repeated and not slow:
+            return None
+        match = request.resolver_match
+        return {
+            "ts": time.time(),
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "queries": len(statements),
+            "db_ms": round(sum(s[-1] for s in statements), 3),
+            "n_plus_one": repeated,
+            "slow": slow,
+        }
+
+    def emit(self, record):
+        line = json.dumps(record, default=str)
+        logger.warning("query profile %s", line, extra={"query_profile": record})
+        path = getattr(settings, "QUERY_PROFILE_LOG", "")
+        if path:
+            with _log_lock, open(path, "a") as log:
+                log.write(line + "\n")
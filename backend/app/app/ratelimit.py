@@ -0,0 +1,190 @@
+"""
+Shared-memory state for request throttling and admission control.
+
+``BucketTable`` holds token buckets: a bucket of ``capacity`` tokens refills at
+``rate`` tokens per second and each request takes one, so a client may burst up
+to ``capacity`` and then continues at ``rate``. ``InFlight`` counts the requests
+being handled by all workers of the host.
+
+Both live in anonymous shared memory. ``allocate()`` is called in the gunicorn
+master before it forks (``on_starting``), so every worker reads and writes the
+same pages. Outside gunicorn they are allocated per process on first use.
+Updates are a few struct reads and writes under a process-shared lock, striped
+across bucket sets. An uncontended lock never leaves user space, so nothing
+here touches the database, the cache or the filesystem. This module runs in the
+master, which may never have imported Django, so it uses the standard library
+only.
+
+Buckets are not shared between hosts: with N backend hosts a client gets up to
+N times the configured rate.
+"""
+
+import hashlib
+import mmap
+import multiprocessing as mp
+import os
+import struct
+import threading
+import time
+
+# tag (key hash), tokens, last update (time.time())
+SLOT = struct.Struct("Qdd")
+# Slots per set: a key lives in one set and evicts its least recently used slot.
+WAYS = 4
+# pid, requests in flight
+PROCESS = struct.Struct("qq")
+
+
+def _digest(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big") or 1
+
+
+class BucketTable:
+    """
+    Fixed-size, set-associative table of token buckets.
+
+    A new key takes the least recently updated slot of its set. The evicted
+    bucket had been idle the longest and has most likely refilled already, so
+    eviction costs at most a little leniency and never blocks a client.
+    """
+
+    def __init__(self, sets=4096, stripes=64):
+        self.sets = sets
+        self._mem = mmap.mmap(-1, sets * WAYS * SLOT.size)
+        self._locks = [mp.Lock() for _ in range(stripes)]
+
+    def take(self, key, capacity, rate, cost=1.0, now=None):
+        """
+        Take ``cost`` tokens from ``key``'s bucket.
+
+        Returns ``(allowed, wait)``; ``wait`` is the number of seconds until
+        the request would be allowed (0 when it is).
+        """
+        now = time.time() if now is None else now
+        tag = _digest(key)
+        group = tag % self.sets
+        base = group * WAYS * SLOT.size
+        with self._locks[group % len(self._locks)]:
+            victim = oldest = None
+            for way in range(WAYS):
+                offset = base + way * SLOT.size
+                found, tokens, stamp = SLOT.unpack_from(self._mem, offset)
+                if found == tag:
+                    break
+                if oldest is None or stamp < oldest:
+                    victim, oldest = offset, stamp
+            else:
+                offset, tokens, stamp = victim, capacity, now
+            tokens = min(capacity, tokens + max(now - stamp, 0) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            SLOT.pack_into(self._mem, offset, tag, tokens, now)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def clear(self):
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            self._mem[:] = bytes(len(self._mem))
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+
+class InFlight:
+    """
+    Requests in flight across processes, with a count per process.
+
+    Per-process counts let the master discount a worker that died mid-request
+    (``forget`` from ``child_exit``). Otherwise a worker killed by the timeout
+    would hold its admissions forever.
+    """
+
+    def __init__(self, processes=256):
+        self.processes = processes
+        # Slot 0 keeps the total; slots 1.. belong to processes.
+        self._mem = mmap.mmap(-1, (processes + 1) * PROCESS.size)
+        self._lock = mp.Lock()
+        self._slot = None  # (pid, offset) of this process
+
+    def _own_slot(self):
+        pid = os.getpid()
+        if self._slot is not None and self._slot[0] == pid:
+            return self._slot[1]
+        free = None
+        for index in range(1, self.processes + 1):
+            offset = index * PROCESS.size
+            owner, _ = PROCESS.unpack_from(self._mem, offset)
+            if owner == pid:
+                free = offset
+                break
+            if owner == 0 and free is None:
+                free = offset
+        if free is None:
+            return None  # more processes than slots: counted in the total only
+        PROCESS.pack_into(self._mem, free, pid, PROCESS.unpack_from(self._mem, free)[1])
+        self._slot = (pid, free)
+        return free
+
+    def enter(self, limit):
+        """Admit one more request unless ``limit`` are already in flight (0 = no limit)."""
+        with self._lock:
+            _, total = PROCESS.unpack_from(self._mem, 0)
+            if limit and total >= limit:
+                return False
+            self._add(1)
+        return True
+
+    def exit(self):
+        with self._lock:
+            self._add(-1)
+
+    def _add(self, delta):
+        _, total = PROCESS.unpack_from(self._mem, 0)
+        PROCESS.pack_into(self._mem, 0, 0, max(total + delta, 0))
+        offset = self._own_slot()
+        if offset is not None:
+            pid, count = PROCESS.unpack_from(self._mem, offset)
+            PROCESS.pack_into(self._mem, offset, pid, max(count + delta, 0))
+
+    def forget(self, pid):
+        """Drop a dead process's requests from the total."""
+        with self._lock:
+            for index in range(1, self.processes + 1):
+                offset = index * PROCESS.size
+                owner, count = PROCESS.unpack_from(self._mem, offset)
+                if owner == pid:
+                    _, total = PROCESS.unpack_from(self._mem, 0)
+                    PROCESS.pack_into(self._mem, 0, 0, max(total - count, 0))
+                    PROCESS.pack_into(self._mem, offset, 0, 0)
+                    return
+
+    def total(self):
+        return PROCESS.unpack_from(self._mem, 0)[1]
+
+
+_buckets = None
+_in_flight = None
+_allocate_lock = threading.Lock()
+
+
+def allocate():
+    """Create the shared tables; call before forking workers that must share them."""
+    global _buckets, _in_flight
+    with _allocate_lock:
+        if _buckets is None:
+            _buckets = BucketTable()
+            _in_flight = InFlight()
+
+
+def buckets():
+    if _buckets is None:
+        allocate()
+    return _buckets
+
+
+def in_flight():
+    if _in_flight is None:
+        allocate()
+    return _in_flight
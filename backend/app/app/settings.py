@@ -14,6 +14,7 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Load .env if present (for local/dev convenience)
@@ -48,8 +49,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "app.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "app.metrics.RequestMetricsMiddleware",
+    "app.throttling.AdmissionControlMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "app.dbmetrics.DBConnectionMetricsMiddleware",
+    "app.queryprofile.QueryProfileMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -109,19 +115,156 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
+    # Bearer first: API clients never pay for a session lookup, and 401s advertise Bearer.
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "app.authentication.StatelessJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "notes.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # Token buckets in shared memory (app/throttling.py); "<requests>/<period>" is
+    # also the burst size, empty turns a scope off. The token view uses "auth",
+    # per client IP.
+    "DEFAULT_THROTTLE_CLASSES": ["app.throttling.ReadWriteThrottle"],
+    "DEFAULT_THROTTLE_RATES": {
+        "read": os.getenv("THROTTLE_READ_RATE", "1200/min") or None,
+        "write": os.getenv("THROTTLE_WRITE_RATE", "300/min") or None,
+        "auth": os.getenv("THROTTLE_AUTH_RATE", "10/min") or None,
+    },
+    # Client IP from X-Forwarded-For behind this many proxies. 0 uses the peer
+    # address, as clients reaching gunicorn directly could forge the header; the
+    # prod compose file sets 1 for the reverse-proxy.
+    "NUM_PROXIES": int(os.getenv("THROTTLE_NUM_PROXIES", "0")),
+}
+
+# Admission control: 503 + Retry-After once ADMISSION_MAX_IN_FLIGHT requests are
+# in flight across the host's workers (0 = no limit), or when a request waited
+# more than ADMISSION_MAX_QUEUE_SECONDS behind the proxy (X-Request-Start; keep
+# it well under GUNICORN_TIMEOUT).
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_MAX_QUEUE_SECONDS = float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", "10"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+# Long-polls on the events endpoint wait up to NOTES_EVENTS_POLL_SECONDS without
+# doing work, so they would fill the in-flight budget; they are not counted.
+ADMISSION_EXEMPT_PATHS = ["/api/health/", "/api/metrics/", "/api/async/notes/events/"]
+
+# Readiness (/api/health/ready/): a background thread per worker probes the
+# database every HEALTH_PROBE_INTERVAL seconds; a result older than
+# HEALTH_PROBE_STALE_AFTER (a probe hanging on the database) reads as not ready.
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "5"))
+HEALTH_PROBE_STALE_AFTER = float(
+    os.getenv("HEALTH_PROBE_STALE_AFTER", str(3 * HEALTH_PROBE_INTERVAL))
+)
+HEALTH_PROBE_FIRST_WAIT = float(os.getenv("HEALTH_PROBE_FIRST_WAIT", "2"))
+
+# Build notes list payloads from .values() rows instead of NoteSerializer instances.
+NOTES_FAST_SERIALIZATION = os.getenv("NOTES_FAST_SERIALIZATION", "True") == "True"
+
+# Caches
+# "default" is per-process. "shared" is Redis when SHARED_CACHE_REDIS_URL is set
+# (visible to every worker and host), otherwise per-process memory as well.
+SHARED_CACHE_REDIS_URL = os.getenv("SHARED_CACHE_REDIS_URL", "")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": SHARED_CACHE_REDIS_URL,
+        }
+        if SHARED_CACHE_REDIS_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "shared",
+        }
+    ),
+}
+
+# Notes list response cache (see notes/cache.py).
+# BACKEND: "locmem" (bounded per-process LRU), "django" (payloads in ALIAS) or "none".
+# Generations are kept in ALIAS, so workers only share them when "shared" is Redis.
+NOTES_LIST_CACHE = {
+    "BACKEND": os.getenv("NOTES_CACHE_BACKEND", "locmem"),
+    "ALIAS": os.getenv("NOTES_CACHE_ALIAS", "shared"),
+    "MAX_ENTRIES": int(os.getenv("NOTES_CACHE_MAX_ENTRIES", "2048")),
+    "TIMEOUT": int(os.getenv("NOTES_CACHE_TIMEOUT", "300")),
 }
 
+# Upper bound on operations accepted by POST /api/notes/bulk/
+NOTES_BULK_MAX_ITEMS = int(os.getenv("NOTES_BULK_MAX_ITEMS", "1000"))
+
+# Rows fetched per server-side cursor round trip by /api/notes/export/
+NOTES_EXPORT_CHUNK_SIZE = int(os.getenv("NOTES_EXPORT_CHUNK_SIZE", "2000"))
+
+# /api/notes/changes/: a caught-up cursor trails the clock by the lag so rows
+# committed late are not skipped; cursors older than the tombstone retention get 410.
+NOTES_SYNC_LAG_SECONDS = int(os.getenv("NOTES_SYNC_LAG_SECONDS", "5"))
+NOTES_SYNC_PAGE_SIZE = int(os.getenv("NOTES_SYNC_PAGE_SIZE", "200"))
+NOTES_TOMBSTONE_RETENTION_DAYS = int(os.getenv("NOTES_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# `manage.py archive_notes` moves notes ARCHIVED (and untouched) for this many days
+# to cold storage; POST /api/notes/restore/ brings them back.
+NOTES_ARCHIVE_AFTER_DAYS = int(os.getenv("NOTES_ARCHIVE_AFTER_DAYS", "90"))
+
+# /api/async/notes/events/ (ASGI only). The broker is "local" (this process) or
+# "postgres" (LISTEN/NOTIFY across workers); "auto" picks by database vendor.
+NOTES_EVENTS_BROKER = os.getenv("NOTES_EVENTS_BROKER", "auto")
+NOTES_EVENTS_HEARTBEAT_SECONDS = int(os.getenv("NOTES_EVENTS_HEARTBEAT_SECONDS", "15"))
+NOTES_EVENTS_STREAM_SECONDS = int(os.getenv("NOTES_EVENTS_STREAM_SECONDS", "300"))
+NOTES_EVENTS_POLL_SECONDS = int(os.getenv("NOTES_EVENTS_POLL_SECONDS", "25"))
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "app.authentication.NotesTokenObtainPairSerializer",
 }
+
+# Authenticate Bearer tokens from their claims (no auth_user SELECT per request);
+# the account's active flag is cached for AUTH_USER_STATE_TTL seconds.
+AUTH_STATELESS_JWT = os.getenv("AUTH_STATELESS_JWT", "True") == "True"
+AUTH_USER_STATE_TTL = int(os.getenv("AUTH_USER_STATE_TTL", "60"))
+
+# Lifetime of the single-use tickets that open the event stream (?ticket=).
+STREAM_TICKET_SECONDS = int(os.getenv("STREAM_TICKET_SECONDS", "30"))
+
+# Request metrics: Server-Timing on every response, Prometheus text at /api/metrics/.
+# With METRICS_DIR set (gunicorn does), worker processes share their histograms
+# through JSON files there. The endpoint answers METRICS_TRUSTED_IPS and callers
+# sending METRICS_TOKEN (if set) as a Bearer token, nobody else.
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0"))
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "True") == "True"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_TRUSTED_IPS = [
+    ip.strip() for ip in os.getenv("METRICS_TRUSTED_IPS", "127.0.0.1,::1").split(",") if ip.strip()
+]
+
+# Opt-in SQL profiling (app/queryprofile.py): N+1 patterns and EXPLAIN of slow
+# SELECTs, written to QUERY_PROFILE_LOG for `manage.py query_report`.
+QUERY_PROFILE = os.getenv("QUERY_PROFILE", "False") == "True"
+QUERY_PROFILE_SLOW_MS = float(os.getenv("QUERY_PROFILE_SLOW_MS", "100"))
+QUERY_PROFILE_REPEAT = int(os.getenv("QUERY_PROFILE_REPEAT", "5"))
+QUERY_PROFILE_EXPLAIN_SAMPLE = float(os.getenv("QUERY_PROFILE_EXPLAIN_SAMPLE", "0.1"))
+QUERY_PROFILE_LOG = os.getenv("QUERY_PROFILE_LOG", "")
+
+# On-demand CPU profiles of live workers (app/profiling.py): an X-Profile header
+# from a trusted IP or staff token, or SIGUSR2 to a worker.
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/notes-profiles")
+PROFILE_TRUSTED_IPS = [
+    ip.strip() for ip in os.getenv("PROFILE_TRUSTED_IPS", "127.0.0.1").split(",") if ip.strip()
+]
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sample")
+PROFILE_REQUESTS = int(os.getenv("PROFILE_REQUESTS", "100"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_SIGNAL_MODE = os.getenv("PROFILE_SIGNAL_MODE", "sample")
+PROFILE_SIGNAL_SECONDS = float(os.getenv("PROFILE_SIGNAL_SECONDS", "30"))
+
 CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL_ORIGINS", "True").lower() == "true"
 
 
@@ -132,6 +275,10 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_CREDENTIALS = False  # no cookies needed for pure JWT
 
+# Conditional requests on notes (ETag / If-Match) from the SPA
+CORS_ALLOW_HEADERS = (*default_headers, "if-match", "if-none-match", "if-modified-since")
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "Server-Timing"]
+
 ALLOWED_HOSTS = ["localhost", "127.0.0.1", "*"]  # '*' ok for dev
 
 DB_NAME = os.getenv("POSTGRES_DB", "notesdb")
@@ -140,11 +287,14 @@ DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "notespass")
 DB_HOST = os.getenv("POSTGRES_HOST", "localhost")
 DB_PORT = os.getenv("POSTGRES_PORT", "5432")
 
-print(f"DB_NAME: {DB_NAME}")
-print(f"DB_USER: {DB_USER}")
-print(f"DEFAULT DATABASE: {os.getenv('DEFAULT_DB')}")
+# Connection reuse. Each gthread thread keeps its own connection for
+# DB_CONN_MAX_AGE seconds (0 = close after every request, "none" = forever);
+# health checks catch connections the server dropped while idle.
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "60")
+DB_CONN_MAX_AGE = None if DB_CONN_MAX_AGE.lower() == "none" else int(DB_CONN_MAX_AGE)
+DB_CONN_HEALTH_CHECKS = os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True"
+
 if os.getenv("DEFAULT_DB") == "postgres":
-    print("Using PostgreSQL database")
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.postgresql",
@@ -153,19 +303,20 @@ if os.getenv("DEFAULT_DB") == "postgres":
             "PASSWORD": DB_PASSWORD,
             "HOST": DB_HOST,
             "PORT": DB_PORT,
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
         },
     }
 else:
-    print("Using SQLite database")
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
         }
     }
 
-print("DATABASES:", DATABASES)
-
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -0,0 +1,158 @@
+"""
+Request throttling (DRF) and admission control (middleware).
+
+Throttles are token buckets in the shared table of ``app/ratelimit.py``, keyed by
+scope and by user id, or by client IP for anonymous requests:
+
+- ``read``: safe methods on the API,
+- ``write``: everything else,
+- ``auth``: ``/api/auth/token/``, per IP, since each call costs a password hash.
+
+Rates come from ``REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"]`` in DRF's
+``<requests>/<period>`` format, with the number of requests doubling as the
+burst size. A throttled request gets 429 with ``Retry-After``.
+
+``AdmissionControlMiddleware`` sheds load before it can pile up to gunicorn's
+hard timeout. It answers 503 with ``Retry-After``:
+
+- when ``ADMISSION_MAX_IN_FLIGHT`` requests are already in flight across all
+  workers of the host,
+- when the request waited longer than ``ADMISSION_MAX_QUEUE_SECONDS`` between
+  the reverse proxy (``X-Request-Start``) and Django. Its client has likely
+  given up, and serving it would only delay the ones behind it.
+"""
+
+import math
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import ratelimit
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """``"600/min"`` -> (capacity 600, refill 10 tokens per second); None -> None."""
+    if rate is None:
+        return None
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class: one bucket per ``get_scope()`` and ``get_key()``."""
+
+    scope = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_key(self, request, view):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if rate is None:
+            return True
+        capacity, per_second = rate
+        allowed, self.wait_seconds = ratelimit.buckets().take(
+            f"{scope}:{self.get_key(request, view)}", capacity, per_second
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ReadWriteThrottle(TokenBucketThrottle):
+    """Default for API views: ``read`` for safe methods, ``write`` otherwise."""
+
+    def get_scope(self, request, view):
+        return "read" if request.method in ("GET", "HEAD", "OPTIONS") else "write"
+
+
+class AuthTokenThrottle(TokenBucketThrottle):
+    """Token obtain: per client IP, whoever the credentials claim to be."""
+
+    scope = "auth"
+
+    def get_key(self, request, view):
+        return f"ip:{self.get_ident(request)}"
+
+
+def request_start(value):
+    """Epoch seconds from an ``X-Request-Start`` header (s, ms or µs, optional ``t=``)."""
+    try:
+        start = float(value.removeprefix("t="))
+    except (AttributeError, ValueError):
+        return None
+    if start > 1e14:
+        return start / 1e6
+    if start > 1e11:
+        return start / 1e3
+    return start
+
+
+def overloaded(detail, retry_after):
+    response = JsonResponse({"detail": detail}, status=503)
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+@sync_and_async_middleware
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        refusal, in_flight = self.admit(request)
+        if refusal is not None:
+            return refusal
+        try:
+            return self.get_response(request)
+        finally:
+            if in_flight is not None:
+                in_flight.exit()
+
+    async def __acall__(self, request):
+        refusal, in_flight = self.admit(request)
+        if refusal is not None:
+            return refusal
+        try:
+            return await self.get_response(request)
+        finally:
+            if in_flight is not None:
+                in_flight.exit()
+
+    def admit(self, request):
+        """``(503 response, None)``, or ``(None, in_flight)`` to exit once served."""
+        if request.path.startswith(tuple(getattr(settings, "ADMISSION_EXEMPT_PATHS", ()))):
+            return None, None
+
+        retry_after = getattr(settings, "ADMISSION_RETRY_AFTER", 1)
+        max_queue = getattr(settings, "ADMISSION_MAX_QUEUE_SECONDS", 0)
+        if max_queue:
+            start = request_start(request.headers.get("X-Request-Start"))
+            if start is not None and time.time() - start > max_queue:
+                return overloaded("Request queued too long; try again.", retry_after), None
+
+        in_flight = ratelimit.in_flight()
+        if not in_flight.enter(getattr(settings, "ADMISSION_MAX_IN_FLIGHT", 0)):
+            return overloaded("Server is at capacity; try again.", retry_after), None
+        return None, in_flight
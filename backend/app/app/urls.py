@@ -2,12 +2,21 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from .health import HealthView
+from .health import HealthView, LiveView, ReadyView
+from .metrics import metrics_view
+from .throttling import AuthTokenThrottle
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("notes.urls")),
-    path("api/auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
+    path(
+        "api/auth/token/",
+        TokenObtainPairView.as_view(throttle_classes=[AuthTokenThrottle]),
+        name="token_obtain_pair",
+    ),
     path("api/auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path("api/health/", HealthView.as_view(), name="health"),
+    path("api/health/live/", LiveView.as_view(), name="health-live"),
+    path("api/health/ready/", ReadyView.as_view(), name="health-ready"),
+    path("api/metrics/", metrics_view, name="metrics"),
 ]
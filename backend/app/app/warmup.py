@@ -0,0 +1,140 @@
+"""
+Process warmup and memory reporting for gunicorn.
+
+``warmup()`` builds everything Django, DRF and simplejwt otherwise create
+lazily on a worker's first request: URL resolvers, DRF's imported settings
+classes, serializer fields, the JWT signing backend and compiled admin and
+browsable-API templates. With ``preload_app`` gunicorn runs it in the master
+before forking and then calls ``gc.freeze()``, so every worker starts warm and
+shares those pages copy-on-write instead of each building (and later, through
+the garbage collector touching refcounts, copying) its own. It never touches
+the database: connections must not be inherited across fork.
+
+``memory_usage()`` reads RSS/PSS from ``/proc``; gunicorn logs it when a worker
+is ready and ``/api/health/?checks=1`` reports it for the answering worker.
+"""
+
+import time
+
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+# Resolved at warmup: the hot API routes and the admin login.
+URL_NAMES = ["note-list", "health", "token_obtain_pair", "admin:login"]
+TEMPLATES = [
+    "admin/login.html",
+    "admin/index.html",
+    "admin/change_list.html",
+    "admin/change_form.html",
+    "rest_framework/api.html",
+]
+DRF_IMPORT_SETTINGS = [
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS",
+    "DEFAULT_METADATA_CLASS",
+    "DEFAULT_PAGINATION_CLASS",
+    "DEFAULT_THROTTLE_CLASSES",
+    "DEFAULT_VERSIONING_CLASS",
+    "EXCEPTION_HANDLER",
+]
+
+
+def _urls():
+    resolver = get_resolver()
+    resolver.url_patterns  # noqa: B018 - imports every urls module
+    for name in URL_NAMES:
+        reverse(name)
+    resolver.resolve("/api/notes/")
+
+
+def _drf():
+    from rest_framework.settings import api_settings
+
+    for name in DRF_IMPORT_SETTINGS:
+        getattr(api_settings, name)
+    for renderer in api_settings.DEFAULT_RENDERER_CLASSES:
+        renderer()
+
+
+def _serializers():
+    from notes.serializers import (
+        NoteBulkSerializer,
+        NoteListSerializer,
+        NoteRowSerializer,
+        NoteSerializer,
+    )
+
+    for serializer in (NoteSerializer, NoteListSerializer):
+        serializer().fields  # noqa: B018 - builds the model field mapping
+        serializer(many=True).child.fields  # noqa: B018
+    NoteBulkSerializer().fields  # noqa: B018
+    NoteRowSerializer(NoteListSerializer.Meta.fields)
+
+
+def _jwt():
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from app.authentication import StatelessJWTAuthentication
+
+    auth = StatelessJWTAuthentication()
+    # Sign and verify once: loads PyJWT's algorithms and simplejwt's settings.
+    token = AccessToken()
+    token["user_id"] = 0
+    auth.get_validated_token(str(token).encode())
+
+
+def _templates():
+    for name in TEMPLATES:
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            pass
+
+
+STEPS = [
+    ("urls", _urls),
+    ("drf", _drf),
+    ("serializers", _serializers),
+    ("jwt", _jwt),
+    ("templates", _templates),
+]
+
+
+def warmup():
+    """Run every warmup step; returns ``{step: milliseconds}``."""
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    # Nothing above should connect, but a forked worker must never share a socket.
+    connections.close_all()
+    return timings
+
+
+def memory_usage(pid="self"):
+    """RSS, PSS and shared/private sizes in MiB from ``/proc``; {} where unavailable."""
+    fields = {
+        "Rss": "rss_mb",
+        "Pss": "pss_mb",
+        "Shared_Clean": "shared_mb",
+        "Shared_Dirty": "shared_mb",
+        "Private_Clean": "private_mb",
+        "Private_Dirty": "private_mb",
+    }
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as smaps:
+            for line in smaps:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    kib = int(value.split()[0])
+                    usage[fields[key]] = usage.get(fields[key], 0) + kib
+    except (OSError, ValueError):
+        return {}
+    return {key: round(kib / 1024, 1) for key, kib in usage.items()}
@@ -1,11 +1,26 @@
 from django.contrib import admin
 
-from .models import Note
+from .models import ArchivedNote, Note
+from .search import search_notes
 
 
 @admin.register(Note)
 class NoteAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "status", "created_at", "updated_at")
+    list_display = ("id", "title", "owner", "status", "created_at", "updated_at")
+    list_select_related = ("owner",)
     list_filter = ("status", "created_at", "updated_at")
     search_fields = ("title", "content")
     ordering = ("-updated_at",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans over title/content.
+        if not search_term:
+            return queryset, False
+        return search_notes(queryset, search_term), False
+
+
+@admin.register(ArchivedNote)
+class ArchivedNoteAdmin(admin.ModelAdmin):
+    list_display = ("note_id", "title", "owner", "updated_at", "archived_at")
+    list_select_related = ("owner",)
+    ordering = ("-archived_at",)
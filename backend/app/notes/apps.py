@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "notes"
+
+    def ready(self):
+        # Connect the auth state-cache invalidation receivers at startup, before any
+        # request has imported the authentication backend.
+        from app import authentication  # noqa: F401
+
+        # Note change events for /api/async/notes/events/.
+        # List cache invalidation on every note save/delete.
+        from . import (
+            cache,  # noqa: F401
+            events,  # noqa: F401
+        )
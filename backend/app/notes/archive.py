@@ -0,0 +1,91 @@
+"""
+Hot/cold separation of archived notes.
+
+``archive_notes()`` (``manage.py archive_notes``, e.g. nightly) moves notes that
+have been ARCHIVED, and untouched, for ``NOTES_ARCHIVE_AFTER_DAYS`` from
+notes_note to the ``ArchivedNote`` table, in batches of one transaction each.
+The delete goes through the usual triggers and signals: counters drop, sync
+clients get tombstones and event subscribers a "deleted" event.
+
+``restore_notes()`` moves notes back on demand under their original ids, still
+ARCHIVED but with a fresh ``updated_at``, so sync clients see them as changed.
+Their tombstones are removed: a client that synced neither the move nor the
+restore must not apply the old deletion after the upsert.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .cache import bump_generation
+from .events import publish
+from .models import ArchivedNote, Note, NoteDeletion
+
+# Note columns carried over to cold storage and back.
+COLUMNS = ["owner_id", "title", "content", "created_at", "updated_at"]
+
+
+def archive_notes(days=None, batch_size=1000):
+    """Move notes archived more than ``days`` ago to cold storage; returns the count."""
+    if days is None:
+        days = getattr(settings, "NOTES_ARCHIVE_AFTER_DAYS", 90)
+    cutoff = timezone.now() - timedelta(days=days)
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Note.objects.filter(status=Note.Status.ARCHIVED, updated_at__lt=cutoff)
+                .order_by("id")
+                .select_for_update()
+                .values("id", *COLUMNS)[:batch_size]
+            )
+            if not rows:
+                return moved
+            ids = [row.pop("id") for row in rows]
+            ArchivedNote.objects.bulk_create(
+                ArchivedNote(note_id=pk, **row) for pk, row in zip(ids, rows)
+            )
+            Note.objects.filter(id__in=ids).delete()
+        for owner_id in {row["owner_id"] for row in rows}:
+            bump_generation(owner_id)
+        moved += len(rows)
+
+
+def restore_notes(owner_id, ids):
+    """Move ``owner_id``'s notes ``ids`` back from cold storage; returns the restored notes."""
+    with transaction.atomic():
+        cold = list(
+            ArchivedNote.objects.select_for_update().filter(owner_id=owner_id, note_id__in=ids)
+        )
+        if not cold:
+            return []
+        notes = Note.objects.bulk_create(
+            Note(
+                id=row.note_id,
+                owner_id=owner_id,
+                title=row.title,
+                content=row.content,
+                status=Note.Status.ARCHIVED,
+            )
+            for row in cold
+        )
+        # auto_now_add stamped the restore time; put the original creation back.
+        Note.objects.filter(id__in=[row.note_id for row in cold]).update(
+            created_at=Case(
+                *(When(id=row.note_id, then=Value(row.created_at)) for row in cold),
+                output_field=DateTimeField(),
+            )
+        )
+        for note, row in zip(notes, cold):
+            note.created_at = row.created_at
+        NoteDeletion.objects.filter(
+            owner_id=owner_id, note_id__in=[row.note_id for row in cold]
+        ).delete()
+        ArchivedNote.objects.filter(id__in=[row.id for row in cold]).delete()
+        # bulk_create sends no post_save.
+        publish(owner_id, "changed", [note.pk for note in notes])
+    bump_generation(owner_id)
+    return notes
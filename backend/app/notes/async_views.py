@@ -0,0 +1,362 @@
+"""
+Async notes endpoints for ASGI deployments (``GUNICORN_WORKER_CLASS=uvicorn``).
+
+``/api/async/notes/`` and ``/api/async/notes/<id>/`` mirror the list, detail and
+CRUD behaviour of ``NoteViewSet`` on Django's async ORM, so a request waiting on
+the database yields the event loop instead of pinning a worker thread. DRF's
+request cycle is synchronous, so these are plain Django views that reuse the
+same serializers, validators and cursor format; only Bearer tokens are accepted.
+
+The list is the compact representation of active notes, filterable by ``?status=``
+and ``?include_archived=``; its cursors only page forwards (``previous`` is
+always null).
+
+``/api/async/notes/events/`` pushes the caller's change events (notes/events.py)
+as Server-Sent Events, or answers one long-poll with ``Accept: application/json``.
+Either way an idle client holds a coroutine, not a thread, which is why it is
+only served on ASGI.
+"""
+
+import asyncio
+import functools
+import json
+import time
+
+from app.authentication import (
+    STREAM_UNTIL_CLAIM,
+    StatelessJWTAuthentication,
+    StreamTicket,
+    StreamTicketAuthentication,
+)
+from app.throttling import ReadWriteThrottle
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models.signals import post_save
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.utils.urls import replace_query_param
+
+from .conditional import (
+    PreconditionFailed,
+    check_if_match,
+    not_modified,
+    note_etag,
+    validator_headers,
+)
+from .events import RESYNC, get_broker
+from .models import Note
+from .pagination import (
+    NoteCursorPagination,
+    after_position,
+    decode_forward_cursor,
+    encode_forward_cursor,
+    note_position,
+)
+from .renderers import dumps
+from .serializers import NoteListSerializer, NoteRowSerializer, NoteSerializer
+from .views import filter_by_status, include_archived
+
+authenticator = StatelessJWTAuthentication()
+stream_authenticator = StreamTicketAuthentication()
+list_rows = NoteRowSerializer(NoteListSerializer.Meta.fields)
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        dumps(data), status=status, headers=headers, content_type="application/json"
+    )
+
+
+def error_response(request, exc):
+    """Same status and body DRF's exception handler would produce."""
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers["WWW-Authenticate"] = authenticator.authenticate_header(request)
+    if isinstance(exc, exceptions.MethodNotAllowed):
+        headers["Allow"] = ", ".join(request.allowed_methods)
+    if getattr(exc, "wait", None):
+        headers["Retry-After"] = str(exc.wait)
+    return json_response(detail, status=exc.status_code, headers=headers)
+
+
+class StreamingUnavailable(exceptions.APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Event streams need the ASGI server (GUNICORN_WORKER_CLASS=uvicorn)."
+    default_code = "streaming_unavailable"
+
+
+def async_api_view(methods, authenticator=authenticator):
+    """Authenticate and throttle like DRF, and turn DRF exceptions into JSON responses."""
+
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request.allowed_methods = methods
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                auth = await authenticator.aauthenticate(request)
+                if auth is None:
+                    raise exceptions.NotAuthenticated()
+                request.user, request.auth = auth
+                throttle = ReadWriteThrottle()
+                if not throttle.allow_request(request, None):
+                    raise exceptions.Throttled(throttle.wait())
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(request, exc)
+
+        return wrapper
+
+    return decorator
+
+
+def request_data(request):
+    try:
+        return json.loads(request.body or b"{}")
+    except ValueError as exc:
+        raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+
+def page_size(request):
+    try:
+        size = int(request.GET[NoteCursorPagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return NoteCursorPagination.page_size
+    if size <= 0:
+        return NoteCursorPagination.page_size
+    return min(size, NoteCursorPagination.max_page_size)
+
+
+def user_notes(user):
+    return Note.objects.filter(owner_id=user.pk)
+
+
+async def get_note(user, pk):
+    try:
+        return await user_notes(user).aget(pk=pk)
+    except Note.DoesNotExist:
+        raise exceptions.NotFound("No Note matches the given query.")
+
+
+def note_response(request, note, status=status.HTTP_200_OK):
+    data = NoteSerializer(note, context={"request": request}).data
+    return json_response(data, status=status, headers={"ETag": note_etag(note)})
+
+
+@async_api_view(["GET", "POST"])
+async def note_list(request):
+    if request.method == "POST":
+        return await create_note(request)
+
+    queryset = filter_by_status(
+        user_notes(request.user), request.GET.get("status"), include_archived(request.GET)
+    )
+    cursor = request.GET.get(NoteCursorPagination.cursor_query_param)
+    if cursor:
+        queryset = after_position(queryset, decode_forward_cursor(cursor))
+
+    size = page_size(request)
+    queryset = queryset.order_by("-updated_at", "-id").values(*list_rows.value_columns)
+    rows = [row async for row in queryset[: size + 1]]
+
+    next_url = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_url = replace_query_param(
+            request.build_absolute_uri(),
+            NoteCursorPagination.cursor_query_param,
+            encode_forward_cursor(note_position(rows[-1])),
+        )
+    return json_response(
+        {"next": next_url, "previous": None, "results": list_rows.to_representation(rows)}
+    )
+
+
+async def create_note(request):
+    serializer = NoteSerializer(data=request_data(request), context={"request": request})
+    serializer.is_valid(raise_exception=True)
+    note = await Note.objects.acreate(owner_id=request.user.pk, **serializer.validated_data)
+    return note_response(request, note, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(["GET", "PUT", "PATCH", "DELETE"])
+async def note_detail(request, pk):
+    note = await get_note(request.user, pk)
+
+    if request.method == "GET":
+        etag = note_etag(note)
+        if not_modified(request, etag, note.updated_at):
+            return HttpResponse(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers=validator_headers(etag, note.updated_at),
+            )
+        return note_response(request, note)
+
+    check_if_match(request, note)
+    # The check read the row without a lock; with If-Match the write only
+    # applies to the version it checked, or answers 412.
+    conditional = bool(request.headers.get("If-Match"))
+    version = Note.objects.filter(pk=note.pk, updated_at=note.updated_at)
+    if request.method == "DELETE":
+        if conditional:
+            deleted, _ = await version.adelete()
+            if not deleted:
+                raise PreconditionFailed()
+        else:
+            await note.adelete()
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+    serializer = NoteSerializer(
+        note,
+        data=request_data(request),
+        partial=request.method == "PATCH",
+        context={"request": request},
+    )
+    serializer.is_valid(raise_exception=True)
+    changes = serializer.validated_data
+    for attr, value in changes.items():
+        setattr(note, attr, value)
+    if conditional:
+        note.updated_at = timezone.now()
+        if not await version.aupdate(**changes, updated_at=note.updated_at):
+            raise PreconditionFailed()
+        # update() skips post_save, which invalidates the list cache and publishes.
+        await post_save.asend(sender=Note, instance=note, created=False, raw=False)
+    else:
+        await note.asave()
+    return note_response(request, note)
+
+
+# Reconnect delay suggested to EventSource, in milliseconds.
+RETRY_MS = 3000
+
+
+def sse_message(event):
+    lines = [f"id: {event['event_id']}"] if "event_id" in event else []
+    lines += [f"event: {event['type']}", f"data: {dumps(event).decode()}"]
+    return "\n".join(lines) + "\n\n"
+
+
+class EventFeed:
+    """A subscription plus the buffered events the client missed, without repeats."""
+
+    def __init__(self, request):
+        self.broker = get_broker()
+        self.sub = self.broker.subscribe(request.user.pk)
+        after = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        self.last_id = int(after) if after and after.isdigit() else 0
+        self.pending = []
+        if after:
+            missed = self.broker.replay(request.user.pk, after)
+            self.pending = [RESYNC] if missed is None else missed
+        self._mark(self.pending)
+
+    def _mark(self, events):
+        for event in events:
+            self.last_id = max(self.last_id, int(event.get("event_id", 0)))
+
+    def _fresh(self, event):
+        if "event_id" in event and int(event["event_id"]) <= self.last_id:
+            return False  # already replayed
+        self._mark([event])
+        return True
+
+    async def next(self, timeout):
+        """The next event, or None after ``timeout`` seconds without one."""
+        while not self.pending:
+            try:
+                event = await self.sub.get(timeout)
+            except TimeoutError:
+                return None
+            if self._fresh(event):
+                return event
+        return self.pending.pop(0)
+
+    def drain(self):
+        """Every event already waiting, without blocking."""
+        events, self.pending = self.pending, []
+        while not self.sub.queue.empty():
+            event = self.sub.queue.get_nowait()
+            if self._fresh(event):
+                events.append(event)
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self.sub)
+
+
+class EventStream:
+    """SSE body; ``close()`` (called by Django after the response) drops the subscription."""
+
+    def __init__(self, feed, seconds):
+        self.feed = feed
+        self.seconds = seconds
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.seconds
+        heartbeat = getattr(settings, "NOTES_EVENTS_HEARTBEAT_SECONDS", 15)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while (left := deadline - loop.time()) > 0:
+                event = await self.feed.next(min(heartbeat, left))
+                # A comment line keeps proxies from timing out an idle stream.
+                yield ": ping\n\n" if event is None else sse_message(event)
+        finally:
+            self.feed.close()
+
+    def close(self):
+        self.feed.close()
+
+
+@async_api_view(["GET"], authenticator=stream_authenticator)
+async def note_events(request):
+    """
+    The caller's note change events: ``changed``/``deleted`` with note ids, or
+    ``resync`` when some may have been missed. Clients pull
+    ``/api/notes/changes/`` on each one.
+
+    ``Accept: text/event-stream`` (EventSource) gets a stream that ends at token
+    expiry or after ``NOTES_EVENTS_STREAM_SECONDS``; reconnecting with
+    ``Last-Event-ID`` replays what was missed. Anything else is a long-poll
+    answered with ``{"events": [...], "last_event_id"}`` on the first event or
+    after ``?timeout=`` seconds (at most ``NOTES_EVENTS_POLL_SECONDS``); pass
+    ``?last_event_id=`` back on the next poll. Without an Authorization header,
+    ``?ticket=`` carries a ticket from ``POST /api/notes/events/ticket/``.
+    """
+    if not isinstance(request, ASGIRequest):
+        raise StreamingUnavailable()
+
+    feed = EventFeed(request)
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        seconds = getattr(settings, "NOTES_EVENTS_STREAM_SECONDS", 300)
+        if isinstance(request.auth, StreamTicket):
+            expires = request.auth.get(STREAM_UNTIL_CLAIM)
+        else:
+            expires = request.auth.get("exp")
+        if expires:
+            seconds = min(seconds, expires - time.time())
+        response = StreamingHttpResponse(
+            EventStream(feed, seconds), content_type="text/event-stream"
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+        return response
+
+    limit = getattr(settings, "NOTES_EVENTS_POLL_SECONDS", 25)
+    try:
+        timeout = min(max(float(request.GET.get("timeout", limit)), 0), limit)
+    except ValueError:
+        raise exceptions.ValidationError({"timeout": "Expected a number of seconds."})
+    try:
+        event = await feed.next(timeout)
+        events = [] if event is None else [event, *feed.drain()]
+    finally:
+        feed.close()
+    last_id = str(feed.last_id) if feed.last_id else None
+    return json_response({"events": events, "last_event_id": last_id})
@@ -0,0 +1,148 @@
+"""
+Helpers shared by the ``compare_workers`` and ``bench_api`` management commands:
+a throwaway gunicorn server on the configured database and a small threaded
+HTTP load generator.
+"""
+
+import contextlib
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.test import override_settings
+
+# Load tests measure the server, not its throttles and admission limits.
+UNTHROTTLED_ENV = {
+    "THROTTLE_READ_RATE": "",
+    "THROTTLE_WRITE_RATE": "",
+    "THROTTLE_AUTH_RATE": "",
+    "ADMISSION_MAX_IN_FLIGHT": "0",
+}
+
+
+def unthrottled():
+    """``UNTHROTTLED_ENV`` for in-process requests (the Django test client)."""
+    return override_settings(
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}},
+        ADMISSION_MAX_IN_FLIGHT=0,
+    )
+
+
+@contextlib.contextmanager
+def gunicorn_server(worker_class="gthread", port=8765, workers=1, threads=2, env=None):
+    """Run ``gunicorn.conf.py`` on 127.0.0.1:<port> until the block exits."""
+    app = "asgi" if worker_class == "uvicorn" else "wsgi"
+    env = {
+        **os.environ,
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_THREADS": str(threads),
+        "GUNICORN_WORKER_CLASS": worker_class,
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "GUNICORN_APP": f"notes.management.commands._loadtest_app:{app}",
+        "GUNICORN_LOGLEVEL": "warning",
+        "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "app.settings"),
+        **UNTHROTTLED_ENV,
+        **(env or {}),
+    }
+    conf = settings.BASE_DIR.parent / "gunicorn.conf.py"
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--config",
+        str(conf),
+        "--access-logfile",
+        os.devnull,
+    ]
+    with tempfile.TemporaryFile() as log:
+        proc = subprocess.Popen(
+            command, cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        try:
+            _wait_ready(proc, port, log)
+            yield
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+
+def _wait_ready(proc, port, log, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            raise CommandError(f"gunicorn exited:\n{log.read().decode()[-2000:]}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health/", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"gunicorn did not answer on port {port} within {timeout}s")
+
+
+def run_clients(port, clients, next_request):
+    """
+    Drive the server from ``clients`` keep-alive connections.
+
+    ``next_request()`` is called from every client thread and returns
+    ``(method, path, body_bytes, headers)``, or None once there is nothing left.
+    Returns (latencies of 2xx/3xx responses, error count, wall seconds).
+    """
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        latencies, errors = [], 0
+        while True:
+            with lock:
+                spec = next_request()
+            if spec is None:
+                break
+            method, path, body, headers = spec
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                ok = resp.status < 400
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        conn.close()
+        return latencies, errors
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(lambda _: client(), range(clients)))
+    wall = time.monotonic() - started
+    return [t for lat, _ in results for t in lat], sum(err for _, err in results), wall
+
+
+def summarize(latencies, wall, errors=0):
+    """Latency percentiles (ms), mean and throughput for one scenario."""
+    latencies = sorted(latencies)
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    cuts = cuts or [0.0] * 99
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+    }
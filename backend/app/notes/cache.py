@@ -0,0 +1,198 @@
+"""
+Per-user response cache for the notes list.
+
+Cached payloads are keyed by user, by that user's "notes generation" and by the
+list's ETag, which the view computes from the database on every request and
+which covers the full request URI. A payload is therefore only ever served with
+the ETag it was built for, whichever worker or code path changed the notes. Any
+save or delete of a note (``post_save``/``post_delete``, so the admin and user
+cascades too) bumps the generation; writes that send no signals
+(``bulk_create``, ``update()``) bump it themselves. Older payloads can never be
+looked up again and simply age out of the backend.
+
+Generations live in a Django cache alias (``NOTES_LIST_CACHE["ALIAS"]``). Only a
+cross-process backend (the "shared" alias with ``SHARED_CACHE_REDIS_URL`` set)
+makes them common to all workers; on its per-process fallback each worker keeps
+its own, so a write served by one worker leaves the others' payloads to expire.
+That costs memory, not correctness: the ETag in the key still changes with the
+data. Payloads live in a pluggable backend:
+
+- ``locmem`` (default): bounded, per-process LRU
+- ``django``: the same Django cache alias (per process unless it is Redis)
+- ``none``: caching disabled
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+
+DEFAULTS = {
+    "BACKEND": "locmem",
+    "ALIAS": "default",
+    "MAX_ENTRIES": 2048,
+    "TIMEOUT": 300,
+}
+
+
+class LocMemLRUBackend:
+    """Thread-safe LRU with a hard size bound and per-entry expiry."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCacheBackend:
+    """Stores payloads in a Django cache alias (memcached, redis, file...)."""
+
+    def __init__(self, alias, timeout):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+    def __len__(self):
+        return -1  # unknown for remote caches
+
+
+class NotesListCache:
+    def __init__(self, backend, alias):
+        self.backend = backend
+        self.generations = caches[alias]
+        # Request threads (gthread) count concurrently.
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _generation_key(self, user_id):
+        return f"notes:gen:{user_id}"
+
+    def generation(self, user_id):
+        key = self._generation_key(user_id)
+        gen = self.generations.get(key)
+        if gen is None:
+            # Seed with a fresh, never-reused value so an evicted counter can't
+            # resurrect payloads cached under an earlier generation.
+            self.generations.add(key, time.time_ns(), None)
+            gen = self.generations.get(key)
+        return gen
+
+    def bump(self, user_id):
+        self.generations.set(self._generation_key(user_id), time.time_ns(), None)
+
+    def key_for(self, user_id, etag):
+        return f"notes:list:{user_id}:{self.generation(user_id)}:{etag}"
+
+    def get(self, key):
+        value = self.backend.get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def clear(self):
+        self.backend.clear()
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "max_entries": getattr(self.backend, "max_entries", None),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_list_cache():
+    """Return the process-wide notes list cache, or None when disabled."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                conf = {**DEFAULTS, **getattr(settings, "NOTES_LIST_CACHE", {})}
+                kind = conf["BACKEND"]
+                if kind == "none":
+                    return None
+                if kind == "django":
+                    backend = DjangoCacheBackend(conf["ALIAS"], conf["TIMEOUT"])
+                else:
+                    backend = LocMemLRUBackend(conf["MAX_ENTRIES"], conf["TIMEOUT"])
+                _cache = NotesListCache(backend, conf["ALIAS"])
+    return _cache
+
+
+def bump_generation(user_id):
+    cache = get_list_cache()
+    if cache is not None:
+        cache.bump(user_id)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def _note_changed(sender, instance, **kwargs):
+    bump_generation(instance.owner_id)
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _cache
+    if setting in {"NOTES_LIST_CACHE", "CACHES"}:
+        _cache = None
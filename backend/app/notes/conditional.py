@@ -0,0 +1,80 @@
+"""
+Validators for conditional requests on notes (ETag / Last-Modified).
+
+The list validator is derived from one aggregate over the user's notes:
+(count, max(updated_at), max(id)) changes on every create, update and delete.
+The detail validator comes from the row's own ``updated_at``.
+"""
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The note was modified since you last fetched it."
+    default_code = "precondition_failed"
+
+
+def _etag(*parts):
+    raw = ":".join(str(p) for p in parts)
+    return quote_etag(hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest())
+
+
+def list_validators(queryset, user_id, uri):
+    """Return (etag, last_modified) for a list response, using one aggregate query."""
+    agg = queryset.order_by().aggregate(
+        count=Count("id"), last_updated=Max("updated_at"), last_id=Max("id")
+    )
+    last_updated = agg["last_updated"]
+    etag = _etag(
+        user_id,
+        agg["count"],
+        last_updated.isoformat() if last_updated else "",
+        agg["last_id"],
+        uri,
+    )
+    return etag, last_updated
+
+
+def note_etag(note):
+    return _etag(note.pk, note.updated_at.isoformat())
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if "*" in etags:
+        return True
+    # Weak comparison: treat W/"x" and "x" as the same validator.
+    return etag in {e.removeprefix("W/") for e in etags}
+
+
+def not_modified(request, etag, last_modified):
+    """True if the client's cached copy is still current (RFC 9110 13.2.2)."""
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    ims = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+    if ims is not None and last_modified is not None:
+        return int(last_modified.timestamp()) <= ims
+    return False
+
+
+def check_if_match(request, note):
+    """Raise 412 if an If-Match header is present and names another version."""
+    if_match = request.headers.get("If-Match")
+    if if_match and not etag_matches(if_match, note_etag(note)):
+        raise PreconditionFailed()
+
+
+def validator_headers(etag, last_modified):
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return headers
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Note, NoteStatusCounter
+
+
+def status_counts(owner_id):
+    """Return ``{status: count}`` for every status, from the counter table."""
+    counts = dict.fromkeys(Note.Status.values, 0)
+    counts.update(
+        NoteStatusCounter.objects.filter(owner_id=owner_id).values_list("status", "count")
+    )
+    return counts
+
+
+@transaction.atomic
+def rebuild_counters(owner_ids=None):
+    """Recompute counters from notes_note; returns the number of counter rows written."""
+    notes = Note.objects.order_by()
+    counters = NoteStatusCounter.objects.all()
+    if owner_ids is not None:
+        notes = notes.filter(owner_id__in=owner_ids)
+        counters = counters.filter(owner_id__in=owner_ids)
+
+    counters.delete()
+    rows = [
+        NoteStatusCounter(owner_id=row["owner_id"], status=row["status"], count=row["n"])
+        for row in notes.values("owner_id", "status").annotate(n=Count("id"))
+    ]
+    NoteStatusCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,277 @@
+"""
+Per-user note change notifications for the ``/api/async/notes/events/`` stream.
+
+``post_save``/``post_delete`` on ``Note`` publish ``{"type": "changed"|"deleted",
+"ids": [...]}`` for the note's owner once the write commits. Events are hints:
+clients react by pulling ``/api/notes/changes/``, so a lost or repeated event
+costs at most one extra sync. ``bulk_create``/``bulk_update``/``update()`` send
+no signals; code using them calls ``publish`` itself (see the bulk endpoint).
+
+Brokers (``NOTES_EVENTS_BROKER``, default ``auto``):
+
+- ``local``: subscribers in this process only. Enough for a single worker, and
+  what SQLite deployments get.
+- ``postgres`` (``auto`` on PostgreSQL): a transaction's events are collected
+  per owner and sent through ``pg_notify`` in one statement once it commits,
+  never for a rollback. Each process runs one ``LISTEN`` thread on its own
+  connection and hands notifications to its local subscribers, whichever worker
+  did the write. An event with more ids than fit in one notification is sent as
+  several.
+
+Every event carries an id (publish time in ns) and the broker keeps the last
+``BUFFER_SIZE`` events so a reconnecting client can resume after
+``Last-Event-ID``. When the buffer cannot vouch for the gap the client is told
+to resync instead.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Note
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "notes_events"
+BUFFER_SIZE = 1000
+QUEUE_SIZE = 100
+# pg_notify rejects payloads of 8000 bytes or more; this many ids of up to 20
+# characters each stay well under it.
+NOTIFY_MAX_IDS = 300
+# Sent when events may have been missed: the client should sync.
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """Events for one owner, delivered to an asyncio queue on the subscriber's loop."""
+
+    def __init__(self, owner_id):
+        self.owner_id = owner_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def offer(self, event):
+        # Runs on self.loop. A client that falls this far behind just resyncs.
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class LocalBroker:
+    """Fans events out to the subscribers of this process."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._recent = deque(maxlen=BUFFER_SIZE)
+        self._lock = threading.Lock()
+        self.since = time.time_ns()
+
+    def publish(self, owner_id, event):
+        event = {**event, "event_id": str(time.time_ns())}
+        transaction.on_commit(lambda: self.dispatch(owner_id, event))
+
+    def dispatch(self, owner_id, event):
+        """Deliver to this process's subscribers; safe from any thread."""
+        owner_id = str(owner_id)
+        with self._lock:
+            self._recent.append((owner_id, event))
+            subscribers = list(self._subscribers.get(owner_id, ()))
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:  # loop closed under a stale subscription
+                self.unsubscribe(sub)
+
+    def resync_all(self):
+        with self._lock:
+            self._recent.clear()
+            self.since = time.time_ns()
+            subscribers = [s for subs in self._subscribers.values() for s in subs]
+        for sub in subscribers:
+            sub.loop.call_soon_threadsafe(sub.offer, RESYNC)
+
+    def subscribe(self, owner_id):
+        """Must be called on the event loop that will read the subscription."""
+        sub = Subscription(str(owner_id))
+        with self._lock:
+            self._subscribers[sub.owner_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.owner_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.owner_id]
+
+    def replay(self, owner_id, after):
+        """Buffered events for ``owner_id`` after event id ``after``; None if some may be lost."""
+        try:
+            after = int(after)
+        except (TypeError, ValueError):
+            return None
+        owner_id = str(owner_id)
+        with self._lock:
+            if after < self.since or (
+                len(self._recent) == self._recent.maxlen
+                and after < int(self._recent[0][1]["event_id"])
+            ):
+                return None
+            return [e for o, e in self._recent if o == owner_id and int(e["event_id"]) > after]
+
+
+def notify_payloads(owner_id, event, event_id=None):
+    """
+    ``event`` as ``pg_notify`` payloads, its ids split to fit the size limit.
+    Their event ids count up from ``event_id`` (default: now, in ns).
+    """
+    ids = event.get("ids") or []
+    chunks = [ids[i : i + NOTIFY_MAX_IDS] for i in range(0, len(ids), NOTIFY_MAX_IDS)] or [ids]
+    if event_id is None:
+        event_id = time.time_ns()
+    return [
+        json.dumps(
+            {"owner": str(owner_id), **event, "ids": chunk, "event_id": str(event_id + n)},
+            separators=(",", ":"),
+        )
+        for n, chunk in enumerate(chunks)
+    ]
+
+
+class NotifyBatch:
+    """The ids one transaction published, by owner and event type, in first-seen order."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.ids = defaultdict(dict)
+
+    def add(self, owner_id, event):
+        self.ids[owner_id, event["type"]].update(dict.fromkeys(event.get("ids") or []))
+
+    def send(self):
+        payloads = []
+        event_id = time.time_ns()
+        for (owner_id, kind), ids in self.ids.items():
+            chunk = notify_payloads(owner_id, {"type": kind, "ids": list(ids)}, event_id)
+            payloads += chunk
+            event_id += len(chunk)
+        self.broker.notify(payloads)
+
+
+class PostgresBroker(LocalBroker):
+    """``pg_notify`` on commit, one ``LISTEN`` connection per process on read."""
+
+    def __init__(self, alias="default"):
+        super().__init__()
+        self.alias = alias
+        self._listener = None
+        self._local = threading.local()
+
+    def publish(self, owner_id, event):
+        # One batch per transaction: it is pending while its send() is queued on
+        # the connection; commit and rollback both clear that queue.
+        pending = connections[self.alias].run_on_commit
+        batch = getattr(self._local, "batch", None)
+        if batch is not None and any(func == batch.send for _, func, _ in pending):
+            batch.add(owner_id, event)
+            return
+        batch = self._local.batch = NotifyBatch(self)
+        batch.add(owner_id, event)
+        # Runs at once outside a transaction. Events are hints, so a failed send
+        # is logged rather than raised after the write has committed.
+        transaction.on_commit(batch.send, using=self.alias, robust=True)
+
+    def notify(self, payloads):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+                [CHANNEL, payloads],
+            )
+
+    def subscribe(self, owner_id):
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(
+                        target=self._listen, name="notes-events", daemon=True
+                    )
+                    self._listener.start()
+        return super().subscribe(owner_id)
+
+    def _listen(self):
+        wrapper = connections[self.alias]
+        delay = 1
+        while True:
+            conn = None
+            try:
+                conn = wrapper.get_new_connection(wrapper.get_connection_params())
+                conn.autocommit = True
+                conn.execute(f"LISTEN {CHANNEL}")
+                # Anything sent while we were not listening is unknown.
+                self.resync_all()
+                delay = 1
+                for notify in conn.notifies():
+                    event = json.loads(notify.payload)
+                    self.dispatch(event.pop("owner"), event)
+            except Exception:
+                logger.exception("Notes event listener lost its connection; reconnecting")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker chosen by ``NOTES_EVENTS_BROKER``."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                kind = getattr(settings, "NOTES_EVENTS_BROKER", "auto")
+                if kind == "auto":
+                    kind = "postgres" if connection.vendor == "postgresql" else "local"
+                _broker = PostgresBroker() if kind == "postgres" else LocalBroker()
+    return _broker
+
+
+def publish(owner_id, kind, ids):
+    """Announce a change to ``owner_id``'s notes once the current transaction commits."""
+    if ids:
+        get_broker().publish(owner_id, {"type": kind, "ids": list(ids)})
+
+
+@receiver(post_save, sender=Note)
+def _note_saved(sender, instance, **kwargs):
+    publish(instance.owner_id, "changed", [instance.pk])
+
+
+@receiver(post_delete, sender=Note)
+def _note_deleted(sender, instance, **kwargs):
+    publish(instance.owner_id, "deleted", [instance.pk])
+
+
+@receiver(setting_changed)
+def _reset_on_setting_change(setting, **kwargs):
+    global _broker
+    if setting == "NOTES_EVENTS_BROKER":
+        _broker = None
@@ -0,0 +1,38 @@
+"""
+Server entry points for ``manage.py compare_workers``.
+
+``wsgi`` and ``asgi`` are the project's applications, imported lazily so each
+gunicorn run only sets up the one it serves. ``LOADTEST_DB_LATENCY_MS`` adds a
+fixed sleep before every SQL statement, standing in for a database across the
+network.
+"""
+
+import os
+import time
+
+from django.db.backends.signals import connection_created
+
+LATENCY = float(os.getenv("LOADTEST_DB_LATENCY_MS", "0")) / 1000
+
+
+def _delay(execute, sql, params, many, context):
+    time.sleep(LATENCY)
+    return execute(sql, params, many, context)
+
+
+def _install_delay(sender, connection, **kwargs):
+    connection.execute_wrappers.append(_delay)
+
+
+if LATENCY:
+    connection_created.connect(_install_delay, weak=False)
+
+
+def __getattr__(name):
+    if name == "wsgi":
+        from app.wsgi import application
+    elif name == "asgi":
+        from app.asgi import application
+    else:
+        raise AttributeError(name)
+    return application
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from notes.archive import archive_notes
+
+
+class Command(BaseCommand):
+    help = (
+        "Move notes archived longer than NOTES_ARCHIVE_AFTER_DAYS to cold storage "
+        "(ArchivedNote). Users bring them back with POST /api/notes/restore/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Archived for at least (default: the setting)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Notes per transaction")
+
+    def handle(self, *args, **opts):
+        moved = archive_notes(opts["days"], opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} notes to cold storage."))
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import collections
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+
+from app.authentication import NotesTokenObtainPairSerializer
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from notes.benchmark import gunicorn_server, run_clients, summarize, unthrottled
+from notes.models import Note
+
+BENCH_PREFIX = "__bench_api_"
+BENCH_PASSWORD = "bench-api-pass"
+SCENARIOS = ["list", "detail", "create", "update", "delete", "health", "token"]
+UPDATE_STATUSES = ["IN_PROGRESS", "DONE", "OPEN"]
+
+# metric -> which direction is better. Query counts and errors are deterministic,
+# so any increase is a regression regardless of --tolerance.
+METRICS = {"p50_ms": "lower", "p95_ms": "lower", "p99_ms": "lower", "rps": "higher"}
+# p99 over a few hundred requests is mostly noise; gate on it explicitly.
+DEFAULT_GATED = ["p50_ms", "p95_ms", "rps"]
+
+BenchUser = collections.namedtuple("BenchUser", "pk username token note_ids")
+Request = collections.namedtuple("Request", "method path body token")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the notes API (list, detail, create, update, delete, health, token) "
+        "through the Django test client and, with --live, a gunicorn server. Records "
+        "p50/p95/p99 latency, requests/s and SQL queries per request, and fails when "
+        "results regress past --tolerance against the --baseline JSON (write one with "
+        "--save). Needs a migrated database; bench users are removed afterwards. Refuses "
+        "to run with DEBUG=False unless --allow-prod."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5)
+        parser.add_argument("--notes", type=int, default=200, help="Notes per user")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+        parser.add_argument(
+            "--token-requests",
+            type=int,
+            default=10,
+            help="Requests for the token scenario (bound by password hashing)",
+        )
+        parser.add_argument("--live", action="store_true", help="Also benchmark gunicorn")
+        parser.add_argument("--worker-class", choices=["gthread", "uvicorn"], default="gthread")
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=2)
+        parser.add_argument("--clients", type=int, default=8, help="Concurrent live clients")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--baseline", default="bench_api_baseline.json")
+        parser.add_argument("--save", action="store_true", help="Write results as the baseline")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)"
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=1.0,
+            help="Latency changes smaller than this never count as regressions",
+        )
+        parser.add_argument(
+            "--gate",
+            nargs="+",
+            choices=sorted(METRICS),
+            default=DEFAULT_GATED,
+            help="Timing metrics that can fail the run (queries and errors always do)",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded bench users")
+        parser.add_argument("--allow-prod", action="store_true", help="Allow when DEBUG=False")
+
+    def handle(self, *args, **opts):
+        # Seeds users, writes and deletes notes: not something for a production database.
+        if not settings.DEBUG and not opts["allow_prod"]:
+            raise CommandError(
+                "Refusing to run with DEBUG=False. Pass --allow-prod if you really mean it."
+            )
+        users = self._seed(opts["users"], opts["notes"])
+        results = {"meta": self._meta(opts)}
+        try:
+            with unthrottled():
+                results["client"] = self._run_client(users, opts)
+            if opts["live"]:
+                results["live"] = self._run_live(users, opts)
+        finally:
+            if not opts["keep"]:
+                get_user_model().objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+        for mode in ("client", "live"):
+            if mode in results:
+                self._print(mode, results[mode])
+
+        path = Path(opts["baseline"])
+        if opts["save"]:
+            path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}"))
+            return
+        if not path.exists():
+            self.stdout.write(self.style.WARNING(f"No baseline at {path}; rerun with --save."))
+            return
+
+        baseline = json.loads(path.read_text())
+        for key, value in baseline.get("meta", {}).items():
+            current = results["meta"].get(key)
+            if key != "created" and None not in (value, current) and current != value:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Baseline {key}={value!r} differs from this run ({current!r}); "
+                        "comparisons may not be meaningful."
+                    )
+                )
+        regressions = compare(
+            results, baseline, opts["tolerance"], opts["min_delta_ms"], opts["gate"]
+        )
+        for line in regressions:
+            self.stderr.write(line)
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}"))
+
+    def _meta(self, opts):
+        return {
+            "created": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "vendor": connection.vendor,
+            "users": opts["users"],
+            "notes": opts["notes"],
+            "requests": opts["requests"],
+            "token_requests": opts["token_requests"],
+            "worker_class": opts["worker_class"] if opts["live"] else None,
+            "workers": opts["workers"] if opts["live"] else None,
+            "clients": opts["clients"] if opts["live"] else None,
+        }
+
+    # -- data ----------------------------------------------------------------
+
+    def _seed(self, n_users, n_notes):
+        User = get_user_model()
+        password = make_password(BENCH_PASSWORD)  # hash once, not once per user
+        User.objects.bulk_create(
+            [User(username=f"{BENCH_PREFIX}{i}", password=password) for i in range(n_users)],
+            ignore_conflicts=True,
+        )
+        users = list(
+            User.objects.filter(username__startswith=BENCH_PREFIX).order_by("pk")[:n_users]
+        )
+        notes = []
+        for user in users:
+            missing = n_notes - Note.objects.filter(owner=user).count()
+            notes += [
+                Note(owner=user, title=f"Bench note {i}", content="lorem ipsum " * 20)
+                for i in range(max(missing, 0))
+            ]
+        Note.objects.bulk_create(notes, batch_size=2000)
+
+        return [
+            BenchUser(
+                user.pk,
+                user.username,
+                str(NotesTokenObtainPairSerializer.get_token(user).access_token),
+                list(Note.objects.filter(owner=user).values_list("pk", flat=True)[:500]),
+            )
+            for user in users
+        ]
+
+    def _requests(self, scenario, users, opts):
+        """Request specs for one scenario, spread round-robin over the bench users."""
+        count = opts["token_requests"] if scenario == "token" else opts["requests"]
+        if scenario == "delete":
+            doomed = Note.objects.bulk_create(
+                [
+                    Note(owner_id=users[i % len(users)].pk, title="Bench delete")
+                    for i in range(count)
+                ]
+            )
+            pks = [note.pk for note in doomed]
+        specs = []
+        for i in range(count):
+            user = users[i % len(users)]
+            note_id = user.note_ids[(i // len(users)) % len(user.note_ids)]
+            if scenario == "list":
+                specs.append(Request("GET", "/api/notes/", None, user.token))
+            elif scenario == "detail":
+                specs.append(Request("GET", f"/api/notes/{note_id}/", None, user.token))
+            elif scenario == "create":
+                body = {"title": f"Bench create {i}", "content": "lorem ipsum"}
+                specs.append(Request("POST", "/api/notes/", body, user.token))
+            elif scenario == "update":
+                body = {"status": UPDATE_STATUSES[i % len(UPDATE_STATUSES)]}
+                specs.append(Request("PATCH", f"/api/notes/{note_id}/", body, user.token))
+            elif scenario == "delete":
+                pk = pks[i]
+                owner = users[i % len(users)]
+                specs.append(Request("DELETE", f"/api/notes/{pk}/", None, owner.token))
+            elif scenario == "health":
+                specs.append(Request("GET", "/api/health/", None, None))
+            elif scenario == "token":
+                body = {"username": user.username, "password": BENCH_PASSWORD}
+                specs.append(Request("POST", "/api/auth/token/", body, None))
+        return specs
+
+    # -- runners -------------------------------------------------------------
+
+    def _run_client(self, users, opts):
+        client = Client()
+        results = {}
+        for scenario in SCENARIOS:
+            latencies, queries, errors = [], [], 0
+            started = time.perf_counter()
+            for spec in self._requests(scenario, users, opts):
+                headers = {"Authorization": f"Bearer {spec.token}"} if spec.token else {}
+                call = getattr(client, spec.method.lower())
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    if spec.method == "GET":
+                        resp = call(spec.path, headers=headers)
+                    else:
+                        body = json.dumps(spec.body) if spec.body is not None else ""
+                        resp = call(
+                            spec.path, body, content_type="application/json", headers=headers
+                        )
+                    elapsed = time.perf_counter() - start
+                if resp.status_code >= 400:
+                    errors += 1
+                    continue
+                latencies.append(elapsed)
+                queries.append(len(ctx.captured_queries))
+            summary = summarize(latencies, time.perf_counter() - started, errors)
+            # Median: the first request per user pays for cold caches.
+            summary["queries"] = statistics.median(queries) if queries else 0
+            summary["queries_max"] = max(queries, default=0)
+            results[scenario] = summary
+        return results
+
+    def _run_live(self, users, opts):
+        results = {}
+        with gunicorn_server(
+            opts["worker_class"], opts["port"], workers=opts["workers"], threads=opts["threads"]
+        ):
+            for scenario in SCENARIOS:
+                pending = collections.deque(self._requests(scenario, users, opts))
+
+                def next_request():
+                    if not pending:
+                        return None
+                    spec = pending.popleft()
+                    headers = {"Content-Type": "application/json"}
+                    if spec.token:
+                        headers["Authorization"] = f"Bearer {spec.token}"
+                    body = json.dumps(spec.body).encode() if spec.body is not None else None
+                    return spec.method, spec.path, body, headers
+
+                latencies, errors, wall = run_clients(opts["port"], opts["clients"], next_request)
+                results[scenario] = summarize(latencies, wall, errors)
+        return results
+
+    def _print(self, mode, results):
+        self.stdout.write(f"\n[{mode}]")
+        self.stdout.write(
+            f"{'scenario':<9} {'ok':>6} {'err':>4} {'rps':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}"
+        )
+        for scenario, r in results.items():
+            queries = f"{r['queries']:g}" if "queries" in r else "-"
+            self.stdout.write(
+                f"{scenario:<9} {r['ok']:>6} {r['errors']:>4} {r['rps']:>9.1f} "
+                f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {queries:>8}"
+            )
+
+
+def compare(results, baseline, tolerance, min_delta_ms, gated=DEFAULT_GATED):
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for mode in ("client", "live"):
+        for scenario, current in results.get(mode, {}).items():
+            base = baseline.get(mode, {}).get(scenario)
+            if not base:
+                continue
+            label = f"{mode}/{scenario}"
+            if current["errors"] > base.get("errors", 0):
+                regressions.append(f"{label}: {current['errors']} errors (was {base['errors']})")
+            if "queries" in current and "queries" in base and current["queries"] > base["queries"]:
+                regressions.append(
+                    f"{label}: {current['queries']:g} queries/request (was {base['queries']:g})"
+                )
+            for metric in gated:
+                better = METRICS[metric]
+                was, now = base.get(metric), current.get(metric)
+                if was is None or now is None:
+                    continue
+                if better == "lower":
+                    worse = now > was * (1 + tolerance) and now - was > min_delta_ms
+                else:
+                    worse = now < was * (1 - tolerance)
+                if worse:
+                    change = (now - was) / was * 100 if was else float("inf")
+                    regressions.append(f"{label}: {metric} {now:g} (was {was:g}, {change:+.0f}%)")
+    return regressions
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from notes.models import Note
+from notes.renderers import FastJSONRenderer
+from notes.serializers import NoteListSerializer, NoteRowSerializer, NoteSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmark NoteSerializer+JSONRenderer against the .values() fast path. "
+        "Seeds notes inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per size (median shown)")
+        parser.add_argument(
+            "--full", action="store_true", help="Serialize every field (default: list fields)"
+        )
+
+    def handle(self, *args, **opts):
+        fields = NoteSerializer.Meta.fields if opts["full"] else NoteListSerializer.Meta.fields
+        try:
+            with transaction.atomic():
+                self._run(opts["sizes"], opts["repeat"], fields)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, repeat, fields):
+        User = get_user_model()
+        user = User.objects.create(username="__bench_serializers__")
+        Note.objects.bulk_create(
+            [
+                Note(owner=user, title=f"Note {i}", content="lorem ipsum " * 20)
+                for i in range(max(sizes))
+            ],
+            batch_size=1000,
+        )
+        base = Note.objects.filter(owner=user).select_related("owner").order_by("-id")
+        rows = NoteRowSerializer(fields)
+
+        def drf(n):
+            data = NoteSerializer(base[:n], many=True, fields=fields).data
+            return JSONRenderer().render(data)
+
+        def fast(n):
+            data = rows.to_representation(base.values(*rows.value_columns)[:n])
+            return FastJSONRenderer().render(data)
+
+        self.stdout.write(f"{'notes':>8} {'drf ms':>10} {'fast ms':>10} {'speedup':>8}  same bytes")
+        for n in sizes:
+            same = drf(n) == fast(n)
+            t_drf = self._median(drf, n, repeat)
+            t_fast = self._median(fast, n, repeat)
+            self.stdout.write(
+                f"{n:>8} {t_drf * 1000:>10.2f} {t_fast * 1000:>10.2f} "
+                f"{t_drf / t_fast:>7.1f}x  {same}"
+            )
+
+    @staticmethod
+    def _median(fn, n, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn(n)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from notes.sync import compact_deletions
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete note tombstones older than NOTES_TOMBSTONE_RETENTION_DAYS. Sync cursors "
+        "older than that are answered with 410 and the client resyncs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Retention in days (default: the setting)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per DELETE")
+
+    def handle(self, *args, **opts):
+        removed = compact_deletions(opts["days"], opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} tombstones."))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import time
+
+from app.authentication import NotesTokenObtainPairSerializer
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from notes.benchmark import gunicorn_server, run_clients, summarize
+from notes.models import Note
+
+# Worker class -> the notes list endpoint native to it.
+MODES = {"gthread": "/api/notes/", "uvicorn": "/api/async/notes/"}
+LOADTEST_USER = "__loadtest__"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the notes list on one gunicorn worker per mode (gthread vs uvicorn) "
+        "against the configured database and report throughput, latency and the "
+        "concurrency one worker sustains. Needs a migrated database; seeds a "
+        "__loadtest__ user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=list(MODES))
+        parser.add_argument("--clients", type=int, default=32, help="Concurrent connections")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+        parser.add_argument("--notes", type=int, default=200, help="Notes owned by the user")
+        parser.add_argument("--threads", type=int, default=2, help="gthread threads per worker")
+        parser.add_argument(
+            "--db-latency-ms",
+            type=float,
+            default=0.0,
+            help="Sleep before every SQL statement, standing in for a remote database",
+        )
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, **opts):
+        token = self._seed(opts["notes"])
+        self.stdout.write(
+            f"{opts['clients']} clients, {opts['duration']:.0f}s per mode, "
+            f"db latency {opts['db_latency_ms']:.0f}ms, 1 worker"
+        )
+        self.stdout.write(
+            f"{'mode':<9} {'path':<18} {'ok':>7} {'err':>5} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'solo ms':>8} {'conc/worker':>11}"
+        )
+        env = {
+            "LOADTEST_DB_LATENCY_MS": str(opts["db_latency_ms"]),
+            # Every request must reach the database, not the list cache.
+            "NOTES_CACHE_BACKEND": "none",
+        }
+        for mode in opts["modes"]:
+            path = MODES[mode]
+            with gunicorn_server(mode, opts["port"], threads=opts["threads"], env=env):
+                solo = self._load(opts["port"], path, token, 1, 2.0)
+                result = self._load(opts["port"], path, token, opts["clients"], opts["duration"])
+            # Requests completing per second x time one request takes on an idle
+            # worker = how many requests the worker actually serves at once.
+            concurrency = result["rps"] * solo["mean_ms"] / 1000
+            self.stdout.write(
+                f"{mode:<9} {path:<18} {result['ok']:>7} {result['errors']:>5} "
+                f"{result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                f"{result['p99_ms']:>8.1f} {solo['mean_ms']:>8.1f} {concurrency:>11.1f}"
+            )
+
+    def _seed(self, notes):
+        user, _ = get_user_model().objects.get_or_create(username=LOADTEST_USER)
+        missing = notes - Note.objects.filter(owner=user).count()
+        if missing > 0:
+            Note.objects.bulk_create(
+                [
+                    Note(owner=user, title=f"Load note {i}", content="lorem ipsum " * 20)
+                    for i in range(missing)
+                ],
+                batch_size=1000,
+            )
+        return str(NotesTokenObtainPairSerializer.get_token(user).access_token)
+
+    @staticmethod
+    def _load(port, path, token, clients, duration):
+        request = ("GET", path, None, {"Authorization": f"Bearer {token}"})
+        deadline = time.monotonic() + duration
+        latencies, errors, wall = run_clients(
+            port, clients, lambda: request if time.monotonic() < deadline else None
+        )
+        return summarize(latencies, wall, errors)
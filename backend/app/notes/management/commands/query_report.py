@@ -0,0 +1,75 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise the SQL profile log written with QUERY_PROFILE=True: N+1 candidates "
+        "and slow statements grouped by view, with the plan warnings seen for each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", help="JSON-lines profile log (default: QUERY_PROFILE_LOG)")
+        parser.add_argument("--top", type=int, default=10, help="Rows per section")
+        parser.add_argument("--plans", action="store_true", help="Print one plan per statement")
+
+    def handle(self, *args, **opts):
+        path = opts["log"] or settings.QUERY_PROFILE_LOG
+        if not path or not Path(path).exists():
+            raise CommandError(f"No profile log at {path!r}; set QUERY_PROFILE_LOG.")
+
+        requests, repeated, slow = 0, {}, {}
+        with open(path) as log:
+            for line in log:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crashed worker
+                requests += 1
+                view = record.get("view") or record["path"]
+                for item in record["n_plus_one"]:
+                    entry = repeated.setdefault(
+                        (view, item["sql"]), {"requests": 0, "max": 0, "ms": 0.0}
+                    )
+                    entry["requests"] += 1
+                    entry["max"] = max(entry["max"], item["count"])
+                    entry["ms"] += item["total_ms"]
+                for item in record["slow"]:
+                    entry = slow.setdefault(
+                        (view, item["sql"]),
+                        {"count": 0, "ms": 0.0, "max": 0.0, "warnings": set(), "plan": None},
+                    )
+                    entry["count"] += 1
+                    entry["ms"] += item["ms"]
+                    entry["max"] = max(entry["max"], item["ms"])
+                    entry["warnings"].update(item.get("warnings", []))
+                    entry["plan"] = item.get("plan") or entry["plan"]
+
+        self.stdout.write(f"{requests} profiled request(s) with findings in {path}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nN+1 candidates (by time spent)"))
+        ranked = sorted(repeated.items(), key=lambda kv: -kv[1]["ms"])[: opts["top"]]
+        for (view, sql), entry in ranked:
+            self.stdout.write(
+                f"{view}: up to {entry['max']}x per request in {entry['requests']} request(s), "
+                f"{entry['ms']:.1f} ms total\n    {sql}"
+            )
+        if not ranked:
+            self.stdout.write("none")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("\nSlow statements (by total time)"))
+        ranked = sorted(slow.items(), key=lambda kv: -kv[1]["ms"])[: opts["top"]]
+        for (view, sql), entry in ranked:
+            self.stdout.write(
+                f"{view}: {entry['count']}x, avg {entry['ms'] / entry['count']:.1f} ms, "
+                f"max {entry['max']:.1f} ms\n    {sql}"
+            )
+            for warning in sorted(entry["warnings"]):
+                self.stdout.write(self.style.WARNING(f"    ! {warning}"))
+            if opts["plans"] and entry["plan"]:
+                self.stdout.write("\n".join(f"      {line}" for line in entry["plan"]))
+        if not ranked:
+            self.stdout.write("none")
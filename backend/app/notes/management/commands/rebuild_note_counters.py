@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from notes.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user NoteStatusCounter table from notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild for this user id (repeatable). Default: all users.",
+        )
+
+    def handle(self, *args, **opts):
+        written = rebuild_counters(opts["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} counter rows."))
@@ -1,17 +1,72 @@
 # backend/app/notes/management/commands/seed_demo.py
 from __future__ import annotations
 
+import contextlib
+import multiprocessing
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
+from django.db import connection, connections, transaction
+from django.db.models import Count
 from django.utils import timezone
 
 from notes import models as notes_models
 
+DEMO_USERNAMES = ["demo", "alice", "bob", "charlie", "dana", "eric", "frank"]
+
+TITLES = [
+    "Buy groceries",
+    "Plan sprint tasks",
+    "Read DRF docs",
+    "Refactor API",
+    "Fix login bug",
+    "Update CI pipeline",
+    "Write tests",
+    "Review PR #42",
+    "Prepare demo",
+    "Backup database",
+    "Draft release notes",
+    "Clean images",
+]
+BODIES = [
+    "Remember to get milk, eggs, and bread.",
+    "Break down tickets and estimate.",
+    "Focus on permissions & throttling.",
+    "Simplify serializers and views.",
+    "Repro and add unit tests.",
+    "Enable BuildKit caching.",
+    "Cover the critical flows first.",
+    "Leave comments and suggestions.",
+    "Slides and live walkthrough.",
+    "Rotate credentials & verify restores.",
+    "Summarize features and fixes.",
+    "Prune dangling images weekly.",
+]
+
+Note = notes_models.Note
+STATUS_CYCLE = [
+    Note.Status.OPEN,
+    Note.Status.IN_PROGRESS,
+    Note.Status.DONE,
+    Note.Status.ARCHIVED,
+]
+QUERY_CHUNK = 500  # ids per IN (...) lookup, well under SQLite's variable limit
+COPY_ROWS = 200_000  # rows per COPY statement (and transaction)
+NOTE_COLUMNS = ["owner", "title", "content", "status", "created_at", "updated_at"]
+
+
+def demo_usernames(n_users):
+    n_users = max(1, int(n_users))
+    if n_users <= len(DEMO_USERNAMES):
+        return DEMO_USERNAMES[:n_users]
+    return DEMO_USERNAMES + [f"user{i}" for i in range(len(DEMO_USERNAMES) + 1, n_users + 1)]
+
 
 class Command(BaseCommand):
     help = "Seed demo users & notes (idempotent). Refuses to run in PROD unless --allow-prod."
@@ -26,25 +81,45 @@ class Command(BaseCommand):
         parser.add_argument(
             "--clear", action="store_true", help="Delete demo users & their notes, then exit"
         )
+        # ---- high-volume mode ----------------------------------------------
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Seed with bulk inserts (for load tests: 10k users x 1k notes)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=2000, help="Rows per INSERT in --bulk mode"
+        )
+        parser.add_argument(
+            "--method",
+            choices=["auto", "orm", "copy"],
+            default="auto",
+            help="--bulk note insert: bulk_create, or COPY (PostgreSQL; auto picks it there)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="--bulk: processes generating and inserting notes (PostgreSQL only)",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **opts):
         # ---- safety ---------------------------------------------------------
         if not settings.DEBUG and not opts["allow_prod"]:
             raise CommandError(
                 "Refusing to run with DEBUG=False. Pass --allow-prod if you really mean it."
             )
+        if opts["bulk"]:
+            return self.handle_bulk(**opts)
+        return self.handle_classic(**opts)
 
+    @transaction.atomic
+    def handle_classic(self, **opts):
         User = get_user_model()
         Note = notes_models.Note
 
         # ---- users to ensure ------------------------------------------------
-        base_users = ["demo", "alice", "bob", "charlie", "dana", "eric", "frank"]
-        n_users = max(1, int(opts["users"]))
-        if n_users <= len(base_users):
-            usernames = base_users[:n_users]
-        else:
-            usernames = base_users + [f"user{i}" for i in range(len(base_users) + 1, n_users + 1)]
+        usernames = demo_usernames(opts["users"])
 
         # ---- CLEAR mode -----------------------------------------------------
         if opts["clear"]:
@@ -83,34 +158,7 @@ class Command(BaseCommand):
             ensured_users.append(user)
 
         # ---- note templates -------------------------------------------------
-        titles = [
-            "Buy groceries",
-            "Plan sprint tasks",
-            "Read DRF docs",
-            "Refactor API",
-            "Fix login bug",
-            "Update CI pipeline",
-            "Write tests",
-            "Review PR #42",
-            "Prepare demo",
-            "Backup database",
-            "Draft release notes",
-            "Clean images",
-        ]
-        bodies = [
-            "Remember to get milk, eggs, and bread.",
-            "Break down tickets and estimate.",
-            "Focus on permissions & throttling.",
-            "Simplify serializers and views.",
-            "Repro and add unit tests.",
-            "Enable BuildKit caching.",
-            "Cover the critical flows first.",
-            "Leave comments and suggestions.",
-            "Slides and live walkthrough.",
-            "Rotate credentials & verify restores.",
-            "Summarize features and fixes.",
-            "Prune dangling images weekly.",
-        ]
+        titles, bodies = TITLES, BODIES
 
         # distribute statuses using *your* enum
         status_cycle = [
@@ -161,3 +209,184 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.HTTP_INFO(f"Try login: username='demo'  password='{password}'")
         )
+
+    # ---- --bulk ------------------------------------------------------------
+    # Commits per batch (an interrupted run is resumed by the next one) and
+    # never looks rows up one at a time: users are matched by username and
+    # notes are topped up from one count per chunk of users.
+
+    def handle_bulk(self, **opts):
+        User = get_user_model()
+        usernames = demo_usernames(opts["users"])
+        batch_size = max(1, opts["batch_size"])
+        started = time.monotonic()
+
+        existing = self._user_ids(usernames)
+        if opts["clear"]:
+            ids = list(existing.values())
+            for chunk in _chunks(ids, QUERY_CHUNK):
+                Note.objects.filter(owner_id__in=chunk).delete()
+                User.objects.filter(pk__in=chunk).delete()
+            self.stdout.write(self.style.WARNING(f"Cleared {len(ids)} users and their notes."))
+            return
+
+        # One PBKDF2 hash shared by every demo user instead of one per user.
+        password = make_password(opts["password"])
+        for chunk in _chunks(list(existing.values()), QUERY_CHUNK):
+            User.objects.filter(pk__in=chunk).update(password=password)
+        User.objects.bulk_create(
+            [
+                User(
+                    username=name,
+                    email=f"{name}@example.test",
+                    password=password,
+                    is_staff=name == "demo",
+                )
+                for name in usernames
+                if name not in existing
+            ],
+            batch_size=batch_size,
+        )
+        new_users = len(usernames) - len(existing)
+        user_ids = self._user_ids(usernames) if new_users else existing
+
+        per_user = max(1, int(opts["notes"]))
+        have = {}
+        for chunk in _chunks(list(user_ids.values()), QUERY_CHUNK):
+            have.update(
+                Note.objects.filter(owner_id__in=chunk)
+                .order_by()
+                .values_list("owner_id")
+                .annotate(n=Count("id"))
+            )
+        work = [
+            (uid, have.get(uid, 0), per_user - have.get(uid, 0))
+            for uid in user_ids.values()
+            if have.get(uid, 0) < per_user
+        ]
+
+        method = opts["method"]
+        if method == "auto":
+            method = "copy" if connection.vendor == "postgresql" else "orm"
+        if method == "copy" and connection.vendor != "postgresql":
+            raise CommandError("--method=copy needs PostgreSQL.")
+        workers = max(1, opts["workers"])
+        if workers > 1 and connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING("--workers needs PostgreSQL; using 1."))
+            workers = 1
+
+        if workers == 1:
+            created = insert_notes(work, method, batch_size)
+        else:
+            # Children inherit nothing usable from the parent's connections.
+            connections.close_all()
+            slices = [work[i::workers] for i in range(workers)]
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                created = sum(
+                    pool.map(insert_notes, slices, [method] * workers, [batch_size] * workers)
+                )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Bulk seed complete: {len(user_ids)} users ({new_users} new), "
+                f"{per_user} notes/user, {created} new notes via {method} in {elapsed:.1f}s "
+                f"({created / elapsed if elapsed else 0:.0f} notes/s)."
+            )
+        )
+        self.stdout.write(
+            self.style.HTTP_INFO(f"Try login: username='demo'  password='{opts['password']}'")
+        )
+
+    def _user_ids(self, usernames):
+        User = get_user_model()
+        ids = {}
+        for chunk in _chunks(usernames, QUERY_CHUNK):
+            ids.update(User.objects.filter(username__in=chunk).values_list("username", "pk"))
+        return ids
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def note_rows(work, rng=None, now=None):
+    """
+    Row tuples (NOTE_COLUMNS order) for ``work`` = [(owner_id, existing, missing)].
+
+    Notes are spread over the last 14 days and edited up to 48 hours later, like
+    the classic mode, but the timestamps go into the INSERT itself.
+    """
+    rng = rng or random.Random()
+    now = now or timezone.now()
+    for owner_id, start, missing in work:
+        for i in range(start, start + missing):
+            created_at = now - timedelta(seconds=rng.randint(0, 14 * 86400))
+            updated_at = min(now, created_at + timedelta(seconds=rng.randint(3600, 48 * 3600)))
+            yield (
+                owner_id,
+                f"{TITLES[i % len(TITLES)]} #{i + 1}",
+                BODIES[i % len(BODIES)],
+                STATUS_CYCLE[i % len(STATUS_CYCLE)],
+                created_at,
+                updated_at,
+            )
+
+
+@contextlib.contextmanager
+def explicit_timestamps():
+    """Stop auto_now/auto_now_add from overwriting timestamps during bulk_create."""
+    fields = [Note._meta.get_field("created_at"), Note._meta.get_field("updated_at")]
+    saved = [(f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, (auto_now, auto_now_add) in zip(fields, saved):
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def insert_notes(work, method, batch_size):
+    """Insert the notes described by ``work``; returns the number of rows."""
+    rows = note_rows(work)
+    total = 0
+    try:
+        if method == "copy":
+            table = connection.ops.quote_name(Note._meta.db_table)
+            columns = ", ".join(
+                connection.ops.quote_name(Note._meta.get_field(name).column)
+                for name in NOTE_COLUMNS
+            )
+            sql = f"COPY {table} ({columns}) FROM STDIN"
+            while True:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    with cursor.cursor.copy(sql) as copy:
+                        written = 0
+                        for row in rows:
+                            copy.write_row(row)
+                            written += 1
+                            if written == COPY_ROWS:
+                                break
+                total += written
+                if written < COPY_ROWS:
+                    return total
+
+        fields = [f if f != "owner" else "owner_id" for f in NOTE_COLUMNS]
+        with explicit_timestamps():
+            batch = []
+            for row in rows:
+                batch.append(Note(**dict(zip(fields, row))))
+                if len(batch) == batch_size:
+                    Note.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                Note.objects.bulk_create(batch)
+                total += len(batch)
+        return total
+    finally:
+        if multiprocessing.parent_process() is not None:
+            connections.close_all()
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0002_note_owner"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["owner", "updated_at", "id"], name="note_owner_updated_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Full-text search over Note.title/content.
+#
+# PostgreSQL: a stored generated tsvector column (kept current by the database on
+# every INSERT/UPDATE, including bulk_create/update()) with a GIN index.
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+# The column/table live outside the Django model; see notes/search.py.
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE notes_note ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX note_search_vector_gin ON notes_note USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS note_search_vector_gin",
+    "ALTER TABLE notes_note DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, content, content='notes_note', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_ai AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_ad AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_fts_au AFTER UPDATE OF title, content ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_note_fts(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS notes_note_fts_au",
+    "DROP TRIGGER IF EXISTS notes_note_fts_ad",
+    "DROP TRIGGER IF EXISTS notes_note_fts_ai",
+    "DROP TABLE IF EXISTS notes_note_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0003_note_owner_updated_id_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Counters are maintained in the database so bulk_create/update()/delete() and
+# cascades keep them exact. NOTE: on SQLite, migrations that rebuild notes_note
+# drop its triggers; re-create them (and run rebuild_note_counters) if that happens.
+
+BACKFILL = """
+    INSERT INTO notes_notestatuscounter (owner_id, status, count)
+    SELECT owner_id, status, COUNT(*) FROM notes_note GROUP BY owner_id, status
+"""
+
+POSTGRES_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION notes_note_status_counter() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE notes_notestatuscounter SET count = count - 1
+            WHERE owner_id = OLD.owner_id AND status = OLD.status;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO notes_notestatuscounter (owner_id, status, count)
+            VALUES (NEW.owner_id, NEW.status, 1)
+            ON CONFLICT (owner_id, status)
+            DO UPDATE SET count = notes_notestatuscounter.count + 1;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER notes_note_counter_ins_del AFTER INSERT OR DELETE ON notes_note
+    FOR EACH ROW EXECUTE FUNCTION notes_note_status_counter()
+    """,
+    """
+    CREATE TRIGGER notes_note_counter_upd AFTER UPDATE OF status, owner_id ON notes_note
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.owner_id IS DISTINCT FROM NEW.owner_id)
+    EXECUTE FUNCTION notes_note_status_counter()
+    """,
+    BACKFILL,
+]
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS notes_note_counter_upd ON notes_note",
+    "DROP TRIGGER IF EXISTS notes_note_counter_ins_del ON notes_note",
+    "DROP FUNCTION IF EXISTS notes_note_status_counter()",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER notes_note_counter_ai AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_notestatuscounter (owner_id, status, count)
+        VALUES (new.owner_id, new.status, 1)
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_counter_ad AFTER DELETE ON notes_note BEGIN
+        UPDATE notes_notestatuscounter SET count = count - 1
+        WHERE owner_id = old.owner_id AND status = old.status;
+    END
+    """,
+    """
+    CREATE TRIGGER notes_note_counter_au AFTER UPDATE OF status, owner_id ON notes_note
+    WHEN old.status IS NOT new.status OR old.owner_id IS NOT new.owner_id BEGIN
+        UPDATE notes_notestatuscounter SET count = count - 1
+        WHERE owner_id = old.owner_id AND status = old.status;
+        INSERT INTO notes_notestatuscounter (owner_id, status, count)
+        VALUES (new.owner_id, new.status, 1)
+        ON CONFLICT (owner_id, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    BACKFILL,
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS notes_note_counter_au",
+    "DROP TRIGGER IF EXISTS notes_note_counter_ad",
+    "DROP TRIGGER IF EXISTS notes_note_counter_ai",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0004_note_fulltext_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NoteStatusCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("OPEN", "Open"),
+                            ("IN_PROGRESS", "In Progress"),
+                            ("DONE", "Done"),
+                            ("ARCHIVED", "Archived"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["owner", "status", "updated_at"], name="note_owner_status_updated_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="notestatuscounter",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="note_counters",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="notestatuscounter",
+            constraint=models.UniqueConstraint(
+                fields=("owner", "status"), name="note_counter_owner_status_uniq"
+            ),
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
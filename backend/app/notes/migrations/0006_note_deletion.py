@@ -0,0 +1,86 @@
+# Generated by Django 5.0.7 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+# Tombstones are written in the database so queryset deletes, bulk deletes and
+# user cascades all leave one. Same caveat as 0005: on SQLite, migrations that
+# rebuild notes_note drop this trigger.
+
+POSTGRES_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION notes_note_tombstone() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO notes_notedeletion (note_id, owner_id, deleted_at)
+        VALUES (OLD.id, OLD.owner_id, now());
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER notes_note_tombstone AFTER DELETE ON notes_note
+    FOR EACH ROW EXECUTE FUNCTION notes_note_tombstone()
+    """,
+]
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS notes_note_tombstone ON notes_note",
+    "DROP FUNCTION IF EXISTS notes_note_tombstone()",
+]
+
+SQLITE_FORWARD = [
+    # Written exactly as Django stores SQLite datetimes (UTC text, six fractional
+    # digits, none at all on a whole second) so sync cursors compare equal to it.
+    """
+    CREATE TRIGGER notes_note_tombstone AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_notedeletion (note_id, owner_id, deleted_at)
+        VALUES (old.id, old.owner_id, CASE
+            WHEN strftime('%f', 'now') LIKE '%.000' THEN strftime('%Y-%m-%d %H:%M:%S', 'now')
+            ELSE strftime('%Y-%m-%d %H:%M:%f', 'now') || '000'
+        END);
+    END
+    """,
+]
+SQLITE_BACKWARD = ["DROP TRIGGER IF EXISTS notes_note_tombstone"]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0005_note_status_counter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NoteDeletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("note_id", models.BigIntegerField()),
+                ("owner_id", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner_id", "deleted_at", "id"],
+                        name="notedel_owner_deleted_id_idx",
+                    ),
+                    models.Index(fields=["deleted_at"], name="notedel_deleted_at_idx"),
+                ],
+            },
+        ),
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
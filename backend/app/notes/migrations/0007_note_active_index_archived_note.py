@@ -0,0 +1,55 @@
+# Generated by Django 5.0.7 on 2026-10-18 11:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("notes", "0006_note_deletion"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedNote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("note_id", models.BigIntegerField(unique=True)),
+                ("title", models.CharField(max_length=200)),
+                ("content", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                condition=models.Q(("status__in", ("OPEN", "IN_PROGRESS"))),
+                fields=["owner", "updated_at", "id"],
+                name="note_active_owner_updated_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivednote",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="archived_notes",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivednote",
+            index=models.Index(
+                fields=["owner", "updated_at", "note_id"], name="archnote_owner_updated_idx"
+            ),
+        ),
+    ]
@@ -1,5 +1,33 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.lookups import In
+
+# Statuses the notes list shows unless asked for DONE and ARCHIVED notes too.
+# Backs the partial index below, so changing it needs a migration.
+ACTIVE_STATUSES = ("OPEN", "IN_PROGRESS")
+
+
+class LiteralIn(In):
+    """
+    ``__in`` with its values written into the SQL instead of bound as parameters.
+
+    SQLite only uses a partial index when the query repeats the index's WHERE
+    term, and a bound parameter never matches it. PostgreSQL does not care. For
+    constants only: the values must be plain identifiers.
+    """
+
+    lookup_name = "literal_in"
+
+    def process_rhs(self, compiler, connection):
+        sql, params = super().process_rhs(compiler, connection)
+        if not all(isinstance(p, str) and p.isidentifier() for p in params):
+            raise ValueError("LiteralIn only takes identifier-like string constants.")
+        return sql % tuple(f"'{p}'" for p in params), []
+
+
+def active_notes(queryset):
+    """Notes of ``queryset`` neither done nor archived, in a form the partial indexes serve."""
+    return queryset.filter(status__literal_in=ACTIVE_STATUSES)
 
 
 class Note(models.Model):
@@ -20,6 +48,108 @@ class Note(models.Model):
 
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            # Backs keyset pagination of a user's notes by (-updated_at, -id).
+            models.Index(fields=["owner", "updated_at", "id"], name="note_owner_updated_id_idx"),
+            # Backs ?status= filtering of a user's notes, newest first.
+            models.Index(
+                fields=["owner", "status", "updated_at"], name="note_owner_status_updated_idx"
+            ),
+            # The default list (active notes only): done and archived notes pile
+            # up without limit but stay out of this index.
+            models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="note_active_owner_updated_idx",
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+            ),
+        ]
 
     def __str__(self):
         return f"Note: {self.title} [{self.status}]"
+
+
+Note._meta.get_field("status").register_lookup(LiteralIn)
+
+
+class NoteStatusCounter(models.Model):
+    """
+    Denormalized per-user note counts by status.
+
+    Maintained by database triggers on notes_note (migration 0005), so it stays
+    exact for bulk_create/update()/delete() too. Rebuild with
+    ``manage.py rebuild_note_counters``.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="note_counters"
+    )
+    status = models.CharField(max_length=20, choices=Note.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "status"], name="note_counter_owner_status_uniq"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}/{self.status}: {self.count}"
+
+
+class NoteDeletion(models.Model):
+    """
+    Tombstone of a deleted note, for ``/api/notes/changes/``.
+
+    Written by a database trigger on notes_note (migration 0006), so bulk and
+    cascading deletes leave tombstones too. ``owner_id`` is a plain column rather
+    than a foreign key: deleting a user cascades to their notes, and the trigger
+    must be able to record those. ``manage.py compact_note_deletions`` drops
+    tombstones older than ``NOTES_TOMBSTONE_RETENTION_DAYS``.
+    """
+
+    note_id = models.BigIntegerField()
+    owner_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner_id", "deleted_at", "id"], name="notedel_owner_deleted_id_idx"
+            ),
+            models.Index(fields=["deleted_at"], name="notedel_deleted_at_idx"),
+        ]
+
+    def __str__(self):
+        return f"Deleted note {self.note_id} of {self.owner_id}"
+
+
+class ArchivedNote(models.Model):
+    """
+    Cold storage for notes archived longer than ``NOTES_ARCHIVE_AFTER_DAYS``.
+
+    ``manage.py archive_notes`` moves them out of notes_note, which keeps the hot
+    table and its indexes sized to the notes people still use; the delete leaves
+    tombstones, so synced clients drop them. ``POST /api/notes/restore/`` moves
+    them back under their original id.
+    """
+
+    note_id = models.BigIntegerField(unique=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_notes"
+    )
+    title = models.CharField(max_length=200)
+    content = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "updated_at", "note_id"], name="archnote_owner_updated_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archived note {self.note_id}: {self.title}"
@@ -1,7 +1,7 @@
+from app.authentication import NotesTokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework.test import APIClient
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from notes.models import Note
 
@@ -9,8 +9,8 @@ User = get_user_model()
 
 
 def auth_client_for(user: User) -> APIClient:
-    """Return an APIClient with Bearer token for the given user."""
-    refresh = RefreshToken.for_user(user)
+    """Return an APIClient with a Bearer token as issued by /api/auth/token/."""
+    refresh = NotesTokenObtainPairSerializer.get_token(user)
     access_token = str(refresh.access_token)
     client = APIClient()
     client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
@@ -38,7 +38,7 @@ class NotesAPITests(TestCase):
         # list only shows user's notes
         resp = client.get("/api/notes/")
         self.assertEqual(resp.status_code, 200)
-        titles = [n["title"] for n in resp.json()]
+        titles = [n["title"] for n in resp.json()["results"]]
         self.assertIn("mine", titles)
         self.assertNotIn("u2 secret", titles)
 
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from app.authentication import NotesTokenObtainPairSerializer
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notes.cache import get_list_cache
+from notes.models import ArchivedNote, Note, NoteDeletion, active_notes
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class ActiveListTests(TestCase):
+    def setUp(self):
+        get_list_cache().clear()
+        self.user = User.objects.create_user(username="active", password="pass12345")
+        self.client = auth_client_for(self.user)
+        for status in Note.Status.values:
+            Note.objects.create(owner=self.user, title=status, status=status)
+
+    def titles(self, **params):
+        resp = self.client.get("/api/notes/", params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return sorted(n["title"] for n in resp.json()["results"])
+
+    def test_done_and_archived_notes_are_left_out_unless_asked_for(self):
+        self.assertEqual(self.titles(), ["IN_PROGRESS", "OPEN"])
+        self.assertEqual(len(self.titles(include_archived=1)), 4)
+        self.assertEqual(self.titles(status="ARCHIVED"), ["ARCHIVED"])
+        self.assertEqual(self.titles(status="OPEN,ARCHIVED"), ["ARCHIVED", "OPEN"])
+
+    async def test_async_list(self):
+        token = NotesTokenObtainPairSerializer.get_token(self.user).access_token
+        headers = {"Authorization": f"Bearer {token}"}
+        resp = await self.async_client.get("/api/async/notes/", headers=headers)
+        statuses = {n["status"] for n in resp.json()["results"]}
+        self.assertEqual(statuses, {"OPEN", "IN_PROGRESS"})
+        resp = await self.async_client.get(
+            "/api/async/notes/", {"include_archived": "true"}, headers=headers
+        )
+        self.assertEqual(len(resp.json()["results"]), 4)
+
+    @skipUnless(connection.vendor == "sqlite", "SQLite needs the literal IN to match")
+    def test_default_list_uses_the_partial_index(self):
+        queryset = active_notes(Note.objects.filter(owner=self.user)).order_by("-updated_at")
+        self.assertIn("note_active_owner_updated_idx", queryset.explain())
+
+
+@override_settings(NOTES_ARCHIVE_AFTER_DAYS=90)
+class ColdStorageTests(TestCase):
+    def setUp(self):
+        get_list_cache().clear()
+        self.user = User.objects.create_user(username="archivist", password="pass12345")
+        self.client = auth_client_for(self.user)
+        self.long_ago = long_ago = timezone.now() - timedelta(days=100)
+        self.old = Note.objects.create(
+            owner=self.user, title="old", content="body", status="ARCHIVED"
+        )
+        self.recent = Note.objects.create(owner=self.user, title="recent", status="ARCHIVED")
+        self.open = Note.objects.create(owner=self.user, title="open")
+        Note.objects.filter(pk__in=[self.old.pk, self.open.pk]).update(
+            created_at=long_ago, updated_at=long_ago
+        )
+
+    def archive(self):
+        out = StringIO()
+        call_command("archive_notes", "--batch-size=1", stdout=out)
+        return out.getvalue()
+
+    def test_moves_only_long_archived_notes(self):
+        self.assertIn("Moved 1 notes", self.archive())
+        self.assertEqual(set(Note.objects.values_list("title", flat=True)), {"recent", "open"})
+        cold = ArchivedNote.objects.get()
+        self.assertEqual((cold.note_id, cold.content), (self.old.pk, "body"))
+        # The move reads as a delete to sync clients and to the counters.
+        self.assertTrue(NoteDeletion.objects.filter(note_id=self.old.pk).exists())
+        by_status = self.client.get("/api/notes/stats/").json()["by_status"]
+        self.assertEqual(by_status["ARCHIVED"], 1)
+
+        resp = self.client.get("/api/notes/archived/")
+        self.assertEqual(resp.json()["count"], 1)
+        self.assertEqual(
+            {k: v for k, v in resp.json()["results"][0].items() if k in ("id", "status")},
+            {"id": self.old.pk, "status": "ARCHIVED"},
+        )
+        self.assertIn("Moved 0 notes", self.archive())
+
+    def test_restore_brings_notes_back_under_their_id(self):
+        self.archive()
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                "/api/notes/restore/", {"ids": [self.old.pk, 999999]}, format="json"
+            )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        body = resp.json()
+        self.assertEqual(body["not_found"], [999999])
+        restored = body["restored"][0]
+        self.assertEqual((restored["id"], restored["content"]), (self.old.pk, "body"))
+        self.assertEqual(restored["status"], "ARCHIVED")
+
+        note = Note.objects.get(pk=self.old.pk)
+        self.assertEqual(note.created_at, self.long_ago)
+        self.assertGreater(note.updated_at, timezone.now() - timedelta(minutes=1))
+        self.assertFalse(ArchivedNote.objects.exists())
+        # Otherwise a client syncing across the move and the restore would
+        # apply the old deletion after the upsert.
+        self.assertFalse(NoteDeletion.objects.filter(note_id=self.old.pk).exists())
+
+    def test_restore_is_per_owner(self):
+        self.archive()
+        other = auth_client_for(User.objects.create_user(username="other", password="pass12345"))
+        resp = other.post("/api/notes/restore/", {"ids": [self.old.pk]}, format="json")
+        self.assertEqual(resp.json(), {"restored": [], "not_found": [self.old.pk]})
+        self.assertEqual(
+            self.client.post("/api/notes/restore/", {"ids": []}, format="json").status_code, 400
+        )
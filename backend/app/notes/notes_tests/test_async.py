@@ -0,0 +1,131 @@
+from datetime import timedelta
+from unittest import mock
+
+from app.authentication import NotesTokenObtainPairSerializer
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from notes import async_views
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class AsyncNotesAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="async", password="pass12345")
+        cls.other = User.objects.create_user(username="other", password="pass12345")
+        cls.secret = Note.objects.create(owner=cls.other, title="not yours")
+
+    def setUp(self):
+        get_list_cache().clear()
+        token = NotesTokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def test_requires_bearer_token(self):
+        resp = await self.async_client.get("/api/async/notes/")
+        self.assertEqual(resp.status_code, 401)
+        self.assertIn("Bearer", resp["WWW-Authenticate"])
+
+    async def test_crud_round_trip(self):
+        resp = await self.async_client.post(
+            "/api/async/notes/",
+            {"title": "async", "content": "body"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(resp.status_code, 201, resp.content)
+        note = resp.json()
+        self.assertEqual(note["owner"], "async")
+        url = f"/api/async/notes/{note['id']}/"
+
+        resp = await self.async_client.patch(
+            url, {"status": "DONE"}, content_type="application/json", headers=self.headers
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.json()["status"], "DONE")
+
+        resp = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(resp.json()["status"], "DONE")
+        resp = await self.async_client.get(
+            url, headers={**self.headers, "If-None-Match": resp["ETag"]}
+        )
+        self.assertEqual(resp.status_code, 304)
+
+        resp = await self.async_client.delete(url, headers=self.headers)
+        self.assertEqual(resp.status_code, 204)
+        self.assertFalse(await Note.objects.filter(pk=note["id"]).aexists())
+
+    async def test_validation_and_scoping_errors_match_the_sync_api(self):
+        resp = await self.async_client.post(
+            "/api/async/notes/", {}, content_type="application/json", headers=self.headers
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("title", resp.json())
+
+        resp = await self.async_client.get(
+            f"/api/async/notes/{self.secret.pk}/", headers=self.headers
+        )
+        self.assertEqual(resp.status_code, 404)
+
+        resp = await self.async_client.get("/api/async/notes/?status=NOPE", headers=self.headers)
+        self.assertEqual(resp.status_code, 400)
+
+    def test_list_pages_like_the_sync_api(self):
+        Note.objects.bulk_create([Note(owner=self.user, title=f"n{i}") for i in range(5)])
+        sync_client = auth_client_for(self.user)
+
+        sync_ids, async_ids = [], []
+        url = "/api/notes/?page_size=2"
+        while url:
+            page = sync_client.get(url).json()
+            sync_ids += [n["id"] for n in page["results"]]
+            url = page["next"]
+        url = "/api/async/notes/?page_size=2"
+        while url:
+            page = self.client.get(url, headers=self.headers).json()
+            self.assertIsNone(page["previous"])
+            async_ids += [n["id"] for n in page["results"]]
+            url = page["next"]
+
+        self.assertEqual(async_ids, sync_ids)
+        self.assertEqual(len(async_ids), 5)
+
+    async def test_if_match_mismatch_is_412(self):
+        note = await Note.objects.acreate(owner=self.user, title="v1")
+        resp = await self.async_client.delete(
+            f"/api/async/notes/{note.pk}/", headers={**self.headers, "If-Match": '"stale"'}
+        )
+        self.assertEqual(resp.status_code, 412)
+
+    async def test_write_racing_past_the_if_match_check_is_412(self):
+        note = await Note.objects.acreate(owner=self.user, title="v1")
+        url = f"/api/async/notes/{note.pk}/"
+        etag = (await self.async_client.get(url, headers=self.headers))["ETag"]
+        check = async_views.check_if_match
+
+        def check_then_lose_the_race(request, obj):
+            check(request, obj)
+            # As if another writer saved the row right after the check.
+            obj.updated_at -= timedelta(seconds=1)
+
+        headers = {**self.headers, "If-Match": etag}
+        with mock.patch.object(async_views, "check_if_match", check_then_lose_the_race):
+            resp = await self.async_client.patch(
+                url, {"title": "v2"}, content_type="application/json", headers=headers
+            )
+            self.assertEqual(resp.status_code, 412)
+            resp = await self.async_client.delete(url, headers=headers)
+            self.assertEqual(resp.status_code, 412)
+        await note.arefresh_from_db()
+        self.assertEqual(note.title, "v1")
+
+        resp = await self.async_client.patch(
+            url, {"title": "v2"}, content_type="application/json", headers=headers
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.json()["title"], "v2")
+        self.assertNotEqual(resp["ETag"], etag)
@@ -0,0 +1,60 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from notes.cache import get_list_cache
+from notes.management.commands.bench_api import compare
+from notes.models import Note
+
+# Tests run with DEBUG=False.
+SMALL = {"users": 2, "notes": 5, "requests": 6, "token_requests": 1, "allow_prod": True}
+
+
+class BenchAPICommandTests(TestCase):
+    def setUp(self):
+        get_list_cache().clear()
+        self.baseline = Path(tempfile.mkdtemp()) / "baseline.json"
+
+    def run_bench(self, **opts):
+        out = StringIO()
+        call_command(
+            "bench_api", baseline=str(self.baseline), stdout=out, stderr=out, **{**SMALL, **opts}
+        )
+        return out.getvalue()
+
+    def test_save_records_every_scenario_and_cleans_up(self):
+        self.run_bench(save=True)
+        data = json.loads(self.baseline.read_text())
+        self.assertEqual(
+            sorted(data["client"]),
+            sorted(["list", "detail", "create", "update", "delete", "health", "token"]),
+        )
+        for result in data["client"].values():
+            self.assertEqual(result["errors"], 0)
+            self.assertIn("p95_ms", result)
+            self.assertIn("queries", result)
+        self.assertFalse(Note.objects.filter(title__startswith="Bench").exists())
+
+    def test_more_queries_than_the_baseline_fails(self):
+        self.run_bench(save=True)
+        data = json.loads(self.baseline.read_text())
+        data["client"]["detail"]["queries"] = 0
+        self.baseline.write_text(json.dumps(data))
+        with self.assertRaisesMessage(CommandError, "regression"):
+            self.run_bench()
+
+    def test_refuses_to_run_without_debug(self):
+        with self.assertRaisesMessage(CommandError, "--allow-prod"):
+            self.run_bench(allow_prod=False)
+        self.assertFalse(Note.objects.exists())
+
+    def test_tolerance_and_absolute_floor(self):
+        base = {"client": {"list": {"errors": 0, "p50_ms": 10.0, "p95_ms": 2.0, "rps": 100.0}}}
+        slower = {"client": {"list": {"errors": 0, "p50_ms": 14.0, "p95_ms": 2.9, "rps": 70.0}}}
+        regressions = compare(slower, base, tolerance=0.25, min_delta_ms=1.0)
+        # p95 grew 45% but by less than 1ms; p50 +40% and rps -30% both count.
+        self.assertEqual(len(regressions), 2, regressions)
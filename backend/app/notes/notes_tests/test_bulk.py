@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class NoteBulkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="bulk", password="pass12345")
+        cls.other = User.objects.create_user(username="other", password="pass12345")
+        cls.notes = Note.objects.bulk_create(
+            [Note(owner=cls.user, title=f"n{i}") for i in range(5)]
+        )
+        cls.foreign = Note.objects.create(owner=cls.other, title="not yours")
+
+    def setUp(self):
+        self.client = auth_client_for(self.user)
+
+    def post(self, payload):
+        return self.client.post("/api/notes/bulk/", payload, format="json")
+
+    def test_mixed_batch(self):
+        a, b, c, d, _ = self.notes
+        resp = self.post(
+            {
+                "create": [{"title": "new 1"}, {"title": "new 2", "status": "DONE"}],
+                "update": [{"id": a.pk, "status": "DONE"}, {"id": b.pk, "title": "renamed"}],
+                "delete": [c.pk, d.pk, 999999],
+            }
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        body = resp.json()
+        self.assertEqual([n["title"] for n in body["created"]], ["new 1", "new 2"])
+        self.assertTrue(all(n["owner"] == "bulk" for n in body["created"]))
+        self.assertEqual([n["id"] for n in body["updated"]], [a.pk, b.pk])
+        self.assertEqual(body["deleted"], [c.pk, d.pk])
+        self.assertEqual(body["not_found"], [999999])
+
+        a.refresh_from_db()
+        b.refresh_from_db()
+        self.assertEqual(a.status, Note.Status.DONE)
+        self.assertGreater(a.updated_at, a.created_at)
+        self.assertEqual(b.title, "renamed")
+        self.assertFalse(Note.objects.filter(pk__in=[c.pk, d.pk]).exists())
+
+    def test_mass_status_change_is_a_few_queries(self):
+        more = Note.objects.bulk_create([Note(owner=self.user, title=f"m{i}") for i in range(200)])
+        payload = {"update": [{"id": n.pk, "status": "DONE"} for n in more]}
+        # savepoint pair, select-for-update, one UPDATE (auth state is cached)
+        with self.assertNumQueries(4):
+            resp = self.post(payload)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(Note.objects.filter(owner=self.user, status="DONE").count(), 200)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        resp = self.post(
+            {
+                "create": [{"title": "fine"}, {"content": "no title"}],
+                "delete": [self.notes[0].pk],
+            }
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("title", resp.json()["create"][1])
+        self.assertFalse(Note.objects.filter(title="fine").exists())
+        self.assertTrue(Note.objects.filter(pk=self.notes[0].pk).exists())
+
+    def test_scoped_to_owner(self):
+        resp = self.post({"update": [{"id": self.foreign.pk, "title": "pwned"}]})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.post({"delete": [self.foreign.pk]})
+        self.assertEqual(resp.json()["not_found"], [self.foreign.pk])
+        self.assertTrue(Note.objects.filter(pk=self.foreign.pk).exists())
+
+    @override_settings(NOTES_BULK_MAX_ITEMS=2)
+    def test_batch_size_limit(self):
+        resp = self.post({"create": [{"title": "x"}] * 3})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_update_requires_ids(self):
+        resp = self.post({"update": [{"title": "who?"}]})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("update", resp.json())
@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notes.cache import LocMemLRUBackend, get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class LocMemLRUBackendTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LocMemLRUBackend(max_entries=2, timeout=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual(lru.get("a"), 1)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(len(lru), 2)
+
+    def test_expired_entries_are_dropped(self):
+        lru = LocMemLRUBackend(max_entries=2, timeout=-1)
+        lru.set("a", 1)
+        self.assertIsNone(lru.get("a"))
+
+
+class NotesListCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="cache", password="pass12345")
+
+    def setUp(self):
+        self.cache = get_list_cache()
+        self.cache.clear()
+        self.client = auth_client_for(self.user)
+
+    def test_repeat_list_is_a_hit(self):
+        Note.objects.create(owner=self.user, title="a")
+        self.client.get("/api/notes/")
+        with self.assertNumQueries(1):  # ETag aggregate (auth state is cached)
+            resp = self.client.get("/api/notes/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_writes_invalidate_cached_list(self):
+        self.client.get("/api/notes/")
+        create = self.client.post("/api/notes/", {"title": "fresh"}, format="json")
+        note_id = create.json()["id"]
+        titles = [n["title"] for n in self.client.get("/api/notes/").json()["results"]]
+        self.assertEqual(titles, ["fresh"])
+
+        self.client.patch(f"/api/notes/{note_id}/", {"title": "renamed"}, format="json")
+        titles = [n["title"] for n in self.client.get("/api/notes/").json()["results"]]
+        self.assertEqual(titles, ["renamed"])
+
+        self.client.delete(f"/api/notes/{note_id}/")
+        self.assertEqual(self.client.get("/api/notes/").json()["results"], [])
+
+    def test_cache_is_per_user(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        Note.objects.create(owner=other, title="theirs")
+        auth_client_for(other).get("/api/notes/")
+        self.assertEqual(self.client.get("/api/notes/").json()["results"], [])
+
+    @override_settings(NOTES_LIST_CACHE={"BACKEND": "none"})
+    def test_can_be_disabled(self):
+        self.assertIsNone(get_list_cache())
+        resp = self.client.get("/api/notes/")
+        self.assertEqual(resp.status_code, 200)
+
+    def test_writes_outside_the_api_invalidate_too(self):
+        note = Note.objects.create(owner=self.user, title="a")
+        etag = self.client.get("/api/notes/")["ETag"]
+        # An admin edit, say: no API view involved.
+        note.title = "edited"
+        note.save()
+        resp = self.client.get("/api/notes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([n["title"] for n in resp.json()["results"]], ["edited"])
+        generation = self.cache.generation(self.user.pk)
+        Note.objects.filter(owner=self.user).delete()  # as a user cascade does
+        self.assertNotEqual(self.cache.generation(self.user.pk), generation)
+
+    def test_cached_page_always_matches_its_etag(self):
+        Note.objects.create(owner=self.user, title="a")
+        first = self.client.get("/api/notes/")
+        # A write that bypasses signals and the generation (raw queryset update).
+        Note.objects.filter(owner=self.user).update(title="b", updated_at=timezone.now())
+        second = self.client.get("/api/notes/")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(second.json()["results"][0]["title"], "b")
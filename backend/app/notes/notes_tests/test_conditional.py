@@ -0,0 +1,81 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class ConditionalRequestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="etag", password="pass12345")
+        cls.note = Note.objects.create(owner=cls.user, title="v1")
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = auth_client_for(self.user)
+
+    def test_list_304_on_matching_etag(self):
+        first = self.client.get("/api/notes/")
+        etag = first["ETag"]
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        again = self.client.get("/api/notes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+        self.assertEqual(again["ETag"], etag)
+
+    def test_list_etag_changes_on_write(self):
+        etag = self.client.get("/api/notes/")["ETag"]
+        self.client.post("/api/notes/", {"title": "v2"}, format="json")
+        resp = self.client.get("/api/notes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+    def test_list_etag_varies_by_page(self):
+        a = self.client.get("/api/notes/")["ETag"]
+        b = self.client.get("/api/notes/?page_size=1")["ETag"]
+        self.assertNotEqual(a, b)
+
+    def test_detail_304_and_last_modified(self):
+        url = f"/api/notes/{self.note.pk}/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304)
+        resp = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_if_match_guards_updates(self):
+        url = f"/api/notes/{self.note.pk}/"
+        etag = self.client.get(url)["ETag"]
+
+        ok = self.client.patch(url, {"title": "v2"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(ok.status_code, 200)
+        self.assertNotEqual(ok["ETag"], etag)
+
+        # The old validator is now stale: a second writer loses.
+        stale = self.client.patch(url, {"title": "v3"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 412)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, "v2")
+
+        gone = self.client.delete(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(gone.status_code, 412)
+
+    @skipUnless(connection.features.has_select_for_update, "needs SELECT ... FOR UPDATE")
+    def test_if_match_check_holds_a_row_lock(self):
+        url = f"/api/notes/{self.note.pk}/"
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.patch(url, {"title": "v2"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        read = next(q["sql"] for q in queries if q["sql"].startswith("SELECT"))
+        self.assertIn("FOR UPDATE", read)
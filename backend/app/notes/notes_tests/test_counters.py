@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from notes.cache import get_list_cache
+from notes.counters import status_counts
+from notes.models import Note, NoteStatusCounter
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class NoteStatusCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="counted", password="pass12345")
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = auth_client_for(self.user)
+
+    def assertCounts(self, **expected):
+        counts = status_counts(self.user.pk)
+        self.assertEqual({k: v for k, v in counts.items() if v}, expected)
+
+    def test_counts_follow_every_write_path(self):
+        note = Note.objects.create(owner=self.user, title="a")
+        Note.objects.bulk_create([Note(owner=self.user, title=f"b{i}") for i in range(3)])
+        self.assertCounts(OPEN=4)
+
+        note.status = Note.Status.DONE
+        note.save()
+        self.assertCounts(OPEN=3, DONE=1)
+
+        # Saving without a status change must not double count.
+        note.title = "renamed"
+        note.save()
+        self.assertCounts(OPEN=3, DONE=1)
+
+        Note.objects.filter(owner=self.user, status="OPEN").update(status="IN_PROGRESS")
+        self.assertCounts(IN_PROGRESS=3, DONE=1)
+
+        Note.objects.filter(owner=self.user, status="IN_PROGRESS").delete()
+        note.delete()
+        self.assertCounts()
+
+    def test_stats_endpoint_is_one_query(self):
+        Note.objects.create(owner=self.user, title="a")
+        Note.objects.create(owner=self.user, title="b", status="IN_PROGRESS")
+        with self.assertNumQueries(1):  # counters (auth state is cached)
+            resp = self.client.get("/api/notes/stats/")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(
+            resp.json(),
+            {
+                "total": 2,
+                "by_status": {"OPEN": 1, "IN_PROGRESS": 1, "DONE": 0, "ARCHIVED": 0},
+            },
+        )
+
+    def test_rebuild_command_repairs_drift(self):
+        Note.objects.create(owner=self.user, title="a")
+        NoteStatusCounter.objects.filter(owner=self.user).update(count=42)
+        out = StringIO()
+        call_command("rebuild_note_counters", stdout=out)
+        self.assertIn("Rebuilt 1 counter rows", out.getvalue())
+        self.assertCounts(OPEN=1)
+
+    def test_list_status_filter(self):
+        Note.objects.create(owner=self.user, title="open")
+        Note.objects.create(owner=self.user, title="doing", status="IN_PROGRESS")
+        Note.objects.create(owner=self.user, title="done", status="DONE")
+        resp = self.client.get("/api/notes/?status=OPEN,IN_PROGRESS")
+        self.assertEqual({n["title"] for n in resp.json()["results"]}, {"open", "doing"})
+
+        resp = self.client.get("/api/notes/?status=NOPE")
+        self.assertEqual(resp.status_code, 400)
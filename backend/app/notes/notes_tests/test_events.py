@@ -0,0 +1,230 @@
+import asyncio
+import json
+import threading
+
+from app.authentication import NotesTokenObtainPairSerializer
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from notes.events import (
+    BUFFER_SIZE,
+    QUEUE_SIZE,
+    RESYNC,
+    LocalBroker,
+    PostgresBroker,
+    get_broker,
+    notify_payloads,
+)
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+def event(kind, event_id, *ids):
+    return {"type": kind, "ids": list(ids), "event_id": str(event_id)}
+
+
+class LocalBrokerTests(SimpleTestCase):
+    async def test_dispatch_from_another_thread_reaches_the_owner_only(self):
+        broker = LocalBroker()
+        mine, theirs = broker.subscribe(1), broker.subscribe(2)
+        thread = threading.Thread(target=broker.dispatch, args=(1, event("changed", 1, 7)))
+        thread.start()
+        thread.join()
+        self.assertEqual((await mine.get(1))["ids"], [7])
+        self.assertTrue(theirs.queue.empty())
+
+        broker.unsubscribe(mine)
+        broker.dispatch(1, event("changed", 2, 8))
+        await asyncio.sleep(0)
+        self.assertTrue(mine.queue.empty())
+
+    async def test_a_client_that_falls_behind_is_told_to_resync(self):
+        broker = LocalBroker()
+        sub = broker.subscribe(1)
+        for i in range(QUEUE_SIZE + 1):
+            broker.dispatch(1, event("changed", i, i))
+        await asyncio.sleep(0)
+        self.assertEqual(sub.queue.qsize(), 1)
+        self.assertEqual(await sub.get(1), RESYNC)
+
+    def test_replay(self):
+        broker = LocalBroker()
+        first = broker.since + 1
+        broker.dispatch(1, event("changed", first, 7))
+        broker.dispatch(2, event("changed", first + 1, 8))
+        broker.dispatch(1, event("deleted", first + 2, 7))
+        self.assertEqual([e["type"] for e in broker.replay(1, first)], ["deleted"])
+        self.assertEqual(broker.replay(1, first + 2), [])
+        # Before this broker started, or past the buffer: unknown.
+        self.assertIsNone(broker.replay(1, broker.since - 1))
+        for i in range(BUFFER_SIZE):
+            broker.dispatch(3, event("changed", first + 10 + i, i))
+        self.assertIsNone(broker.replay(1, first))
+
+    def test_large_events_are_split_to_fit_pg_notify(self):
+        ids = [2**63 - i for i in range(1000)]
+        payloads = notify_payloads(1, {"type": "deleted", "ids": ids})
+        self.assertGreater(len(payloads), 1)
+        self.assertTrue(all(len(p.encode()) < 8000 for p in payloads))
+        events = [json.loads(p) for p in payloads]
+        self.assertEqual([i for e in events for i in e["ids"]], ids)
+        self.assertEqual({(e["owner"], e["type"]) for e in events}, {("1", "deleted")})
+        event_ids = [int(e["event_id"]) for e in events]
+        self.assertEqual(event_ids, sorted(set(event_ids)))
+
+
+class RecordingBroker(PostgresBroker):
+    """Keeps what would go to pg_notify, so batching runs on any database."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def notify(self, payloads):
+        self.sent.append([json.loads(p) for p in payloads])
+
+
+class PostgresBrokerBatchTests(TestCase):
+    def test_a_transaction_notifies_once_on_commit(self):
+        broker = RecordingBroker()
+        with self.captureOnCommitCallbacks(execute=True):
+            broker.publish(1, {"type": "changed", "ids": [5]})
+            broker.publish(2, {"type": "changed", "ids": [6]})
+            broker.publish(1, {"type": "changed", "ids": [7, 5]})
+            broker.publish(1, {"type": "deleted", "ids": [5]})
+            self.assertEqual(broker.sent, [])
+        [events] = broker.sent
+        self.assertEqual(
+            [(e["owner"], e["type"], e["ids"]) for e in events],
+            [("1", "changed", [5, 7]), ("2", "changed", [6]), ("1", "deleted", [5])],
+        )
+        event_ids = [int(e["event_id"]) for e in events]
+        self.assertEqual(event_ids, sorted(set(event_ids)))
+
+    def test_rolled_back_events_are_not_sent(self):
+        broker = RecordingBroker()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    broker.publish(1, {"type": "changed", "ids": [5]})
+                    raise ValueError
+            except ValueError:
+                pass
+            broker.publish(1, {"type": "changed", "ids": [6]})
+        self.assertEqual([[e["ids"] for e in events] for events in broker.sent], [[[6]]])
+
+
+@override_settings(NOTES_EVENTS_BROKER="local")
+class NoteEventSignalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="events", password="pass12345")
+        self.client = auth_client_for(self.user)
+        get_broker()._recent.clear()
+
+    def recent(self):
+        return [(owner, e["type"], e["ids"]) for owner, e in get_broker()._recent]
+
+    def test_saves_and_deletes_publish_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            note = Note.objects.create(owner=self.user, title="a")
+            self.assertEqual(self.recent(), [])  # not before the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            Note.objects.filter(pk=note.pk).delete()
+        owner = str(self.user.pk)
+        self.assertEqual(
+            self.recent(), [(owner, "changed", [note.pk]), (owner, "deleted", [note.pk])]
+        )
+
+    def test_bulk_endpoint_publishes_what_skips_signals(self):
+        note = Note.objects.create(owner=self.user, title="a")
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                "/api/notes/bulk/",
+                {"create": [{"title": "b"}], "update": [{"id": note.pk, "status": "DONE"}]},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        created = resp.json()["created"][0]["id"]
+        self.assertEqual(self.recent(), [(str(self.user.pk), "changed", [created, note.pk])])
+
+
+@override_settings(NOTES_EVENTS_BROKER="local", NOTES_EVENTS_STREAM_SECONDS=5)
+class NoteEventsEndpointTests(TestCase):
+    url = "/api/async/notes/events/"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="listener", password="pass12345")
+
+    def setUp(self):
+        self.token = str(NotesTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+        get_broker()._recent.clear()
+
+    async def test_requires_a_token_header_or_a_stream_ticket(self):
+        resp = await self.async_client.get(self.url, {"timeout": 0})
+        self.assertEqual(resp.status_code, 401)
+        # Access tokens are not taken from the URL, where access logs would keep them.
+        resp = await self.async_client.get(self.url, {"timeout": 0, "token": self.token})
+        self.assertEqual(resp.status_code, 401)
+
+        ticket = await sync_to_async(self.ticket)()
+        resp = await self.async_client.get(self.url, {"timeout": 0, "ticket": ticket})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"events": [], "last_event_id": None})
+        resp = await self.async_client.get(self.url, {"timeout": 0, "ticket": ticket})
+        self.assertEqual(resp.status_code, 401)
+        # Nor is a ticket an access token.
+        resp = await self.async_client.get(
+            self.url, {"timeout": 0}, headers={"Authorization": f"Bearer {ticket}"}
+        )
+        self.assertEqual(resp.status_code, 401)
+
+    def ticket(self):
+        resp = self.client.post("/api/notes/events/ticket/", headers=self.headers)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()["ticket"]
+
+    def test_not_served_on_wsgi(self):
+        resp = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(resp.status_code, 501)
+
+    async def test_long_poll_returns_on_the_first_event(self):
+        broker = get_broker()
+        poll = asyncio.ensure_future(self.async_client.get(self.url, headers=self.headers))
+        while not broker._subscribers:
+            await asyncio.sleep(0.01)
+        broker.dispatch(self.user.pk, event("changed", broker.since + 1, 5))
+        broker.dispatch(self.user.pk, event("changed", broker.since + 2, 6))
+        body = (await poll).json()
+        self.assertEqual([e["ids"] for e in body["events"]], [[5], [6]])
+        self.assertEqual(body["last_event_id"], str(broker.since + 2))
+
+        # Resuming from an id the buffer covers replays; an unknown one resyncs.
+        resp = await self.async_client.get(
+            self.url, {"last_event_id": broker.since + 1}, headers=self.headers
+        )
+        self.assertEqual([e["ids"] for e in resp.json()["events"]], [[6]])
+        resp = await self.async_client.get(self.url, {"last_event_id": 1}, headers=self.headers)
+        self.assertEqual(resp.json()["events"], [RESYNC])
+
+    async def test_event_stream(self):
+        broker = get_broker()
+        resp = await self.async_client.get(
+            self.url, headers={**self.headers, "Accept": "text/event-stream"}
+        )
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        chunks = aiter(resp.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 3000\n\n")
+
+        broker.dispatch(self.user.pk, event("deleted", broker.since + 1, 9))
+        message = (await anext(chunks)).decode().splitlines()
+        self.assertEqual(message[:2], [f"id: {broker.since + 1}", "event: deleted"])
+        self.assertEqual(json.loads(message[2].removeprefix("data: "))["ids"], [9])
+        # Django closes the response after sending it, also on disconnect.
+        await sync_to_async(resp.close)()
+        self.assertEqual(broker._subscribers, {})
@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class NoteExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="exporter", password="pass12345")
+        other = User.objects.create_user(username="other", password="pass12345")
+        Note.objects.create(owner=other, title="not mine")
+        notes = Note.objects.bulk_create(
+            [Note(owner=cls.user, title=f"n{i}", content=f"body, {i}") for i in range(5)]
+        )
+        base = timezone.now() - timedelta(days=1)
+        for i, note in enumerate(notes):
+            # notes 2 and 3 share a timestamp to exercise the id tie-breaker
+            note.updated_at = base + timedelta(minutes=min(i, 3) if i != 3 else 2)
+        Note.objects.bulk_update(notes, ["updated_at"])
+        cls.notes = notes
+
+    def setUp(self):
+        self.client = auth_client_for(self.user)
+
+    def fetch(self, query=""):
+        resp = self.client.get(f"/api/notes/export/{query}")
+        self.assertEqual(resp.status_code, 200, getattr(resp, "content", b""))
+        self.assertTrue(resp.streaming)
+        return resp, b"".join(resp.streaming_content).decode()
+
+    def test_ndjson_is_default_and_ordered(self):
+        resp, body = self.fetch()
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["title"] for r in records], ["n0", "n1", "n2", "n3", "n4"])
+        self.assertEqual(records[0]["owner"], "exporter")
+        self.assertEqual(records[0]["content"], "body, 0")
+
+    def test_json_and_csv(self):
+        _, body = self.fetch("?format=json")
+        self.assertEqual(len(json.loads(body)), 5)
+
+        resp, body = self.fetch("?format=csv")
+        self.assertTrue(resp["Content-Type"].startswith("text/csv"))
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["content"], "body, 0")
+
+    def test_resume_from_watermark(self):
+        _, body = self.fetch()
+        records = [json.loads(line) for line in body.splitlines()]
+        last = records[2]  # pretend the connection dropped after the 3rd record
+        _, rest = self.fetch(f"?since={last['updated_at']}&after_id={last['id']}")
+        resumed = [json.loads(line)["title"] for line in rest.splitlines()]
+        self.assertEqual(resumed, ["n3", "n4"])
+
+    def test_bad_watermark_is_400(self):
+        resp = self.client.get("/api/notes/export/?since=yesterday")
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get("/api/notes/export/?after_id=3")
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+from notes.renderers import FastJSONRenderer
+from notes.serializers import NoteListSerializer, NoteRowSerializer, NoteSerializer
+
+User = get_user_model()
+
+
+class FastPathTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="fäst", password="pass12345")
+        Note.objects.create(owner=cls.user, title="plain", content="x")
+        Note.objects.create(
+            owner=cls.user,
+            title='ünïcødé "quotes" \\ \u2028 line sep',
+            content="emoji 🚀\nnewline\ttab",
+            status=Note.Status.IN_PROGRESS,
+        )
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = auth_client_for(self.user)
+
+    def test_rows_match_serializer_byte_for_byte(self):
+        qs = Note.objects.filter(owner=self.user).select_related("owner")
+        for fields in (NoteListSerializer.Meta.fields, NoteSerializer.Meta.fields, ["title"]):
+            rows = NoteRowSerializer(fields)
+            fast = rows.to_representation(qs.values(*rows.value_columns))
+            slow = NoteSerializer(qs, many=True, fields=fields).data
+            self.assertEqual(FastJSONRenderer().render(fast), JSONRenderer().render(slow), fields)
+
+    def test_renderer_matches_drf_for_native_types(self):
+        data = {"a": [1, True, None, "x y"], "b": {"c": "é"}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_list_endpoint_same_bytes_both_paths(self):
+        for query in ("", "?fields=id,title,content,owner", "?q=plain"):
+            fast = self.client.get(f"/api/notes/{query}").content
+            get_list_cache().clear()
+            with override_settings(NOTES_FAST_SERIALIZATION=False):
+                slow = self.client.get(f"/api/notes/{query}").content
+            self.assertEqual(fast, slow, query)
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="sparse", password="pass12345")
+        cls.note = Note.objects.create(owner=cls.user, title="t", content="a long body")
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = auth_client_for(self.user)
+
+    def test_default_list_is_compact_and_skips_content_column(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/notes/")
+        item = resp.json()["results"][0]
+        self.assertEqual(set(item), {"id", "title", "status", "created_at", "updated_at"})
+        page_sql = ctx.captured_queries[-1]["sql"]
+        self.assertNotIn('"content"', page_sql)
+
+    def test_fields_param(self):
+        resp = self.client.get("/api/notes/?fields=id,title")
+        self.assertEqual(resp.json()["results"], [{"id": self.note.pk, "title": "t"}])
+
+        resp = self.client.get("/api/notes/?fields=id,content,owner")
+        self.assertEqual(
+            resp.json()["results"],
+            [{"id": self.note.pk, "content": "a long body", "owner": "sparse"}],
+        )
+
+    def test_unknown_field_is_400(self):
+        resp = self.client.get("/api/notes/?fields=id,password")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_detail_is_full(self):
+        resp = self.client.get(f"/api/notes/{self.note.pk}/")
+        self.assertEqual(resp.json()["content"], "a long body")
+        self.assertEqual(resp.json()["owner"], "sparse")
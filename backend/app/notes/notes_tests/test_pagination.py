@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+
+User = get_user_model()
+
+
+class NotePaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="pager", password="pass12345")
+        now = timezone.now()
+        notes = Note.objects.bulk_create([Note(owner=cls.user, title=f"n{i}") for i in range(7)])
+        # Give three notes the same timestamp so the id tie-breaker matters.
+        for i, note in enumerate(notes):
+            note.updated_at = now if i < 3 else now - timedelta(minutes=i)
+        Note.objects.bulk_update(notes, ["updated_at"])
+
+    def setUp(self):
+        get_list_cache().clear()
+
+    def test_pages_cover_all_notes_once_in_order(self):
+        client = auth_client_for(self.user)
+        seen = []
+        url = "/api/notes/?page_size=2"
+        while url:
+            resp = client.get(url)
+            self.assertEqual(resp.status_code, 200, resp.content)
+            body = resp.json()
+            self.assertLessEqual(len(body["results"]), 2)
+            seen.extend(n["id"] for n in body["results"])
+            url = body["next"]
+
+        expected = list(
+            Note.objects.filter(owner=self.user)
+            .order_by("-updated_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        client = auth_client_for(self.user)
+        first = client.get("/api/notes/?page_size=3").json()
+        second = client.get(first["next"]).json()
+        self.assertIsNotNone(second["previous"])
+        back = client.get(second["previous"]).json()
+        self.assertEqual([n["id"] for n in back["results"]], [n["id"] for n in first["results"]])
+
+    def test_invalid_cursor_is_404(self):
+        client = auth_client_for(self.user)
+        resp = client.get("/api/notes/?cursor=cD1nYXJiYWdl")
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,59 @@
+from app.authentication import user_is_active
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+from notes.notes_tests.utils import query_budget
+
+User = get_user_model()
+
+# Maximum SQL statements per request, independent of how many notes exist.
+# Raise a budget only with a reason.
+BUDGETS = {
+    # Bearer auth is stateless (the active flag is cached): no auth query.
+    "list": 2,  # ETag aggregate, page
+    "list_with_owner": 2,  # owner comes from the same JOIN
+    "search": 3,  # ETag aggregate, count, page
+    "stats": 1,
+    "detail": 1,  # note
+    "create": 1,  # INSERT
+    "update": 2,  # SELECT, UPDATE
+    "delete": 2,  # SELECT, DELETE
+}
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="budget", password="pass12345")
+        Note.objects.bulk_create(
+            [Note(owner=cls.user, title=f"note {i}", content="body") for i in range(25)]
+        )
+        cls.note = Note.objects.filter(owner=cls.user).first()
+
+    def setUp(self):
+        get_list_cache().clear()
+        user_is_active(self.user.pk)  # budgets describe a warm auth-state cache
+        self.client = auth_client_for(self.user)
+
+    def check(self, name, method, url, data=None):
+        with query_budget(self, BUDGETS[name], label=f"{method.upper()} {url}"):
+            resp = getattr(self.client, method)(url, data, format="json")
+        self.assertLess(resp.status_code, 400, resp.content)
+        return resp
+
+    def test_reads(self):
+        self.check("list", "get", "/api/notes/")
+        get_list_cache().clear()
+        self.check("list_with_owner", "get", "/api/notes/?fields=id,owner")
+        self.check("search", "get", "/api/notes/?q=note")
+        self.check("stats", "get", "/api/notes/stats/")
+        self.check("detail", "get", f"/api/notes/{self.note.pk}/")
+
+    def test_writes(self):
+        created = self.check("create", "post", "/api/notes/", {"title": "new"})
+        url = f"/api/notes/{created.json()['id']}/"
+        self.check("update", "patch", url, {"status": "DONE"})
+        self.check("delete", "delete", url)
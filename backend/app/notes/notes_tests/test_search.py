@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from notes.cache import get_list_cache
+from notes.models import Note
+from notes.notes_tests.test_api import auth_client_for
+from notes.search import _fts5_query, _tsquery, search_notes
+
+User = get_user_model()
+
+
+class NoteSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="finder", password="pass12345")
+        cls.other = User.objects.create_user(username="other", password="pass12345")
+        cls.title_hit = Note.objects.create(owner=cls.user, title="Database backups")
+        cls.body_hit = Note.objects.create(
+            owner=cls.user, title="Chores", content="rotate the database credentials"
+        )
+        Note.objects.create(owner=cls.user, title="Groceries", content="milk and eggs")
+        Note.objects.create(owner=cls.other, title="database secrets")
+
+    def setUp(self):
+        get_list_cache().clear()
+        self.client = auth_client_for(self.user)
+
+    def test_ranked_and_scoped(self):
+        resp = self.client.get("/api/notes/", {"q": "database"})
+        self.assertEqual(resp.status_code, 200, resp.content)
+        body = resp.json()
+        self.assertEqual(body["count"], 2)
+        # Title matches outrank body matches.
+        self.assertEqual([n["id"] for n in body["results"]], [self.title_hit.pk, self.body_hit.pk])
+
+    def test_stemming_and_prefix(self):
+        ids = {n["id"] for n in self.client.get("/api/notes/?q=backup").json()["results"]}
+        self.assertEqual(ids, {self.title_hit.pk})
+        ids = {n["id"] for n in self.client.get("/api/notes/?q=grocer").json()["results"]}
+        self.assertEqual(len(ids), 1)
+
+    def test_index_follows_writes(self):
+        note = Note.objects.create(owner=self.user, title="kubernetes upgrade")
+        qs = Note.objects.filter(owner=self.user)
+        self.assertEqual(list(search_notes(qs, "kubernetes")), [note])
+
+        note.title = "helm upgrade"
+        note.save()
+        self.assertFalse(search_notes(qs, "kubernetes").exists())
+        self.assertTrue(search_notes(qs, "helm").exists())
+
+        note.delete()
+        self.assertFalse(search_notes(qs, "helm").exists())
+
+    def test_operator_syntax_is_treated_as_text(self):
+        resp = self.client.get("/api/notes/", {"q": 'data* OR "NEAR('})
+        self.assertEqual(resp.status_code, 200)
+
+    def test_admin_changelist_uses_index(self):
+        admin = User.objects.create_superuser(username="root", password="pass12345")
+        self.client.force_login(admin)
+        resp = self.client.get("/admin/notes/note/", {"q": "backups"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Database backups")
+        self.assertNotContains(resp, "Groceries")
+
+
+class QuerySyntaxTests(SimpleTestCase):
+    def test_both_backends_prefix_the_last_term(self):
+        query = 'data* OR "NEAR(grocer'
+        self.assertEqual(_fts5_query(query), '"data" "OR" "NEAR" "grocer"*')
+        self.assertEqual(_tsquery(query), "'data' & 'OR' & 'NEAR' & 'grocer':*")
+        self.assertIsNone(_tsquery("-- !"))
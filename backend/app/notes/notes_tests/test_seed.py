@@ -0,0 +1,47 @@
+from io import StringIO
+
+from django.contrib.auth import authenticate, get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notes.counters import status_counts
+from notes.models import Note
+
+User = get_user_model()
+
+
+@override_settings(DEBUG=True)
+class SeedDemoBulkTests(TestCase):
+    def seed(self, **opts):
+        call_command("seed_demo", bulk=True, batch_size=50, stdout=StringIO(), **opts)
+
+    def test_bulk_seed_sets_timestamps_at_insert(self):
+        self.seed(users=10, notes=30)
+        self.assertEqual(User.objects.filter(email__endswith="@example.test").count(), 10)
+        self.assertEqual(Note.objects.count(), 300)
+
+        now = timezone.now()
+        for note in Note.objects.all():
+            self.assertLessEqual(note.created_at, note.updated_at)
+            self.assertLessEqual(note.updated_at, now)
+        spread = Note.objects.values_list("created_at", flat=True).distinct().count()
+        self.assertGreater(spread, 1)
+
+        # Counter triggers see bulk inserts like any other.
+        demo = User.objects.get(username="demo")
+        self.assertEqual(sum(status_counts(demo.pk).values()), 30)
+        self.assertIsNotNone(authenticate(username="user9", password="demo1234"))
+
+    def test_rerun_only_tops_up_with_set_based_queries(self):
+        self.seed(users=10, notes=5)
+        with self.assertNumQueries(3):  # user lookup, password update, note counts
+            self.seed(users=10, notes=5)
+        self.seed(users=12, notes=7)
+        self.assertEqual(Note.objects.count(), 12 * 7)
+
+    def test_bulk_clear(self):
+        self.seed(users=4, notes=3)
+        self.seed(users=4, clear=True)
+        self.assertFalse(User.objects.filter(username__in=["demo", "dana"]).exists())
+        self.assertEqual(Note.objects.count(), 0)
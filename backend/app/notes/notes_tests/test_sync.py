@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notes.models import Note, NoteDeletion
+from notes.notes_tests.test_api import auth_client_for
+from notes.sync import encode_sync_cursor
+
+User = get_user_model()
+
+
+@override_settings(NOTES_SYNC_LAG_SECONDS=0)
+class NoteSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="syncer", password="pass12345")
+        self.other = User.objects.create_user(username="other", password="pass12345")
+        self.client = auth_client_for(self.user)
+        self.notes = [Note.objects.create(owner=self.user, title=f"n{i}") for i in range(3)]
+        Note.objects.create(owner=self.other, title="not mine")
+
+    def changes(self, since=None, **params):
+        if since is not None:
+            params["since"] = since
+        resp = self.client.get("/api/notes/changes/", params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def test_initial_sync_returns_own_notes_oldest_change_first(self):
+        body = self.changes()
+        self.assertEqual([n["title"] for n in body["changed"]], ["n0", "n1", "n2"])
+        self.assertEqual(
+            set(body["changed"][0]),
+            {"id", "title", "content", "status", "created_at", "updated_at"},
+        )
+        self.assertEqual(body["deleted"], [])
+        self.assertFalse(body["has_more"])
+
+        caught_up = self.changes(body["cursor"])
+        self.assertEqual((caught_up["changed"], caught_up["deleted"]), ([], []))
+
+    def test_updates_and_deletes_after_the_cursor(self):
+        cursor = self.changes()["cursor"]
+        self.notes[1].title = "edited"
+        self.notes[1].save()
+        doomed = self.notes[0].pk
+        self.client.delete(f"/api/notes/{doomed}/")
+        # Queryset and cascade deletes leave tombstones too.
+        Note.objects.filter(pk=self.notes[2].pk).delete()
+        Note.objects.filter(owner=self.other).delete()
+
+        body = self.changes(cursor, fields="id,title")
+        self.assertEqual(body["changed"], [{"id": self.notes[1].pk, "title": "edited"}])
+        self.assertEqual(body["deleted"], [doomed, self.notes[2].pk])
+
+    def test_pages_with_has_more(self):
+        first = self.changes(page_size=2)
+        self.assertEqual(len(first["changed"]), 2)
+        self.assertTrue(first["has_more"])
+        rest = self.changes(first["cursor"], page_size=2)
+        self.assertEqual([n["title"] for n in rest["changed"]], ["n2"])
+        self.assertFalse(rest["has_more"])
+
+    def test_pages_through_a_bulk_delete(self):
+        doomed = [Note.objects.create(owner=self.user, title=f"d{i}").pk for i in range(6)]
+        cursor = self.changes()["cursor"]
+        # One statement: every tombstone gets the same deleted_at.
+        Note.objects.filter(pk__in=doomed).delete()
+
+        deleted = []
+        for _ in range(len(doomed)):
+            body = self.changes(cursor, page_size=2)
+            deleted += body["deleted"]
+            cursor = body["cursor"]
+            if not body["has_more"]:
+                break
+        self.assertEqual(deleted, doomed)
+
+    def test_since_now_only_issues_a_cursor(self):
+        body = self.changes("now")
+        self.assertEqual(body["changed"], [])
+        Note.objects.create(owner=self.user, title="later")
+        self.assertEqual([n["title"] for n in self.changes(body["cursor"])["changed"]], ["later"])
+
+    @override_settings(NOTES_SYNC_LAG_SECONDS=60)
+    def test_caught_up_cursor_trails_the_clock(self):
+        cursor = self.changes()["cursor"]
+        # Recent rows are sent again rather than risk skipping a late commit.
+        self.assertEqual(len(self.changes(cursor)["changed"]), 3)
+
+    def test_expired_and_invalid_cursors(self):
+        old = (timezone.now() - timedelta(days=31)).isoformat() + "|0"
+        resp = self.client.get("/api/notes/changes/", {"since": encode_sync_cursor(old, old)})
+        self.assertEqual(resp.status_code, 410)
+        resp = self.client.get("/api/notes/changes/", {"since": "garbage"})
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get("/api/notes/changes/", {"page_size": "x"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_user_delete_cascades_through_the_trigger(self):
+        owner_id = self.other.pk
+        self.other.delete()
+        self.assertEqual(NoteDeletion.objects.filter(owner_id=owner_id).count(), 1)
+
+    def test_compaction_command(self):
+        Note.objects.filter(owner=self.user).delete()
+        NoteDeletion.objects.filter(note_id=self.notes[0].pk).update(
+            deleted_at=timezone.now() - timedelta(days=40)
+        )
+        out = StringIO()
+        call_command("compact_note_deletions", batch_size=1, stdout=out)
+        self.assertIn("Removed 1 tombstones", out.getvalue())
+        self.assertEqual(NoteDeletion.objects.count(), 2)
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def query_budget(testcase, max_queries, label=""):
+    """
+    Fail ``testcase`` if the block runs more than ``max_queries`` SQL statements.
+
+    Unlike ``assertNumQueries`` this is an upper bound, so harmless savings don't
+    break tests, while N+1 regressions (which scale with the data) still do.
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        yield ctx
+    executed = len(ctx.captured_queries)
+    if executed > max_queries:
+        statements = "\n".join(
+            f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, start=1)
+        )
+        testcase.fail(
+            f"{label or 'block'} ran {executed} queries, budget is {max_queries}:\n{statements}"
+        )
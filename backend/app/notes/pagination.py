@@ -0,0 +1,135 @@
+from base64 import b64decode, b64encode
+from datetime import datetime
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
+
+INVALID_CURSOR = CursorPagination.invalid_cursor_message
+
+
+def note_position(row):
+    """Cursor position of a note (instance or ``.values()`` row): ``updated_at|id``."""
+    if isinstance(row, dict):
+        updated_at, pk = row["updated_at"], row["id"]
+    else:
+        updated_at, pk = row.updated_at, row.id
+    return f"{updated_at.isoformat()}|{pk}"
+
+
+def parse_position(position):
+    try:
+        updated_at, pk = position.rsplit("|", 1)
+        return datetime.fromisoformat(updated_at), int(pk)
+    except (AttributeError, TypeError, ValueError):
+        raise NotFound(INVALID_CURSOR)
+
+
+def after_position(queryset, position, reverse=False):
+    """Rows strictly past ``position`` in (-updated_at, -id) order (before it if reversed)."""
+    updated_at, pk = parse_position(position)
+    op = "gt" if reverse else "lt"
+    return queryset.filter(
+        Q(**{f"updated_at__{op}": updated_at}) | Q(updated_at=updated_at, **{f"id__{op}": pk})
+    )
+
+
+def encode_forward_cursor(position):
+    """The ``?cursor=`` token NoteCursorPagination emits for a "next" link."""
+    return b64encode(parse.urlencode({"p": position}).encode("ascii")).decode("ascii")
+
+
+def decode_forward_cursor(encoded):
+    """Position from a "next" cursor token; "previous" (reverse) cursors are rejected."""
+    try:
+        tokens = parse.parse_qs(b64decode(encoded.encode("ascii")).decode("ascii"))
+    except (TypeError, ValueError):
+        raise NotFound(INVALID_CURSOR)
+    if tokens.get("r", ["0"])[0] != "0" or tokens.get("o", ["0"])[0] != "0":
+        raise NotFound(INVALID_CURSOR)
+    return tokens.get("p", [None])[0]
+
+
+class NoteCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (-updated_at, -id).
+
+    DRF's stock cursor only filters on the first ordering field and falls back
+    to OFFSET for ties. Here the cursor position carries both columns, so every
+    page is a single range scan on the (owner, updated_at, id) index.
+    """
+
+    ordering = ("-updated_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = after_position(queryset, current_position, reverse=reverse)
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = list(results[: self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        return note_position(instance)
+
+
+class NoteSearchPagination(PageNumberPagination):
+    """Search results are ordered by rank, which has no stable keyset; page by number."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
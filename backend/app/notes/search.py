@@ -0,0 +1,85 @@
+"""
+Ranked full-text search over notes.
+
+Backed by the structures created in migration 0004: a generated ``tsvector``
+column with a GIN index on PostgreSQL, an FTS5 table on SQLite. Other backends
+fall back to ``icontains``. Every backend annotates ``rank`` (higher is better).
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Note
+
+TABLE = Note._meta.db_table
+FTS_TABLE = f"{TABLE}_fts"
+
+
+def _fts5_query(query):
+    # Quote every token so user input can't hit FTS5 operator syntax; the last
+    # token is a prefix match to support search-as-you-type.
+    tokens = re.findall(r"\w+", query)
+    if not tokens:
+        return None
+    terms = ['"{}"'.format(t.replace('"', '""')) for t in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _tsquery(query):
+    # The same terms for to_tsquery(): quoted, so no operators come from user
+    # input, all required, the last one a prefix (":*") as on SQLite.
+    tokens = re.findall(r"\w+", query)
+    if not tokens:
+        return None
+    terms = [f"'{t}'" for t in tokens]
+    terms[-1] += ":*"
+    return " & ".join(terms)
+
+
+def search_notes(queryset, query):
+    """Filter ``queryset`` to notes matching ``query`` and order by relevance."""
+    query = (query or "").strip()
+    if not query:
+        return queryset
+
+    if connection.vendor == "postgresql":
+        terms = _tsquery(query)
+        if terms is None:
+            return queryset.none()
+        tsquery = "to_tsquery('english', %s)"
+        queryset = queryset.filter(
+            RawSQL(f"{TABLE}.search_vector @@ {tsquery}", [terms], output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(
+                f"ts_rank_cd({TABLE}.search_vector, {tsquery})", [terms], output_field=FloatField()
+            )
+        )
+    elif connection.vendor == "sqlite":
+        match = _fts5_query(query)
+        if match is None:
+            return queryset.none()
+        # bm25() is lower-is-better; title hits weigh 10x body hits.
+        queryset = queryset.filter(
+            RawSQL(
+                f"{TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+                [match],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            rank=RawSQL(
+                f"(SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id)",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+    else:
+        queryset = queryset.filter(
+            Q(title__icontains=query) | Q(content__icontains=query)
+        ).annotate(rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.order_by("-rank", "-updated_at", "-id")
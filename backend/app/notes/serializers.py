@@ -1,12 +1,211 @@
+from app.metrics import timed
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 
-from .models import Note
+from .models import ArchivedNote, Note
 
+# Distinct change-sets up to this many are applied as one UPDATE ... WHERE id IN (...)
+# each; beyond that a single CASE-based bulk_update is cheaper.
+MAX_UPDATE_GROUPS = 10
 
-class NoteSerializer(serializers.ModelSerializer):
-    owner = serializers.ReadOnlyField(source="owner.username")
+
+class TimedDataMixin:
+    """Counts building ``.data`` as serialization time in the request metrics."""
+
+    @property
+    def data(self):
+        with timed("serialize"):
+            return super().data
+
+
+class NoteBulkListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """
+    Batch writes for ``NoteSerializer(many=True)``.
+
+    ``create`` issues one INSERT per ``batch_size`` rows; ``update`` expects the
+    instances in the same order as the submitted items and groups identical
+    changes so a mass status change is a single UPDATE statement.
+    """
+
+    batch_size = 500
+
+    def create(self, validated_data):
+        notes = [Note(**attrs) for attrs in validated_data]
+        return Note.objects.bulk_create(notes, batch_size=self.batch_size)
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        groups = {}
+        for note, attrs in zip(instances, validated_data):
+            for field, value in attrs.items():
+                setattr(note, field, value)
+            # bulk_update/update() skip auto_now, so stamp updated_at ourselves.
+            note.updated_at = now
+            groups.setdefault(tuple(sorted(attrs.items())), []).append(note.pk)
+
+        if len(groups) <= MAX_UPDATE_GROUPS:
+            for changes, ids in groups.items():
+                Note.objects.filter(pk__in=ids).update(**dict(changes), updated_at=now)
+        else:
+            fields = sorted({f for attrs in validated_data for f in attrs} | {"updated_at"})
+            Note.objects.bulk_update(instances, fields, batch_size=self.batch_size)
+        return instances
+
+
+class DynamicFieldsMixin:
+    """Accepts ``fields=[...]`` to emit only that subset of the declared fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class OwnerUsernameField(serializers.ReadOnlyField):
+    """
+    ``owner.username``, taken from the requesting user when they own the note so
+    neither a JOIN nor a per-row query is needed (request.user may be a TokenUser).
+    """
+
+    def get_attribute(self, instance):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        # TokenUser.pk is the raw claim, which simplejwt serialises as a string.
+        if user is not None and user.is_authenticated and str(instance.owner_id) == str(user.pk):
+            return user.username
+        return instance.owner.username
+
+
+class NoteSerializer(TimedDataMixin, DynamicFieldsMixin, serializers.ModelSerializer):
+    owner = OwnerUsernameField()
 
     class Meta:
         model = Note
         fields = ["id", "title", "content", "status", "created_at", "updated_at", "owner"]
         read_only_fields = ["id", "created_at", "updated_at", "owner"]
+        list_serializer_class = NoteBulkListSerializer
+
+
+class NoteListSerializer(NoteSerializer):
+    """Compact default for list responses: no note body, no owner join."""
+
+    class Meta(NoteSerializer.Meta):
+        fields = ["id", "title", "status", "created_at", "updated_at"]
+
+
+def _format_datetime(value, tz):
+    # Mirrors DateTimeField.to_representation with the default ISO-8601 format.
+    if value is None:
+        return None
+    if tz is not None:
+        value = value.astimezone(tz)
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+class NoteRowSerializer:
+    """
+    Read-only fast path producing the same output as ``NoteSerializer(many=True).data``.
+
+    Works on ``.values()`` rows instead of model instances and skips DRF's
+    per-field machinery: accessors and formatters are resolved once per call.
+    Use ``value_columns`` for the ``.values()`` call; it always includes the
+    pagination keys (id, updated_at) even when they are not emitted.
+    """
+
+    sources = {"owner": "owner__username"}
+    datetime_fields = {"created_at", "updated_at"}
+
+    def __init__(self, fields):
+        # Keep declared order so dict key order (and so the JSON bytes) match.
+        self.fields = [f for f in NoteSerializer.Meta.fields if f in fields]
+        columns = {self.sources.get(f, f) for f in self.fields} | {"id", "updated_at"}
+        self.value_columns = sorted(columns)
+
+    def _plan(self):
+        return [(f, self.sources.get(f, f), f in self.datetime_fields) for f in self.fields]
+
+    def to_representation(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        plan = self._plan()
+        fmt = _format_datetime
+        with timed("serialize"):
+            return [
+                {name: fmt(row[col], tz) if is_dt else row[col] for name, col, is_dt in plan}
+                for row in rows
+            ]
+
+    def iter_representation(self, rows):
+        """Lazy variant of ``to_representation`` for streaming large result sets."""
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        plan = self._plan()
+        fmt = _format_datetime
+        for row in rows:
+            yield {name: fmt(row[col], tz) if is_dt else row[col] for name, col, is_dt in plan}
+
+
+class NoteBulkSerializer(serializers.Serializer):
+    """
+    Envelope for ``POST /api/notes/bulk/``::
+
+        {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]}
+    """
+
+    create = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    update = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    delete = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        max_items = self.context["max_items"]
+        total = len(attrs["create"]) + len(attrs["update"]) + len(attrs["delete"])
+        if total == 0:
+            raise serializers.ValidationError("Submit at least one operation.")
+        if total > max_items:
+            raise serializers.ValidationError(f"At most {max_items} operations per request.")
+
+        ids = []
+        for item in attrs["update"]:
+            pk = item.get("id")
+            if not isinstance(pk, int) or isinstance(pk, bool) or pk < 1:
+                raise serializers.ValidationError({"update": "Every item needs an integer 'id'."})
+            ids.append(pk)
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError({"update": "Duplicate ids."})
+        overlap = set(ids) & set(attrs["delete"])
+        if overlap:
+            raise serializers.ValidationError(
+                {"delete": f"Ids both updated and deleted: {sorted(overlap)}"}
+            )
+        return attrs
+
+
+class ArchivedNoteSerializer(TimedDataMixin, serializers.ModelSerializer):
+    """A note in cold storage, under its original id (content only once restored)."""
+
+    id = serializers.IntegerField(source="note_id", read_only=True)
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedNote
+        fields = ["id", "title", "status", "created_at", "updated_at", "archived_at"]
+
+    def get_status(self, obj):
+        return Note.Status.ARCHIVED
+
+
+class NoteRestoreSerializer(serializers.Serializer):
+    """Envelope for ``POST /api/notes/restore/``: ``{"ids": [1, 2]}``."""
+
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_ids(self, ids):
+        max_items = self.context["max_items"]
+        if len(ids) > max_items:
+            raise serializers.ValidationError(f"At most {max_items} ids per request.")
+        return list(dict.fromkeys(ids))
@@ -0,0 +1,161 @@
+"""
+Incremental sync of a user's notes: ``GET /api/notes/changes/?since=<cursor>``.
+
+A sync cursor holds two keyset positions, ``updated_at|id`` into notes and
+``deleted_at|id`` into the tombstone table, so each call is two range scans on
+the (owner, updated_at, id) and (owner_id, deleted_at, id) indexes and returns
+only what changed: upserts in ascending ``updated_at`` order plus deleted ids.
+
+Timestamps are taken before commit, so a transaction can become visible with an
+``updated_at`` older than rows already synced. Once a client has caught up, the
+returned cursor therefore trails the clock by ``NOTES_SYNC_LAG_SECONDS``; rows
+in that window may be sent twice, which an upsert by id absorbs, but none are
+missed. A cursor older than ``NOTES_TOMBSTONE_RETENTION_DAYS`` may have lost
+tombstones to compaction and is answered with 410 Gone: resync from scratch.
+"""
+
+from base64 import b64decode, b64encode
+from datetime import timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .models import Note, NoteDeletion
+from .pagination import INVALID_CURSOR, note_position, parse_position
+from .serializers import NoteRowSerializer
+
+PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+# Everything a client needs to render a note; the owner is always the caller.
+SYNC_FIELDS = ["id", "title", "content", "status", "created_at", "updated_at"]
+# ?since=now: a cursor for "from here on", without the current notes.
+SINCE_NOW = "now"
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync cursor is older than the tombstone retention; resync from scratch."
+    default_code = "cursor_expired"
+
+
+def _position(moment, pk):
+    return f"{moment.isoformat()}|{pk}"
+
+
+def encode_sync_cursor(notes, deletions):
+    query = parse.urlencode({"n": notes, "d": deletions})
+    return b64encode(query.encode("ascii")).decode("ascii")
+
+
+def decode_sync_cursor(encoded):
+    """(notes position, deletions position) from a token issued by ``changes_since``."""
+    try:
+        tokens = parse.parse_qs(b64decode(encoded.encode("ascii"), validate=True).decode("ascii"))
+        notes, deletions = tokens["n"][0], tokens["d"][0]
+    except (KeyError, TypeError, ValueError):
+        raise NotFound(INVALID_CURSOR)
+    parse_position(notes)
+    parse_position(deletions)
+    return notes, deletions
+
+
+def _after(queryset, field, position):
+    moment, pk = parse_position(position)
+    return queryset.filter(Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk}))
+
+
+def _advance(current, last, floor):
+    """
+    Next position after a fully read range: the last row returned, but no later
+    than ``floor`` (the lag window is read again) and never before ``current``.
+    """
+    candidates = [p for p in (last, floor) if p is not None]
+    position = min(candidates, key=parse_position)
+    if current is not None and parse_position(current) > parse_position(position):
+        return current
+    return position
+
+
+def changes_since(owner_id, cursor=None, fields=None, limit=None):
+    """
+    One page of changes for ``owner_id`` after ``cursor`` (None = everything).
+
+    ``limit`` caps each of the two ranges (default ``NOTES_SYNC_PAGE_SIZE``, at
+    most ``MAX_PAGE_SIZE``).
+
+    Returns ``{"changed": [...], "deleted": [ids], "cursor": str, "has_more": bool}``.
+    """
+    limit = min(limit or getattr(settings, "NOTES_SYNC_PAGE_SIZE", PAGE_SIZE), MAX_PAGE_SIZE)
+    now = timezone.now()
+    lag = timedelta(seconds=getattr(settings, "NOTES_SYNC_LAG_SECONDS", 5))
+    floor = _position(now - lag, 0)
+
+    if cursor == SINCE_NOW:
+        return {
+            "changed": [],
+            "deleted": [],
+            "cursor": encode_sync_cursor(floor, floor),
+            "has_more": False,
+        }
+
+    if cursor is None:
+        # Initial sync: every note, and only deletions from this moment on.
+        notes_at, deletions_at = None, floor
+    else:
+        notes_at, deletions_at = decode_sync_cursor(cursor)
+        retention = timedelta(days=getattr(settings, "NOTES_TOMBSTONE_RETENTION_DAYS", 30))
+        if parse_position(deletions_at)[0] < now - retention:
+            raise CursorExpired()
+
+    rows = NoteRowSerializer(fields or SYNC_FIELDS)
+    notes = Note.objects.filter(owner_id=owner_id)
+    if notes_at is not None:
+        notes = _after(notes, "updated_at", notes_at)
+    notes = list(notes.order_by("updated_at", "id").values(*rows.value_columns)[: limit + 1])
+
+    deletions = NoteDeletion.objects.filter(owner_id=owner_id)
+    deletions = _after(deletions, "deleted_at", deletions_at)
+    deletions = list(
+        deletions.order_by("deleted_at", "id").values("id", "note_id", "deleted_at")[: limit + 1]
+    )
+
+    more_notes, more_deletions = len(notes) > limit, len(deletions) > limit
+    notes, deletions = notes[:limit], deletions[:limit]
+    last_note = note_position(notes[-1]) if notes else None
+    last_deletion = (
+        _position(deletions[-1]["deleted_at"], deletions[-1]["id"]) if deletions else None
+    )
+    # A partly read range must move past its last row, or a large burst inside
+    # the lag window would be served forever.
+    next_notes = last_note if more_notes else _advance(notes_at, last_note, floor)
+    next_deletions = (
+        last_deletion if more_deletions else _advance(deletions_at, last_deletion, floor)
+    )
+
+    return {
+        "changed": rows.to_representation(notes),
+        "deleted": [row["note_id"] for row in deletions],
+        "cursor": encode_sync_cursor(next_notes, next_deletions),
+        "has_more": more_notes or more_deletions,
+    }
+
+
+def compact_deletions(days=None, batch_size=5000):
+    """Delete tombstones older than ``days`` (default: the retention); returns the count."""
+    if days is None:
+        days = getattr(settings, "NOTES_TOMBSTONE_RETENTION_DAYS", 30)
+    cutoff = timezone.now() - timedelta(days=days)
+    removed = 0
+    while True:
+        ids = list(
+            NoteDeletion.objects.filter(deleted_at__lt=cutoff).values_list("id", flat=True)[
+                :batch_size
+            ]
+        )
+        if not ids:
+            return removed
+        removed += NoteDeletion.objects.filter(id__in=ids).delete()[0]
@@ -63,7 +63,7 @@ class NoteAuthTests(TestCase):
         # List should only show current user's notes
         resp = self.client.get("/api/notes/")
         self.assertEqual(resp.status_code, 200)
-        data = resp.json()
+        data = resp.json()["results"]
         titles = [n["title"] for n in data]
         self.assertIn("mine", titles)
         self.assertNotIn("u2 note", titles)
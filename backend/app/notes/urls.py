@@ -1,8 +1,15 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import NoteViewSet
 
 router = DefaultRouter()
 router.register(r"notes", NoteViewSet, basename="note")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    # ASGI-native variants of the list/detail endpoints (see notes/async_views.py)
+    path("async/notes/", async_views.note_list, name="async-note-list"),
+    path("async/notes/<int:pk>/", async_views.note_detail, name="async-note-detail"),
+    path("async/notes/events/", async_views.note_events, name="async-note-events"),
+]
@@ -1,21 +1,362 @@
 # Importing required libraries
-from rest_framework import permissions, viewsets
+from contextlib import nullcontext
 
-from .models import Note
-from .serializers import NoteSerializer
+from app.authentication import StreamTicket
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .archive import restore_notes
+from .cache import bump_generation, get_list_cache
+from .conditional import (
+    check_if_match,
+    list_validators,
+    not_modified,
+    note_etag,
+    validator_headers,
+)
+from .counters import status_counts
+from .events import publish
+from .export import CONTENT_TYPES, STREAMERS, export_queryset
+from .models import ArchivedNote, Note, active_notes
+from .pagination import NoteCursorPagination, NoteSearchPagination
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer
+from .search import search_notes
+from .serializers import (
+    ArchivedNoteSerializer,
+    NoteBulkSerializer,
+    NoteListSerializer,
+    NoteRestoreSerializer,
+    NoteRowSerializer,
+    NoteSerializer,
+)
+from .sync import changes_since
+
+
+def filter_by_status(queryset, statuses, include_archived=False):
+    """
+    Apply a comma-separated ``?status=`` value; unknown statuses are a 400.
+
+    Without one, only active (OPEN, IN_PROGRESS) notes unless ``include_archived``.
+    """
+    if not statuses:
+        return queryset if include_archived else active_notes(queryset)
+    wanted = statuses.split(",")
+    invalid = set(wanted) - set(Note.Status.values)
+    if invalid:
+        raise ValidationError({"status": f"Unknown status: {sorted(invalid)}"})
+    return queryset.filter(status__in=wanted)
+
+
+def include_archived(params):
+    return params.get("include_archived") in {"1", "true", "yes"}
 
 
 class NoteViewSet(viewsets.ModelViewSet):
     """
     Simple CRUD for notes.
     Auth required; user sees only their notes.
+
+    The list emits a compact representation (no ``content``/``owner``) unless
+    ``?fields=id,title,...`` asks for specific fields; only the needed columns
+    are read. The list leaves DONE and ARCHIVED notes out unless ``?include_archived=1``;
+    ``?status=OPEN,DONE`` filters it; ``?q=`` runs a ranked full-text search
+    (page-number paginated). ``changes/`` serves incremental sync. Long-archived
+    notes move to cold storage: ``archived/`` lists them, ``restore/`` brings them back.
+    Reads carry ETag/Last-Modified and honour If-None-Match/If-Modified-Since;
+    writes honour If-Match for optimistic concurrency.
     """
 
     serializer_class = NoteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NoteCursorPagination
 
     def get_queryset(self):
-        return Note.objects.filter(owner=self.request.user).order_by("-updated_at")
+        # request.user may be a claims-only TokenUser, so filter on the raw id.
+        # NoteSerializer takes owner.username from request.user, so no owner JOIN.
+        queryset = Note.objects.filter(owner_id=self.request.user.pk).order_by("-updated_at", "-id")
+        if self.action == "list":
+            # Here rather than in filter_queryset so the list's ETag covers the same rows.
+            params = self.request.query_params
+            queryset = filter_by_status(queryset, params.get("status"), include_archived(params))
+        elif self.action in ("update", "partial_update", "destroy") and self.conditional_write:
+            # Locked until update()/destroy() commit, so two writers sending the
+            # same If-Match cannot both pass the check.
+            queryset = queryset.select_for_update(of=("self",))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list" and not self.requested_fields:
+            return NoteListSerializer
+        return super().get_serializer_class()
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action == "list" and self.requested_fields:
+            kwargs.setdefault("fields", self.requested_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    @property
+    def requested_fields(self):
+        """Fields named by ``?fields=`` (validated), or None for the default."""
+        if not hasattr(self, "_requested_fields"):
+            raw = self.request.query_params.get("fields")
+            fields = [f for f in raw.split(",") if f] if raw else None
+            if fields:
+                unknown = set(fields) - set(NoteSerializer.Meta.fields)
+                if unknown:
+                    raise ValidationError({"fields": f"Unknown fields: {sorted(unknown)}"})
+            self._requested_fields = fields or None
+        return self._requested_fields
+
+    def list_columns(self):
+        """Model columns the list serializer needs (plus the pagination keys)."""
+        fields = self.requested_fields or NoteListSerializer.Meta.fields
+        columns = {"id", "updated_at"}
+        columns.update(f for f in fields if f != "owner")
+        if "owner" in fields:
+            columns.add("owner__username")
+        return sorted(columns)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.action == "list" and self.request.query_params.get("q"):
+                self._paginator = NoteSearchPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            queryset = search_notes(queryset, self.request.query_params.get("q"))
+            columns = self.list_columns()
+            if "owner__username" in columns:
+                queryset = queryset.select_related("owner")
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_object(self):
+        obj = super().get_object()
+        if self.request.method in ("PUT", "PATCH", "DELETE"):
+            check_if_match(self.request, obj)
+        return obj
+
+    @property
+    def conditional_write(self):
+        return bool(self.request.headers.get("If-Match"))
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic() if self.conditional_write else nullcontext():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic() if self.conditional_write else nullcontext():
+            return super().destroy(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        uri = request.build_absolute_uri()
+        etag, last_modified = list_validators(self.get_queryset(), request.user.pk, uri)
+        self.headers.update(validator_headers(etag, last_modified))
+        if not_modified(request, etag, last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        # Serve repeat list calls from the per-user cache. Keyed by the ETag just
+        # computed, a cached page always matches the validators sent with it.
+        cache = get_list_cache()
+        if cache is None:
+            return self.list_response(request, *args, **kwargs)
+
+        key = cache.key_for(request.user.pk, etag)
+        data = cache.get(key)
+        if data is None:
+            response = self.list_response(request, *args, **kwargs)
+            cache.set(key, response.data)
+            return response
+        return Response(data)
+
+    def list_response(self, request, *args, **kwargs):
+        if not getattr(settings, "NOTES_FAST_SERIALIZATION", True):
+            return super().list(request, *args, **kwargs)
+
+        # Same output as the serializer path, built from .values() rows.
+        rows = NoteRowSerializer(self.requested_fields or NoteListSerializer.Meta.fields)
+        queryset = self.filter_queryset(self.get_queryset()).values(*rows.value_columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.to_representation(page))
+        return Response(rows.to_representation(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = note_etag(instance)
+        self.headers.update(validator_headers(etag, instance.updated_at))
+        if not_modified(request, etag, instance.updated_at):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return Response(self.get_serializer(instance).data)
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        serializer.save(owner_id=self.request.user.pk)
+        self.headers["ETag"] = note_etag(serializer.instance)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self.headers["ETag"] = note_etag(serializer.instance)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats(self, request):
+        """Per-status badge counts, read from the trigger-maintained counter table."""
+        counts = status_counts(request.user.pk)
+        return Response({"total": sum(counts.values()), "by_status": counts})
+
+    @action(detail=False, methods=["post"], url_path="events/ticket")
+    def events_ticket(self, request):
+        """A single-use ``?ticket=`` for ``/api/async/notes/events/``, for EventSource."""
+        ticket = StreamTicket.for_request(request)
+        return Response({"ticket": str(ticket), "expires_in": ticket.lifetime.total_seconds()})
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=[NDJSONRenderer, FastJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """
+        Stream every note as ``?format=ndjson`` (default), ``json`` or ``csv``.
+
+        Resume with ``?since=<updated_at>&after_id=<id>`` from the last record.
+        """
+        since = request.query_params.get("since")
+        after_id = request.query_params.get("after_id")
+        if since is not None:
+            since = parse_datetime(since)
+            if since is None:
+                raise ValidationError({"since": "Expected an ISO-8601 datetime."})
+        if after_id is not None:
+            if since is None or not after_id.isdigit():
+                raise ValidationError({"after_id": "Needs 'since' and an integer id."})
+            after_id = int(after_id)
+
+        fmt = request.accepted_renderer.format
+        queryset = export_queryset(
+            Note.objects.filter(owner_id=request.user.pk), since=since, after_id=after_id
+        )
+        chunk_size = getattr(settings, "NOTES_EXPORT_CHUNK_SIZE", 2000)
+        response = StreamingHttpResponse(
+            STREAMERS[fmt](queryset, chunk_size), content_type=CONTENT_TYPES[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="notes.{fmt}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Apply many creates/updates/deletes in one transaction.
+
+        All-or-nothing: any invalid item rejects the whole batch with per-item
+        errors. Deleting an id that does not exist is reported, not an error.
+        """
+        envelope = NoteBulkSerializer(
+            data=request.data,
+            context={"max_items": getattr(settings, "NOTES_BULK_MAX_ITEMS", 1000)},
+        )
+        envelope.is_valid(raise_exception=True)
+        ops = envelope.validated_data
+        queryset = self.get_queryset().order_by()
+
+        with transaction.atomic():
+            creator = self.get_serializer(data=ops["create"], many=True)
+            if not creator.is_valid():
+                raise ValidationError({"create": creator.errors})
+            created = creator.save(owner_id=request.user.pk) if ops["create"] else []
+
+            updated = []
+            if ops["update"]:
+                ids = [item["id"] for item in ops["update"]]
+                found = queryset.select_for_update(of=("self",)).in_bulk(ids)
+                missing = [pk for pk in ids if pk not in found]
+                if missing:
+                    raise ValidationError({"update": f"Notes not found: {missing}"})
+                updater = self.get_serializer(
+                    [found[pk] for pk in ids], data=ops["update"], many=True, partial=True
+                )
+                if not updater.is_valid():
+                    raise ValidationError({"update": updater.errors})
+                updated = updater.save()
+
+            deleted = []
+            if ops["delete"]:
+                doomed = queryset.filter(pk__in=ops["delete"])
+                deleted = list(doomed.values_list("pk", flat=True))
+                doomed.delete()
+
+            # bulk_create/bulk_update send no post_save.
+            publish(request.user.pk, "changed", [n.pk for n in [*created, *updated] if n.pk])
+
+        bump_generation(request.user.pk)
+        deleted_set = set(deleted)
+        return Response(
+            {
+                "created": self.get_serializer(created, many=True).data,
+                "updated": self.get_serializer(updated, many=True).data,
+                "deleted": [pk for pk in ops["delete"] if pk in deleted_set],
+                "not_found": [pk for pk in ops["delete"] if pk not in deleted_set],
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path="archived")
+    def archived(self, request):
+        """Notes in cold storage (see notes/archive.py), most recently updated first."""
+        queryset = ArchivedNote.objects.filter(owner_id=request.user.pk).order_by(
+            "-updated_at", "-note_id"
+        )
+        paginator = NoteSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(ArchivedNoteSerializer(page, many=True).data)
+
+    @action(detail=False, methods=["post"], url_path="restore")
+    def restore(self, request):
+        """Move ``{"ids": [...]}`` back from cold storage; they return as ARCHIVED notes."""
+        envelope = NoteRestoreSerializer(
+            data=request.data,
+            context={"max_items": getattr(settings, "NOTES_BULK_MAX_ITEMS", 1000)},
+        )
+        envelope.is_valid(raise_exception=True)
+        ids = envelope.validated_data["ids"]
+        restored = restore_notes(request.user.pk, ids)
+        found = {note.pk for note in restored}
+        return Response(
+            {
+                "restored": self.get_serializer(restored, many=True).data,
+                "not_found": [pk for pk in ids if pk not in found],
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        """
+        Notes changed and ids deleted since ``?since=<cursor>`` (omitted: everything).
+
+        Page with ``has_more`` and the returned ``cursor``; ``?since=now`` only
+        issues a cursor. An expired cursor answers 410: resync from scratch.
+        """
+        raw_size = request.query_params.get("page_size", "")
+        if raw_size and not raw_size.isdigit():
+            raise ValidationError({"page_size": "Expected a positive integer."})
+        return Response(
+            changes_since(
+                request.user.pk,
+                cursor=request.query_params.get("since") or None,
+                fields=self.requested_fields,
+                limit=int(raw_size) if raw_size else None,
+            )
+        )
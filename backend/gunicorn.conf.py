@@ -5,11 +5,16 @@ Env-overridable knobs:
 - GUNICORN_BIND (default "0.0.0.0:8000")
 - GUNICORN_WORKERS (default 2*CPU+1)
 - GUNICORN_THREADS (default 2 for gthread)
-- GUNICORN_WORKER_CLASS (default "gthread")
+- GUNICORN_AUTOSCALE (default "false"), GUNICORN_MIN_WORKERS (2), GUNICORN_MAX_WORKERS
+  (GUNICORN_WORKERS), GUNICORN_MAX_WORKER_RSS_MB (0 = off), GUNICORN_AUTOSCALE_* tuning
+- GUNICORN_MAX_REQUESTS (default 2000), GUNICORN_MAX_REQUESTS_JITTER (default 10%)
+- GUNICORN_WORKER_CLASS (default "gthread"; "uvicorn" serves the ASGI app)
+- GUNICORN_APP (default: the WSGI or ASGI application matching the worker class)
 - GUNICORN_TIMEOUT (default 30)
 - GUNICORN_GRACEFUL_TIMEOUT (default 30)
 - GUNICORN_KEEPALIVE (default 2)
 - GUNICORN_PRELOAD (default "true")
+- GUNICORN_WARMUP (default "true")
 - GUNICORN_ACCESSLOG (default "-")
 - GUNICORN_ERRORLOG (default "-")
 - GUNICORN_LOGLEVEL (default "info")
@@ -18,8 +23,12 @@ Env-overridable knobs:
 - GUNICORN_LIMIT_REQUEST_FIELD_SIZE (default 8190)
 """
 
+import gc
 import multiprocessing as mp
 import os
+import time
+
+_config_loaded = time.monotonic()
 
 
 def _get(key, default, cast=str):
@@ -46,10 +55,47 @@ bind = _get("GUNICORN_BIND", "0.0.0.0:8000")
 default_workers = max(2, mp.cpu_count() * 2 + 1)
 workers = _get("GUNICORN_WORKERS", default_workers, int)
 
-# Default to simple threaded workers for DRF
+# Default to simple threaded workers for DRF. "uvicorn" runs an event loop per
+# worker instead, so the async notes endpoints (/api/async/notes/) can keep many
+# requests waiting on the database without one thread each.
+WORKER_CLASSES = {"uvicorn": "uvicorn.workers.UvicornWorker"}
 worker_class = _get("GUNICORN_WORKER_CLASS", "gthread")
+worker_class = WORKER_CLASSES.get(worker_class, worker_class)
+asgi = worker_class.startswith("uvicorn.")
 threads = _get("GUNICORN_THREADS", 2, int)  # increase to 4 if requests are slow IO-bound
 
+# Autoscaling (app/autoscale.py): a master thread adds/removes workers between
+# GUNICORN_MIN_WORKERS and GUNICORN_MAX_WORKERS from the listen backlog and busy
+# threads, and recycles workers whose RSS passes GUNICORN_MAX_WORKER_RSS_MB.
+autoscale = _get("GUNICORN_AUTOSCALE", "false", bool)
+min_workers = _get("GUNICORN_MIN_WORKERS", 2, int)
+max_workers = _get("GUNICORN_MAX_WORKERS", workers, int)
+if autoscale:
+    workers = min(max(workers, min_workers), max_workers)
+max_worker_rss_mb = _get("GUNICORN_MAX_WORKER_RSS_MB", 0, int)  # 0 = no RSS ceiling
+autoscaler = None
+
+# Recycle workers after a number of requests (jittered so they do not restart together)
+max_requests = _get("GUNICORN_MAX_REQUESTS", 2000, int)
+max_requests_jitter = _get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10, int)
+# Each thread holds at most one DB connection (CONN_MAX_AGE in settings), so
+# PostgreSQL sees up to workers * threads connections per host.
+
+# Application (a positional APP_MODULE on the command line still wins)
+wsgi_app = _get(
+    "GUNICORN_APP",
+    "backend.app.app.asgi:application" if asgi else "backend.app.app.wsgi:application",
+)
+if asgi:
+    # Under ASGI, sync ORM work runs in a fresh thread per request, so a
+    # persistent connection is never reused; close them after each request.
+    # Assigned, not defaulted: a DB_CONN_MAX_AGE meant for gthread (.env) would
+    # otherwise leave every request thread's connection open.
+    os.environ["DB_CONN_MAX_AGE"] = "0"
+
+# Workers share request metrics through per-process files here (see app/metrics.py).
+metrics_dir = os.environ.setdefault("METRICS_DIR", "/tmp/notes-metrics")
+
 # Timeouts
 timeout = _get("GUNICORN_TIMEOUT", 30, int)  # hard kill if worker hangs
 graceful_timeout = _get("GUNICORN_GRACEFUL_TIMEOUT", 30, int)  # extra time to finish in-flight reqs
@@ -58,6 +104,9 @@ keepalive = _get("GUNICORN_KEEPALIVE", 2, int)
 # Memory & startup
 preload_app = _get("GUNICORN_PRELOAD", "true", bool)
 # NOTE: avoid doing DB work at import-time when preload_app=True
+# Build URL resolvers, serializer fields, JWT backend and templates before serving
+# (in the master before fork when preloading; see app/warmup.py).
+warmup = _get("GUNICORN_WARMUP", "true", bool)
 
 # Logging
 accesslog = _get("GUNICORN_ACCESSLOG", "-")  # "-" means stdout
@@ -76,13 +125,126 @@ limit_request_field_size = _get("GUNICORN_LIMIT_REQUEST_FIELD_SIZE", 8190, int)
 
 # Hooks (optional; helpful for diagnostics)
 def on_starting(server):
+    global autoscaler
     server.log.info("Gunicorn starting...")
+    # Throttle buckets and the in-flight count are shared by all workers.
+    from app import ratelimit
+
+    ratelimit.allocate()
+    if autoscale or max_worker_rss_mb:
+        from app.autoscale import Autoscaler
+
+        # Before any fork, so every worker shares its busy-count array.
+        autoscaler = Autoscaler(
+            min_workers,
+            max_workers,
+            1 if asgi else threads,
+            interval=_get("GUNICORN_AUTOSCALE_INTERVAL", 2.0, float),
+            window=_get("GUNICORN_AUTOSCALE_WINDOW", 5, int),
+            up_ratio=_get("GUNICORN_AUTOSCALE_UP_RATIO", 0.75, float),
+            down_ratio=_get("GUNICORN_AUTOSCALE_DOWN_RATIO", 0.25, float),
+            up_cooldown=_get("GUNICORN_AUTOSCALE_UP_COOLDOWN", 10.0, float),
+            down_cooldown=_get("GUNICORN_AUTOSCALE_DOWN_COOLDOWN", 60.0, float),
+            max_rss_mb=max_worker_rss_mb,
+            enabled=autoscale,
+            count_requests=not asgi,
+            metrics_dir=metrics_dir,
+        )
+    # Start the metrics from zero; files of the previous run's workers are stale.
+    if os.path.isdir(metrics_dir):
+        for name in os.listdir(metrics_dir):
+            if name.endswith((".json", ".tmp")):
+                os.remove(os.path.join(metrics_dir, name))
+
+
+def when_ready(server):
+    if preload_app and warmup:
+        from app.warmup import warmup as warm
+
+        timings = warm()
+        # Move everything loaded so far out of the collector's reach: collections
+        # in the workers would otherwise write to (and so copy) the shared pages.
+        gc.collect()
+        gc.freeze()
+        server.log.info(
+            "Warmed up in %.0f ms %s; %d objects frozen",
+            sum(timings.values()),
+            timings,
+            gc.get_freeze_count(),
+        )
+    server.log.info("Master ready in %.2fs", time.monotonic() - _config_loaded)
+    if autoscaler is not None:
+        autoscaler.start(server)
+        server.log.info(
+            "Autoscaling %s between %d and %d workers, RSS ceiling %s",
+            "on" if autoscale else "off",
+            min_workers,
+            max_workers,
+            f"{max_worker_rss_mb} MiB" if max_worker_rss_mb else "none",
+        )
+
+
+def pre_fork(server, worker):
+    if autoscaler is not None:
+        autoscaler.assign(worker)
 
 
 def post_fork(server, worker):
+    worker.forked_at = time.monotonic()
     server.log.info("Worker spawned (pid: %s)", worker.pid)
 
 
+def post_worker_init(worker):
+    from app.warmup import memory_usage
+
+    if warmup and not preload_app:
+        from app.warmup import warmup as warm
+
+        warm()
+    # `kill -USR2 <worker pid>` profiles that worker (see app/profiling.py).
+    from app.profiling import install_signal_handler
+
+    install_signal_handler()
+    # Start the readiness prober now so its first result is in before traffic.
+    from app.health import get_prober
+
+    get_prober()
+    worker.log.info(
+        "Worker %s ready in %.0f ms, memory %s",
+        worker.pid,
+        (time.monotonic() - worker.forked_at) * 1000,
+        memory_usage() or "n/a",
+    )
+
+
+def pre_request(worker, req):
+    if autoscaler is not None:
+        autoscaler.request_started(worker)
+
+
+def post_request(worker, req, environ, resp):
+    if autoscaler is not None:
+        autoscaler.request_finished(worker)
+
+
+def worker_exit(server, worker):
+    from app.metrics import registry
+
+    # Whatever is still waiting for the next periodic flush.
+    registry.flush(force=True)
+
+
+def child_exit(server, worker):
+    from app import ratelimit
+    from app.metrics import fold_exited
+
+    # A worker killed mid-request never decrements the in-flight count.
+    ratelimit.in_flight().forget(worker.pid)
+    fold_exited(metrics_dir, worker.pid)
+    if autoscaler is not None:
+        autoscaler.release(worker)
+
+
 def worker_int(worker):
     worker.log.info("Worker received INT or QUIT signal")
 
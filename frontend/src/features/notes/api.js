@@ -1,8 +1,30 @@
-import { api } from "../../api/client.js";
+import { api, API_BASE } from "../../api/client.js";
+import { getAccessToken } from "../auth/useAuth.js";
 
-export async function fetchNotes() {
-  const { data } = await api.get("/notes/");
-  return data; // expect: [{id, title, content, status?, created_at?, updated_at?}, ...]
+// DRF returns absolute next/previous URLs; callers only need the opaque cursor.
+function cursorFrom(url) {
+  if (!url) return null;
+  return new URL(url, window.location.origin).searchParams.get("cursor");
+}
+
+// Statuses the list shows by default (ACTIVE_STATUSES in backend notes/models.py).
+export const ACTIVE_STATUSES = ["OPEN", "IN_PROGRESS"];
+
+// Done and archived notes are left out unless includeArchived.
+export async function fetchNotes({ cursor, pageSize, fields, includeArchived } = {}) {
+  const params = {};
+  if (cursor) params.cursor = cursor;
+  if (includeArchived) params.include_archived = 1;
+  if (pageSize) params.page_size = pageSize;
+  if (fields) params.fields = fields.join(",");
+  const { data } = await api.get("/notes/", { params });
+  // expect: { results: [{id, title, status, created_at, updated_at}, ...], next, previous }
+  // (content/owner only when requested via `fields`; getNote() returns the full note)
+  return {
+    results: data?.results ?? [],
+    next: cursorFrom(data?.next),
+    previous: cursorFrom(data?.previous),
+  };
 }
 
 export async function createNote(payload) {
@@ -24,3 +46,82 @@ export async function updateNote(id, payload) {
 export async function deleteNote(id) {
   await api.delete(`/notes/${id}/`);
 }
+
+// ops: { create?: [{title, ...}], update?: [{id, ...changes}], delete?: [id, ...] }
+export async function bulkNotes(ops) {
+  const { data } = await api.post("/notes/bulk/", ops);
+  return data; // { created, updated, deleted, not_found }
+}
+
+// Notes archived long ago live in cold storage until restored.
+export async function fetchColdNotes({ page } = {}) {
+  const { data } = await api.get("/notes/archived/", { params: { page } });
+  return data; // { count, next, previous, results: [{id, title, status, ..., archived_at}] }
+}
+
+export async function restoreNotes(ids) {
+  const { data } = await api.post("/notes/restore/", { ids });
+  return data; // { restored: [note, ...], not_found: [id, ...] }
+}
+
+// since: cursor from the previous call, "now" for a cursor only, omitted for everything.
+// A 410 response means the cursor expired: reload the list and start over.
+export async function fetchChanges({ since, pageSize, fields } = {}) {
+  const params = {};
+  if (since) params.since = since;
+  if (pageSize) params.page_size = pageSize;
+  if (fields) params.fields = fields.join(",");
+  const { data } = await api.get("/notes/changes/", { params });
+  return data; // { changed: [note, ...], deleted: [id, ...], cursor, has_more }
+}
+
+export async function fetchNoteStats() {
+  const { data } = await api.get("/notes/stats/");
+  return data; // { total, by_status: { OPEN, IN_PROGRESS, DONE, ARCHIVED } }
+}
+
+// Server-sent change events (served only by the ASGI deployment). onEvent gets
+// { type: "changed" | "deleted" | "resync", ids } and should sync. EventSource
+// cannot send the token, so each stream opens with a single-use ticket and
+// ends when the token expires. A stream that was up is reopened with a new
+// ticket, one that never opened (no ASGI server) is left closed.
+export function subscribeNoteEvents(onEvent) {
+  let source = null;
+  let timer = null;
+  let closed = false;
+
+  async function open() {
+    if (closed || !getAccessToken() || typeof EventSource === "undefined") return;
+    let ticket;
+    try {
+      ({ ticket } = (await api.post("/notes/events/ticket/")).data);
+    } catch {
+      return;
+    }
+    if (closed) return;
+    let opened = false;
+    source = new EventSource(
+      `${API_BASE}/async/notes/events/?ticket=${encodeURIComponent(ticket)}`
+    );
+    source.onopen = () => {
+      opened = true;
+    };
+    for (const type of ["changed", "deleted", "resync"]) {
+      source.addEventListener(type, (e) => onEvent(JSON.parse(e.data)));
+    }
+    source.onerror = () => {
+      // EventSource's own retry would reuse the spent ticket.
+      source.close();
+      if (!opened) return;
+      onEvent({ type: "resync" }); // also refreshes an expired token via the API client
+      timer = setTimeout(open, 3000);
+    };
+  }
+
+  open();
+  return () => {
+    closed = true;
+    clearTimeout(timer);
+    source?.close();
+  };
+}
@@ -1,20 +1,56 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Link } from "react-router-dom";
-import { fetchNotes, createNote, deleteNote } from "../api.js";
+import {
+  ACTIVE_STATUSES,
+  fetchNotes,
+  fetchNoteStats,
+  fetchChanges,
+  fetchColdNotes,
+  restoreNotes,
+  createNote,
+  deleteNote,
+  subscribeNoteEvents,
+} from "../api.js";
+
+// The compact list representation leaves content out; the page shows it.
+const LIST_FIELDS = ["id", "title", "content", "status", "created_at", "updated_at"];
+
+function byUpdatedDesc(a, b) {
+  return b.updated_at.localeCompare(a.updated_at) || b.id - a.id;
+}
 
 export default function NotesListPage() {
   const [items, setItems] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [stats, setStats] = useState(null);
+  // Refs, not state: sync() also runs from the event stream's listeners.
+  const syncCursor = useRef(null);
+  const syncing = useRef(null);
+  const syncRef = useRef(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [err, setErr] = useState("");
   const [title, setTitle] = useState("");
   const [content, setContent] = useState("");
+  // Done and archived notes are only listed on request; cold storage has its own view.
+  const [showAll, setShowAll] = useState(false);
+  const [cold, setCold] = useState(null);
+  const [coldPage, setColdPage] = useState(null);
 
-  async function load() {
+  async function load(all = showAll) {
     try {
       setLoading(true);
       setErr("");
-      const data = await fetchNotes();
-      setItems(Array.isArray(data) ? data : []);
+      // Take the sync cursor first so nothing written during the load is missed.
+      const { cursor } = await fetchChanges({ since: "now" });
+      const [page, counts] = await Promise.all([
+        fetchNotes({ fields: LIST_FIELDS, includeArchived: all }),
+        fetchNoteStats(),
+      ]);
+      setItems(page.results);
+      setNextCursor(page.next);
+      setStats(counts);
+      syncCursor.current = cursor;
     } catch (e) {
       setErr(e?.response?.data?.detail || e?.message || "Failed to load notes.");
     } finally {
@@ -22,8 +58,104 @@ export default function NotesListPage() {
     }
   }
 
+  // Apply what changed since the last sync instead of reloading the list.
+  async function applyChanges() {
+    try {
+      let since = syncCursor.current;
+      const changed = new Map();
+      const deleted = new Set();
+      for (;;) {
+        const page = await fetchChanges({ since, fields: LIST_FIELDS });
+        page.changed.forEach((n) => changed.set(n.id, n));
+        page.deleted.forEach((id) => deleted.add(id));
+        since = page.cursor;
+        if (!page.has_more) break;
+      }
+      syncCursor.current = since;
+      // Unless showing all, one done or archived elsewhere drops off the list.
+      setItems((prev) =>
+        [...prev.filter((n) => !changed.has(n.id)), ...changed.values()]
+          .filter(
+            (n) => !deleted.has(n.id) && (showAll || ACTIVE_STATUSES.includes(n.status))
+          )
+          .sort(byUpdatedDesc)
+      );
+      setStats(await fetchNoteStats());
+    } catch (e) {
+      if (e?.response?.status === 410) return load();
+      setErr(e?.response?.data?.detail || e?.message || "Failed to sync notes.");
+    }
+  }
+
+  // One sync at a time; events arriving meanwhile fold into a single follow-up.
+  async function sync() {
+    if (!syncCursor.current) return load();
+    if (syncing.current) {
+      syncing.current.again = true;
+      return syncing.current.done;
+    }
+    const run = { again: false };
+    syncing.current = run;
+    run.done = (async () => {
+      do {
+        run.again = false;
+        await applyChanges();
+      } while (run.again);
+      syncing.current = null;
+    })();
+    return run.done;
+  }
+  syncRef.current = sync;
+
+  async function loadMore() {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchNotes({
+        cursor: nextCursor,
+        fields: LIST_FIELDS,
+        includeArchived: showAll,
+      });
+      setItems((prev) => [...prev, ...page.results]);
+      setNextCursor(page.next);
+    } catch (e) {
+      setErr(e?.response?.data?.detail || e?.message || "Failed to load notes.");
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
+  function onToggleShowAll(e) {
+    setShowAll(e.target.checked);
+    load(e.target.checked);
+  }
+
+  async function loadCold(page = 1) {
+    try {
+      setErr("");
+      const data = await fetchColdNotes({ page });
+      setCold((prev) => (page === 1 ? data.results : [...prev, ...data.results]));
+      setColdPage(data.next ? page + 1 : null);
+    } catch (e) {
+      setErr(e?.response?.data?.detail || e?.message || "Failed to load cold storage.");
+    }
+  }
+
+  async function onRestore(id) {
+    try {
+      setErr("");
+      await restoreNotes([id]);
+      setCold((prev) => prev.filter((n) => n.id !== id));
+      // Restored notes come back ARCHIVED, listed once done/archived are shown.
+      await sync();
+    } catch (e) {
+      setErr(e?.response?.data?.detail || e?.message || "Failed to restore note.");
+    }
+  }
+
   useEffect(() => {
     load();
+    return subscribeNoteEvents(() => syncRef.current());
   }, []);
 
   async function onCreate(e) {
@@ -37,7 +169,7 @@ export default function NotesListPage() {
       await createNote({ title: title.trim(), content: content.trim() });
       setTitle("");
       setContent("");
-      await load();
+      await sync();
     } catch (e) {
       setErr(e?.response?.data?.detail || e?.message || "Failed to create note.");
     }
@@ -56,6 +188,53 @@ export default function NotesListPage() {
   return (
     <section>
       <h2>Notes</h2>
+      {stats ? (
+        <p style={{ fontSize: 14, opacity: 0.8 }}>
+          {stats.by_status.OPEN} open / {stats.by_status.IN_PROGRESS} in progress /{" "}
+          {stats.by_status.DONE} done
+        </p>
+      ) : null}
+      <p style={{ display: "flex", gap: 16, alignItems: "center" }}>
+        <label>
+          <input type="checkbox" checked={showAll} onChange={onToggleShowAll} />
+          {" Show done and archived"}
+        </label>
+        <button type="button" onClick={() => (cold ? setCold(null) : loadCold())}>
+          {cold ? "Hide cold storage" : "Cold storage"}
+        </button>
+      </p>
+
+      {cold ? (
+        <div style={{ marginBottom: 16 }}>
+          <h3>Cold storage</h3>
+          {cold.length === 0 ? (
+            <p>Nothing in cold storage.</p>
+          ) : (
+            <ul style={{ listStyle: "none", padding: 0, display: "grid", gap: 8 }}>
+              {cold.map((n) => (
+                <li key={n.id} style={{ display: "flex", alignItems: "center", gap: 8 }}>
+                  <span>{n.title ?? "(untitled)"}</span>
+                  <span style={{ fontSize: 12, opacity: 0.7 }}>
+                    Archived: {new Date(n.archived_at).toLocaleString()}
+                  </span>
+                  <button
+                    type="button"
+                    onClick={() => onRestore(n.id)}
+                    style={{ marginLeft: "auto" }}
+                  >
+                    Restore
+                  </button>
+                </li>
+              ))}
+            </ul>
+          )}
+          {coldPage ? (
+            <button type="button" onClick={() => loadCold(coldPage)}>
+              Load more
+            </button>
+          ) : null}
+        </div>
+      ) : null}
 
       <form
         onSubmit={onCreate}
@@ -115,6 +294,12 @@ export default function NotesListPage() {
           ))}
         </ul>
       )}
+
+      {!loading && nextCursor ? (
+        <button type="button" onClick={loadMore} disabled={loadingMore} style={{ marginTop: 12 }}>
+          {loadingMore ? "Loading…" : "Load more"}
+        </button>
+      ) : null}
     </section>
   );
 }